@@ -0,0 +1,300 @@
+"""
+Batch Rendering Module
+Renders CSV cover rows sequentially or on a warm process pool,
+optionally skipping rows recorded as done in a completion journal
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .covers import CoverGenerator
+from .fonts import get_font_index
+from .rendercache import RenderCache
+from .utils import file_signature
+
+# (row index, title, generate_cover kwargs, output directory)
+CoverTask = Tuple[int, str, Dict[str, Any], str]
+
+
+@dataclass
+class RowResult:
+    index: int
+    title: str
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    skipped: bool = False
+    outputs: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchStats:
+    rows: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    def add(self, result: RowResult) -> None:
+        self.rows += 1
+        if result.skipped:
+            self.skipped += 1
+            return
+        if result.error:
+            self.failed += 1
+        self.latencies.append(result.seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of per-row latency, in seconds"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, int(round(pct / 100 * len(ordered))))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def summary(self) -> str:
+        rate = self.rows / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"{self.rows} rows ({self.skipped} up to date, {self.failed} failed) in {self.elapsed:.2f}s: "
+            f"{rate:.1f} rows/s, p50 {self.percentile(50) * 1000:.0f} ms, "
+            f"p95 {self.percentile(95) * 1000:.0f} ms per row"
+        )
+
+
+# ----- CSV rows -> generate_cover kwargs -------------------------------------
+
+
+COVER_PARAMS = {p.name for p in inspect.signature(CoverGenerator.generate_cover).parameters.values()} - {'self'}
+COVER_DEFAULTS = {p.name: p.default for p in inspect.signature(CoverGenerator.generate_cover).parameters.values()}
+BOOL_PARAMS = {'bold', 'shadow', 'export_png', 'export_jpg', 'include_metadata'}
+
+
+def cover_params_from_row(row: Dict[str, str], index: int) -> Dict[str, Any]:
+    """Convert one CSV row into generate_cover keyword arguments"""
+    cover_params: Dict[str, Any] = {k: v for k, v in row.items() if k in COVER_PARAMS and v}
+
+    for key in BOOL_PARAMS & cover_params.keys():
+        cover_params[key] = cover_params[key].upper() == 'TRUE'
+    if 'gradient_angle' in cover_params:
+        cover_params['gradient_angle'] = float(cover_params['gradient_angle'])
+    if 'gradient_colors' in cover_params:
+        cover_params['gradient_colors'] = cover_params['gradient_colors'].split(';')
+
+    title = row.get('title', f'cover_{index + 1}')
+    cover_params['filename_stem'] = f"{safe_stem(title)}_630x500"
+    return cover_params
+
+
+def safe_stem(title: str) -> str:
+    """Filename-safe version of a title: alphanumerics, spaces become underscores"""
+    sanitized_title = "".join(c for c in title if c.isalnum() or c in (' ', '_')).rstrip()
+    return sanitized_title.replace(' ', '_')
+
+
+def expected_outputs(params: Dict[str, Any], output_dir: str) -> List[str]:
+    """Files generate_cover will write for these kwargs"""
+    stem = params['filename_stem']
+    outputs = []
+    if params.get('export_png', True):
+        outputs.append(os.path.join(output_dir, f"{stem}.png"))
+    if params.get('export_jpg', False):
+        outputs.append(os.path.join(output_dir, f"{stem}.jpg"))
+    return outputs
+
+
+def row_key(params: Dict[str, Any]) -> str:
+    """Hash of everything that affects a row's pixels (params, engine version, logo and font files)"""
+    logo = file_signature(params.get('logo_path'))
+    # The files the row's font resolves to: the title's weight, and regular for studio and version
+    fonts = get_font_index()
+    font = params.get('font', COVER_DEFAULTS['font'])
+    font_files = [fonts.resolve(font, params.get('bold', COVER_DEFAULTS['bold'])), fonts.resolve(font, False)]
+    payload = {
+        'engine': CoverGenerator.ENGINE_VERSION,
+        'params': params,
+        'logo': logo[1:] if logo else None,
+        'fonts': [file_signature(f) for f in font_files],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# ----- Completion journal ----------------------------------------------------
+
+
+class CompletionJournal:
+    """
+    Append-only JSON-lines record of rendered rows, keyed by row_key().
+
+    A row is up to date when its key is journaled and every recorded output
+    still exists with the recorded size and mtime. Each record is flushed as
+    soon as the row finishes, so an interrupted run loses at most the rows
+    that were in flight.
+    """
+
+    FILENAME = '.covers_journal.jsonl'
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._load()
+        self._fp = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._entries[record['key']] = record['outputs']
+                except (ValueError, KeyError):
+                    continue  # torn final line from an interrupted run
+
+    def is_done(self, key: str) -> bool:
+        outputs = self._entries.get(key)
+        if not outputs:
+            return False
+        for output in outputs:
+            try:
+                st = os.stat(os.path.join(self.output_dir, output['file']))
+            except OSError:
+                return False
+            if st.st_size != output['size'] or st.st_mtime_ns != output['mtime_ns']:
+                return False
+        return True
+
+    def record(self, key: str, index: int, paths: List[str]) -> None:
+        outputs = []
+        for path in paths:
+            st = os.stat(path)
+            outputs.append({'file': os.path.relpath(path, self.output_dir),
+                            'size': st.st_size, 'mtime_ns': st.st_mtime_ns})
+        self._entries[key] = outputs
+        self._fp.write(json.dumps({'key': key, 'row': index, 'outputs': outputs}) + '\n')
+        self._fp.flush()
+
+    def close(self) -> None:
+        self._fp.close()
+
+    def __enter__(self) -> 'CompletionJournal':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ----- Workers ---------------------------------------------------------------
+
+
+_worker_generator: Optional[CoverGenerator] = None
+
+
+def _init_worker(cache_root: Optional[str] = None, cache_enabled: bool = False) -> None:
+    """Process pool initializer: build the generator (font index, caches) once per worker"""
+    global _worker_generator
+    _worker_generator = CoverGenerator(render_cache=RenderCache(cache_root, enabled=cache_enabled))
+
+
+def _render_task(task: CoverTask, generator: Optional[CoverGenerator] = None) -> RowResult:
+    index, title, params, output_dir = task
+    generator = generator or _worker_generator
+    if generator is None:
+        _init_worker()
+        generator = _worker_generator
+
+    result = RowResult(index=index, title=title)
+    start = time.perf_counter()
+    try:
+        result.output_path = generator.generate_cover(output_dir=output_dir, **params)
+        result.outputs = expected_outputs(params, output_dir)
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def ordered_results(futures: Iterable[Future], window: int) -> Iterator:
+    """
+    Resolve a lazy stream of futures in input order, keeping at most `window`
+    unresolved ones alive so the input never has to be fully materialized.
+    """
+    pending: deque = deque()
+    for future in futures:
+        pending.append(future)
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _completed(result: RowResult) -> Future:
+    future: Future = Future()
+    future.set_result(result)
+    return future
+
+
+def resolve_jobs(jobs: Optional[int]) -> int:
+    """0 or None means one job per CPU core"""
+    if not jobs or jobs < 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def render_cover_tasks(tasks: Iterable[CoverTask], jobs: int = 1,
+                       generator: Optional[CoverGenerator] = None,
+                       on_result: Optional[Callable[[RowResult], None]] = None,
+                       journal: Optional[CompletionJournal] = None) -> BatchStats:
+    """
+    Render cover tasks and report each result, in input order, through on_result.
+
+    jobs > 1 spreads rows over a process pool whose workers stay warm for the
+    whole run. With a journal, rows whose outputs are already up to date are
+    reported as skipped without rendering, and finished rows are journaled.
+    """
+    stats = BatchStats()
+    start = time.perf_counter()
+    keys: Dict[int, str] = {}
+
+    def schedule(submit: Callable[[CoverTask], Future]) -> Iterator[Future]:
+        for task in tasks:
+            index, title, params, _ = task
+            if journal is not None:
+                key = keys[index] = row_key(params)
+                if journal.is_done(key):
+                    yield _completed(RowResult(index=index, title=title, skipped=True))
+                    continue
+            yield submit(task)
+
+    def finish(result: RowResult) -> None:
+        key = keys.pop(result.index, None)
+        if journal is not None and key and not result.error and not result.skipped:
+            journal.record(key, result.index, result.outputs)
+        stats.add(result)
+        if on_result:
+            on_result(result)
+
+    if jobs <= 1:
+        generator = generator or CoverGenerator()
+        for future in schedule(lambda task: _completed(_render_task(task, generator))):
+            finish(future.result())
+    else:
+        cache = generator.render_cache if generator else None
+        initargs = (str(cache.root), cache.enabled) if cache else ()
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+            futures = schedule(lambda task: executor.submit(_render_task, task))
+            for result in ordered_results(futures, window=jobs * 4):
+                finish(result)
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
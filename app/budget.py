@@ -0,0 +1,227 @@
+"""
+Byte Budget Module
+Chooses the highest-fidelity encoding of an image that fits a byte budget
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+# Candidate encodings, best fidelity first: (format, settings)
+CANDIDATES: Tuple[Tuple[str, Dict[str, int]], ...] = (
+    ('png', {'compress_level': 9}),
+    ('png8', {'colors': 256}),
+    ('webp', {'quality': 90}),
+    ('jpeg', {'quality': 90}),
+    ('webp', {'quality': 80}),
+    ('jpeg', {'quality': 80}),
+    ('webp', {'quality': 70}),
+    ('jpeg', {'quality': 70}),
+    ('webp', {'quality': 55}),
+    ('jpeg', {'quality': 55}),
+    ('webp', {'quality': 40}),
+    ('jpeg', {'quality': 40}),
+)
+
+EXTENSIONS = {'png': '.png', 'png8': '.png', 'webp': '.webp', 'jpeg': '.jpg'}
+
+# libwebp rejects images with either side above this
+WEBP_MAX_SIZE = 16383
+
+# Larger sources are not decoded for re-encoding (64 MB as RGBA): they keep
+# their streamed PNG, which preserves the band-by-band memory bound
+MAX_BUDGET_PIXELS = 16 * 1024 * 1024
+
+# Predictions come from encoding a proxy with this many times fewer pixels
+PROXY_FACTOR = 4
+
+# EXIF ImageDescription, used to record the choice in JPEG/WebP output
+EXIF_DESCRIPTION = 0x010E
+
+
+@dataclass
+class EncodingChoice:
+    format: str
+    settings: Dict[str, int]
+    size: int
+    max_bytes: int
+    predicted: int
+    full_encodes: int
+
+    @property
+    def fits(self) -> bool:
+        return self.size <= self.max_bytes
+
+    def _settings(self) -> str:
+        return ''.join(f" {k}={v}" for k, v in self.settings.items())
+
+    def note(self) -> str:
+        """Metadata recorded in the encoded file"""
+        return f"ItchPage Wizard byte budget: format={self.format}{self._settings()} budget={self.max_bytes}"
+
+    def describe(self) -> str:
+        return (f"{self.format}{self._settings()}, {self.size} bytes of {self.max_bytes}"
+                f"{'' if self.fits else ' (over budget)'}")
+
+
+def encode(img: Image.Image, fmt: str, settings: Dict[str, int], note: Optional[str] = None) -> bytes:
+    """Encode img with one candidate setting; note is embedded as metadata"""
+    bio = io.BytesIO()
+    if fmt in ('png', 'png8'):
+        pnginfo = None
+        if note:
+            pnginfo = PngInfo()
+            pnginfo.add_text('Encoding', note)
+        if fmt == 'png8':
+            method = Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+            img = img.quantize(colors=settings['colors'], method=method)
+            img.save(bio, 'PNG', optimize=True, pnginfo=pnginfo)
+        else:
+            img.save(bio, 'PNG', compress_level=settings['compress_level'], pnginfo=pnginfo)
+        return bio.getvalue()
+
+    exif = None
+    if note:
+        exif = Image.Exif()
+        exif[EXIF_DESCRIPTION] = note
+    extra = {'exif': exif.tobytes()} if exif is not None else {}
+    if fmt == 'webp':
+        img.save(bio, 'WEBP', quality=settings['quality'], method=4, **extra)
+    else:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.save(bio, 'JPEG', quality=settings['quality'], optimize=True, **extra)
+    return bio.getvalue()
+
+
+def _flatten(img: Image.Image, background: Tuple[int, int, int]) -> Image.Image:
+    """img composited onto an opaque background color"""
+    flat = Image.new('RGB', img.size, background)
+    flat.paste(img, mask=img.getchannel('A'))
+    return flat
+
+
+def _candidates(img: Image.Image, background: Optional[Tuple[int, int, int]]) -> List[Tuple[str, Dict[str, int]]]:
+    # JPEG would flatten transparency, so without a background to flatten onto it needs an opaque image
+    opaque = background is not None or img.mode != 'RGBA' or img.getextrema()[3][0] == 255
+    webp = max(img.size) <= WEBP_MAX_SIZE
+    return [c for c in CANDIDATES if (c[0] != 'jpeg' or opaque) and (c[0] != 'webp' or webp)]
+
+
+def _try_encode(img: Image.Image, fmt: str, settings: Dict[str, int],
+                note: Optional[str] = None) -> Optional[bytes]:
+    """encode(), or None when this format cannot encode img"""
+    try:
+        return encode(img, fmt, settings, note=note)
+    except (OSError, ValueError):
+        return None
+
+
+def choose_encoding(img: Image.Image, max_bytes: int,
+                    background: Optional[Tuple[int, int, int]] = None) -> Tuple[EncodingChoice, bytes]:
+    """
+    Return the first (highest-fidelity) candidate whose full-size encode fits
+    max_bytes, together with its encoded bytes.
+
+    Every candidate is first encoded on a downscaled proxy, and its full-size
+    cost is predicted from the proxy's bytes per pixel. Only candidates
+    predicted to fit are encoded at full size. After each full encode, later
+    predictions for that format are corrected by the observed error. If
+    nothing fits, the smallest full encode is returned. A candidate that fails
+    to encode is skipped. With background, transparent images may also be
+    encoded as JPEG, flattened onto that color.
+    """
+    scale = PROXY_FACTOR ** 0.5
+    proxy = img.resize((max(1, round(img.width / scale)), max(1, round(img.height / scale))),
+                       Image.Resampling.BOX)
+    pixel_ratio = (img.width * img.height) / (proxy.width * proxy.height)
+
+    flatten = background is not None and img.mode == 'RGBA'
+    sources = {'jpeg': (_flatten(img, background), _flatten(proxy, background))} if flatten else {}
+
+    candidates = _candidates(img, background)
+    predictions = []
+    for fmt, settings in candidates:
+        data = _try_encode(sources.get(fmt, (img, proxy))[1], fmt, settings)
+        predictions.append(math.inf if data is None else len(data) * pixel_ratio)
+
+    correction: Dict[str, float] = {}
+    smallest: Optional[Tuple[EncodingChoice, bytes]] = None
+    full_encodes = 0
+
+    def full_encode(index: int, predicted: float) -> Optional[Tuple[EncodingChoice, bytes]]:
+        nonlocal full_encodes
+        fmt, settings = candidates[index]
+        choice = EncodingChoice(fmt, dict(settings), 0, max_bytes, int(predicted), 0)
+        data = _try_encode(sources.get(fmt, (img, proxy))[0], fmt, settings, note=choice.note())
+        full_encodes += 1
+        if data is None:
+            return None
+        choice.size, choice.full_encodes = len(data), full_encodes
+        return choice, data
+
+    for index, predicted in enumerate(predictions):
+        fmt = candidates[index][0]
+        predicted *= correction.get(fmt, 1.0)
+        if predicted > max_bytes:
+            continue
+
+        encoded = full_encode(index, predicted)
+        if encoded is None:
+            continue
+        choice, data = encoded
+        if choice.fits:
+            return choice, data
+        correction[fmt] = correction.get(fmt, 1.0) * choice.size / max(predicted, 1.0)
+        if smallest is None or choice.size < smallest[0].size:
+            smallest = (choice, data)
+
+    # Nothing fits: fall back to the smallest encode, trying the lowest-fidelity candidate that encodes too
+    for index in reversed(range(len(candidates))):
+        if predictions[index] == math.inf:
+            continue
+        last = full_encode(index, predictions[index])
+        if last is not None:
+            if smallest is None or last[0].size < smallest[0].size:
+                smallest = last
+            break
+    if smallest is None:
+        raise ValueError("No candidate encoding could encode the image")
+    return smallest
+
+
+def encode_to_budget(source_path: str, max_bytes: int, output_stem: Optional[str] = None,
+                     background: Optional[Tuple[int, int, int]] = None) -> Tuple[str, EncodingChoice]:
+    """
+    Re-encode the image at source_path to fit max_bytes and write it next to it
+    (output_stem + the chosen format's extension). The choice is recorded in the
+    file's metadata: a PNG "Encoding" text chunk or the EXIF ImageDescription.
+    background is passed to choose_encoding. Returns (output path, choice);
+    source_path is removed if the path changed.
+
+    Sources over MAX_BUDGET_PIXELS are never decoded: they are kept as they
+    are, and the returned choice reports whether the file fits.
+    """
+    with Image.open(source_path) as img:
+        if img.width * img.height > MAX_BUDGET_PIXELS:
+            size = os.path.getsize(source_path)
+            return source_path, EncodingChoice((img.format or 'png').lower(), {}, size, max_bytes, size, 0)
+        img.load()
+        choice, data = choose_encoding(img, max_bytes, background)
+
+    output_stem = output_stem or os.path.splitext(source_path)[0]
+    output_path = output_stem + EXTENSIONS[choice.format]
+    tmp = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, output_path)  # never writes through a hardlinked cache blob
+    if os.path.abspath(output_path) != os.path.abspath(source_path):
+        os.remove(source_path)
+    return output_path, choice
@@ -3,15 +3,35 @@ Screenshot Collage Module
 Creates 920px-wide collages from multiple screenshots
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import io
 import os
 import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Iterator, Iterable, Callable, Sequence
 from datetime import datetime
 
-from .utils import validate_image, ensure_aspect_ratio
+from .budget import EncodingChoice, encode_to_budget
+from .fonts import DEFAULT_FONT_FILE, get_font
+from .pngstream import PNGStreamWriter
+from .rendercache import RenderCache
+from .thumbcache import ThumbnailCache, get_thumbnail_cache
+from .utils import MediaInfo, probe_media, ensure_aspect_ratio
+
+
+@dataclass
+class CollageSpec:
+    """One collage to produce with ScreenshotCollage.create_collages"""
+    output_path: str
+    layout: str = 'Grid'
+    gutter: int = 12
+    max_width: int = 920
+    max_bytes: Optional[int] = None
+
 
 class ScreenshotCollage:
     # itch.io inline image specifications
@@ -27,8 +47,31 @@ class ScreenshotCollage:
         'Linear': 'linear'
     }
 
-    def __init__(self):
-        pass
+    # Collage background: gutters stay transparent, and flatten onto its color for JPEG
+    BACKGROUND = (255, 255, 255, 0)
+
+    # Rows composited at once; taller collages are streamed band by band
+    BAND_HEIGHT = 2048
+
+    # Resampled tile pixels create_collages may hold to share one decode between
+    # collages (128 MB as RGBA); past this, each collage decodes its own tiles
+    SHARED_TILE_PIXELS = 32 * 1024 * 1024
+
+    # Tile decode/resample threads (Pillow releases the GIL while decoding and resizing)
+    DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+    # Bump when rendering changes, so cached outputs are rebuilt
+    ENGINE_VERSION = 2
+
+    # Longest edge of the thumbnails previews are laid out from
+    PREVIEW_THUMB_SIZE = 200
+
+    def __init__(self, render_cache: Optional[RenderCache] = None,
+                 thumbnail_cache: Optional[ThumbnailCache] = None):
+        self.render_cache = render_cache or RenderCache(enabled=False)
+        self.thumbnails = thumbnail_cache or get_thumbnail_cache()
+        # Final output path -> encoding chosen for a max_bytes budget
+        self.encodings: Dict[str, EncodingChoice] = {}
 
     def _calculate_grid_layout(self, image_count: int, target_width: int,
                               gutter: int) -> Tuple[int, int, List[Tuple[int, int]]]:
@@ -67,26 +110,26 @@ class ScreenshotCollage:
 
         return cell_width, total_height, positions
 
-    def _calculate_masonry_layout(self, images: List[Image.Image], target_width: int,
+    def _calculate_masonry_layout(self, sizes: List[Tuple[int, int]], target_width: int,
                                  gutter: int, max_cols: int = 3) -> Tuple[int, List[Tuple[int, int, int, int]]]:
-        """Calculate masonry layout preserving aspect ratios"""
-        if not images:
+        """Calculate masonry layout preserving aspect ratios from (width, height) sizes"""
+        if not sizes:
             return 0, []
 
         # Determine number of columns
-        cols = min(len(images), max_cols)
+        cols = min(len(sizes), max_cols)
         col_width = (target_width - (cols - 1) * gutter) // cols
 
         # Track column heights
         col_heights = [0] * cols
         layout_rects = []
 
-        for img in images:
+        for width, height in sizes:
             # Find shortest column
             min_col = col_heights.index(min(col_heights))
 
             # Calculate scaled height maintaining aspect ratio
-            aspect_ratio = img.height / img.width
+            aspect_ratio = height / width
             scaled_height = int(col_width * aspect_ratio)
 
             # Position rectangle
@@ -101,18 +144,18 @@ class ScreenshotCollage:
         total_height = max(col_heights) - gutter  # Remove last gutter
         return total_height, layout_rects
 
-    def _calculate_linear_layout(self, images: List[Image.Image], target_width: int,
+    def _calculate_linear_layout(self, sizes: List[Tuple[int, int]], target_width: int,
                                 gutter: int) -> Tuple[int, List[Tuple[int, int, int, int]]]:
-        """Calculate linear (single column) layout"""
-        if not images:
+        """Calculate linear (single column) layout from (width, height) sizes"""
+        if not sizes:
             return 0, []
 
         layout_rects = []
         current_y = 0
 
-        for img in images:
+        for width, height in sizes:
             # Scale to fit width
-            aspect_ratio = img.height / img.width
+            aspect_ratio = height / width
             scaled_height = int(target_width * aspect_ratio)
 
             layout_rects.append((0, current_y, target_width, scaled_height))
@@ -124,79 +167,336 @@ class ScreenshotCollage:
     def create_collage(self, image_paths: List[str], output_path: str,
                       layout: str = 'Grid', gutter: int = DEFAULT_GUTTER,
                       max_width: int = MAX_WIDTH, add_captions: bool = False,
-                      caption_height: int = 30) -> str:
-        """Create screenshot collage"""
+                      caption_height: int = 30, workers: Optional[int] = None,
+                      max_bytes: Optional[int] = None,
+                      infos: Optional[Sequence[Optional[MediaInfo]]] = None) -> str:
+        """
+        Create screenshot collage; workers sets tile decode threads (default DEFAULT_WORKERS).
+        With max_bytes, the collage is re-encoded to fit that many bytes and the
+        returned path carries the chosen format's extension. infos, when the
+        caller already probed image_paths (same order), saves probing them again.
+        """
         if not image_paths:
             raise ValueError("No images provided")
 
-        if gutter < self.MIN_GUTTER or gutter > self.MAX_GUTTER:
-            gutter = self.DEFAULT_GUTTER
-
-        # Load and validate images
-        images = []
-        valid_paths = []
-
-        for path in image_paths:
-            if validate_image(path):
-                try:
-                    img = Image.open(path)
-                    if img.mode != 'RGBA':
-                        img = img.convert('RGBA')
-                    images.append(img)
-                    valid_paths.append(path)
-                except Exception:
-                    continue
-
-        if not images:
-            raise ValueError("No valid images found")
+        gutter = self._clamp_gutter(gutter)
+        self.render_cache.run(
+            'collage', self.ENGINE_VERSION, image_paths,
+            self._cache_params(image_paths, layout, gutter, max_width, add_captions, caption_height),
+            [output_path],
+            lambda: self._render_collage(image_paths, output_path, layout, gutter,
+                                         max_width, add_captions, caption_height, workers, infos)
+        )
+        return self._fit_budget(output_path, max_bytes)
+
+    def create_collages(self, image_paths: List[str], specs: List[CollageSpec],
+                        add_captions: bool = False, caption_height: int = 30,
+                        workers: Optional[int] = None,
+                        infos: Optional[Sequence[Optional[MediaInfo]]] = None) -> List[str]:
+        """
+        Create several collages (layouts, gutters, widths) of the same screenshots.
+
+        Every screenshot is decoded once; all tile sizes the requested collages
+        need are resampled from that decode's reduction pyramid, and the
+        collages are then composited and encoded concurrently. Each tile is
+        released once every collage using it has pasted it. When all tiles
+        together exceed SHARED_TILE_PIXELS, each collage instead decodes its
+        own tiles band by band, as create_collage does. infos are the caller's
+        probe_media results for image_paths, if it has them. Returns the output
+        paths, whose extensions follow any max_bytes encoding choice.
+        """
+        if not image_paths:
+            raise ValueError("No images provided")
 
-        # Calculate layout
+        infos = self._probe(image_paths, infos)
+        if not infos:
+            raise ValueError("No valid images found")
+        sizes = [info.size for info in infos]
+        valid_paths = [info.path for info in infos]
+        workers = workers or self.DEFAULT_WORKERS
+
+        plans = []
+        for spec in specs:
+            gutter = self._clamp_gutter(spec.gutter)
+            total_height, layout_rects = self._plan_layout(sizes, spec.layout, gutter, spec.max_width,
+                                                           add_captions, caption_height)
+            plans.append((spec, gutter, total_height, layout_rects))
+
+        # How many collages use each (image, tile size)
+        uses: Dict[Tuple[int, Tuple[int, int]], int] = {}
+        for _, _, _, layout_rects in plans:
+            for i, (_, _, w, h) in enumerate(layout_rects):
+                uses[(i, (w, h))] = uses.get((i, (w, h)), 0) + 1
+        needed: List[set] = [set() for _ in valid_paths]
+        for i, size in uses:
+            needed[i].add(size)
+
+        # Shared tiles are held until their last collage pastes them, so sharing is
+        # bounded: past SHARED_TILE_PIXELS each collage streams its own decodes
+        shared = sum(w * h for _, (w, h) in uses) <= self.SHARED_TILE_PIXELS
+
+        tiles: Dict[Tuple[int, Tuple[int, int]], Optional[Image.Image]] = {}
+        tiles_lock = threading.Lock()
+        decode_lock = threading.Lock()
+        decoded = threading.Event()
+
+        def decode_once():
+            # The first collage that misses the render cache decodes for all of them
+            with decode_lock:
+                if decoded.is_set():
+                    return
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    loaded = executor.map(lambda i: self._load_tiles(valid_paths[i], needed[i]),
+                                          range(len(valid_paths)))
+                    for i, by_size in enumerate(loaded):
+                        with tiles_lock:
+                            for size in needed[i]:
+                                if uses[(i, size)]:
+                                    tiles[(i, size)] = by_size.get(size)
+                decoded.set()
+
+        def release(key) -> Optional[Image.Image]:
+            # One collage is done with key: drop the tile after its last use
+            with tiles_lock:
+                uses[key] -= 1
+                return tiles.get(key) if uses[key] else tiles.pop(key, None)
+
+        def render(plan):
+            spec, gutter, total_height, layout_rects = plan
+            keys = [(i, tuple(rect[2:])) for i, rect in enumerate(layout_rects)]
+            unused = set(keys)
+
+            def shared_tiles(order):
+                for i in order:
+                    unused.discard(keys[i])
+                    yield release(keys[i])
+
+            def produce():
+                if shared:
+                    decode_once()
+                    load_tiles = shared_tiles
+                else:
+                    load_tiles = lambda order: self._iter_tiles([valid_paths[i] for i in order],
+                                                                [layout_rects[i] for i in order], workers)
+                self._composite_collage(spec.output_path, spec.max_width, total_height, layout_rects,
+                                        valid_paths, load_tiles, add_captions, caption_height)
+
+            try:
+                self.render_cache.run(
+                    'collage', self.ENGINE_VERSION, image_paths,
+                    self._cache_params(image_paths, spec.layout, gutter, spec.max_width,
+                                       add_captions, caption_height),
+                    [spec.output_path], produce
+                )
+            finally:
+                # Cache hits and failed renders never paste their tiles
+                for key in unused:
+                    release(key)
+            return self._fit_budget(spec.output_path, spec.max_bytes)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(plans), workers))) as executor:
+            return list(executor.map(render, plans))
+
+    def _fit_budget(self, output_path: str, max_bytes: Optional[int]) -> str:
+        """Re-encode a rendered PNG collage to fit max_bytes (if given)"""
+        if not max_bytes:
+            return output_path
+        path, choice = encode_to_budget(output_path, max_bytes, background=self.BACKGROUND[:3])
+        self.encodings[path] = choice
+        return path
+
+    def _clamp_gutter(self, gutter: int) -> int:
+        if gutter < self.MIN_GUTTER or gutter > self.MAX_GUTTER:
+            return self.DEFAULT_GUTTER
+        return gutter
+
+    def _probe(self, image_paths: List[str],
+               infos: Optional[Sequence[Optional[MediaInfo]]] = None) -> List[MediaInfo]:
+        """Header facts of the valid images, probing only when the caller has none"""
+        if infos is None:
+            infos = map(probe_media, image_paths)
+        elif len(infos) != len(image_paths):
+            raise ValueError("infos must match image_paths one to one")
+        return [info for info in infos if info is not None]
+
+    def _cache_params(self, image_paths: List[str], layout: str, gutter: int, max_width: int,
+                      add_captions: bool, caption_height: int) -> Dict[str, Any]:
+        """Render cache parameters of one collage"""
+        return {
+            'layout': layout, 'gutter': gutter, 'max_width': max_width,
+            'captions': [os.path.basename(p) for p in image_paths] if add_captions else None,
+            'caption_height': caption_height,
+        }
+
+    def _plan_layout(self, sizes: List[Tuple[int, int]], layout: str, gutter: int, max_width: int,
+                     add_captions: bool, caption_height: int) -> Tuple[int, List[Tuple[int, int, int, int]]]:
+        """Total height and (x, y, w, h) cell of every image for one layout"""
         if layout == 'Masonry':
-            total_height, layout_rects = self._calculate_masonry_layout(images, max_width, gutter)
+            total_height, layout_rects = self._calculate_masonry_layout(sizes, max_width, gutter)
         elif layout == 'Linear':
-            total_height, layout_rects = self._calculate_linear_layout(images, max_width, gutter)
+            total_height, layout_rects = self._calculate_linear_layout(sizes, max_width, gutter)
         else:  # Grid
-            cell_width, total_height, positions = self._calculate_grid_layout(len(images), max_width, gutter)
+            cell_width, total_height, positions = self._calculate_grid_layout(len(sizes), max_width, gutter)
             # Convert positions to rects
             layout_rects = [(x, y, cell_width, cell_width) for x, y in positions]
 
         # Add caption space if needed
         if add_captions:
-            total_height += len(images) * caption_height
-
-        # Create collage canvas
-        collage = Image.new('RGBA', (max_width, total_height), (255, 255, 255, 0))
-
-        # Place images
-        for i, (img, rect) in enumerate(zip(images, layout_rects)):
-            x, y, w, h = rect
-
-            # Resize image to fit rectangle
-            img_resized = img.resize((w, h), Image.Resampling.LANCZOS)
+            total_height += len(sizes) * caption_height
+        return total_height, layout_rects
 
-            # Paste image
-            collage.paste(img_resized, (x, y), img_resized if img_resized.mode == 'RGBA' else None)
+    def _render_collage(self, image_paths: List[str], output_path: str, layout: str, gutter: int,
+                        max_width: int, add_captions: bool, caption_height: int,
+                        workers: Optional[int] = None,
+                        infos: Optional[Sequence[Optional[MediaInfo]]] = None) -> None:
+        """Render and save the collage"""
+        # Validate images and read their sizes from the headers only
+        infos = self._probe(image_paths, infos)
+        sizes = [info.size for info in infos]
+        valid_paths = [info.path for info in infos]
+
+        if not sizes:
+            raise ValueError("No valid images found")
 
-            # Add caption if requested
-            if add_captions:
-                caption_y = y + h
-                filename = os.path.splitext(os.path.basename(valid_paths[i]))[0]
-                self._add_caption(collage, filename, x, caption_y, w, caption_height)
+        total_height, layout_rects = self._plan_layout(sizes, layout, gutter, max_width,
+                                                       add_captions, caption_height)
+        self._composite_collage(
+            output_path, max_width, total_height, layout_rects, valid_paths,
+            lambda order: self._iter_tiles([valid_paths[i] for i in order],
+                                           [layout_rects[i] for i in order],
+                                           workers or self.DEFAULT_WORKERS),
+            add_captions, caption_height
+        )
+
+    def _composite_collage(self, output_path: str, max_width: int, total_height: int,
+                           layout_rects: List[Tuple[int, int, int, int]], valid_paths: List[str],
+                           load_tiles: Callable[[List[int]], Iterator[Optional[Image.Image]]],
+                           add_captions: bool, caption_height: int) -> None:
+        """
+        Composite horizontal bands and save the collage. load_tiles(order) yields
+        the tiles of the given image indices, which are sorted by top edge.
+        Tall collages are streamed to the PNG encoder band by band, so peak
+        memory follows BAND_HEIGHT rather than total height.
+        """
+        caption_space = caption_height if add_captions else 0
+        order = sorted(range(len(layout_rects)), key=lambda i: layout_rects[i][1])
+        tiles = load_tiles(order)
+        writer = None
+        if total_height > self.BAND_HEIGHT:
+            writer = PNGStreamWriter(output_path, max_width, total_height, 'RGBA')
 
-        # Save collage
-        collage.save(output_path, 'PNG')
-        return output_path
+        try:
+            loaded: Dict[int, Optional[Image.Image]] = {}
+            next_item = 0
+            for band_top in range(0, total_height, self.BAND_HEIGHT):
+                band_bottom = min(total_height, band_top + self.BAND_HEIGHT)
+
+                # Decode every tile that starts above the bottom of this band
+                while next_item < len(order) and layout_rects[order[next_item]][1] < band_bottom:
+                    loaded[order[next_item]] = next(tiles)
+                    next_item += 1
+
+                band = Image.new('RGBA', (max_width, band_bottom - band_top), self.BACKGROUND)
+
+                # Input order, as if everything were pasted onto one canvas
+                for i in sorted(loaded):
+                    x, y, w, h = layout_rects[i]
+                    tile = loaded[i]
+                    if tile is not None:
+                        band.paste(tile, (x, y - band_top), tile if tile.mode == 'RGBA' else None)
+
+                    # Add caption if requested
+                    if add_captions:
+                        filename = os.path.splitext(os.path.basename(valid_paths[i]))[0]
+                        self._add_caption(band, filename, x, y + h - band_top, w, caption_height)
+
+                # Release tiles that end inside this band
+                for i in list(loaded):
+                    _, y, _, h = layout_rects[i]
+                    if y + h + caption_space <= band_bottom:
+                        del loaded[i]
+
+                if writer is not None:
+                    writer.write(band)
+                else:
+                    band.save(output_path, 'PNG')
+            if writer is not None:
+                writer.close()
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+        finally:
+            if hasattr(tiles, 'close'):
+                tiles.close()
+
+    def _iter_tiles(self, paths: List[str], rects: List[Tuple[int, int, int, int]],
+                    workers: int) -> Iterator[Optional[Image.Image]]:
+        """
+        Yield _load_tile() results in input order. With workers > 1 tiles are decoded
+        on a thread pool, keeping at most 2 * workers decoded tiles in flight.
+        """
+        jobs = [(path, (w, h)) for path, (_, _, w, h) in zip(paths, rects)]
+        if workers <= 1:
+            for path, size in jobs:
+                yield self._load_tile(path, size)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: deque = deque()
+            for path, size in jobs:
+                pending.append(executor.submit(self._load_tile, path, size))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _load_tile(self, path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        Decode an image at reduced resolution and resample it to size.
+        Opaque images come back as RGB so they can be pasted without a mask.
+        """
+        return self._load_tiles(path, [size]).get(tuple(size))
+
+    def _load_tiles(self, path: str, sizes: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], Image.Image]:
+        """
+        Decode an image once and resample it to every requested size.
+        Integer box reductions of the decode are shared between sizes (a small
+        resolution pyramid); each tile is a short LANCZOS from the closest one.
+        Unreadable images and empty sizes are left out of the result.
+        """
+        sizes = [tuple(size) for size in sizes if size[0] > 0 and size[1] > 0]
+        if not sizes:
+            return {}
+        tiles = {}
+        try:
+            with Image.open(path) as img:
+                # JPEG: decode at 1/2, 1/4 or 1/8 scale while staying >= every cell size
+                img.draft(img.mode, (max(w for w, _ in sizes), max(h for _, h in sizes)))
+
+                has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+                source = img.convert('RGBA' if has_alpha else 'RGB') if img.mode not in ('RGB', 'RGBA') else img
+
+                pyramid = {1: source}
+                for width, height in sizes:
+                    factor = max(1, min(source.width // width, source.height // height))
+                    if factor not in pyramid:
+                        pyramid[factor] = source.reduce(factor)
+                    tile = pyramid[factor].resize((width, height), Image.Resampling.LANCZOS)
+                    if tile.mode == 'RGBA' and tile.getextrema()[3][0] == 255:
+                        tile = tile.convert('RGB')
+                    tiles[(width, height)] = tile
+        except Exception:
+            return {}
+        return tiles
 
     def _add_caption(self, collage: Image.Image, text: str, x: int, y: int,
                     width: int, height: int):
         """Add caption to collage"""
         draw = ImageDraw.Draw(collage)
 
-        # Try to load a font, fallback to default
-        try:
-            font = ImageFont.truetype('arial.ttf', 12)
-        except:
-            font = ImageFont.load_default()
+        # Shared font cache, falls back to the default font
+        font = get_font(DEFAULT_FONT_FILE, 12)
 
         # Calculate text position (center)
         bbox = font.getbbox(text)
@@ -222,18 +522,12 @@ class ScreenshotCollage:
             layout = collage_data.get('layout', 'Grid')
             gutter = collage_data.get('gutter', self.DEFAULT_GUTTER)
 
-            # Load preview images (smaller versions)
+            # Cached thumbnails: layout/gutter changes only re-place them
             preview_images = []
             for path in images[:6]:  # Limit to 6 for preview
-                try:
-                    img = Image.open(path)
-                    # Scale down for preview
-                    img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                    if img.mode != 'RGBA':
-                        img = img.convert('RGBA')
+                img = self.thumbnails.get(path, self.PREVIEW_THUMB_SIZE)
+                if img is not None:
                     preview_images.append(img)
-                except:
-                    continue
 
             if not preview_images:
                 return None
@@ -243,13 +537,14 @@ class ScreenshotCollage:
             scale_factor = preview_width / self.MAX_WIDTH
             scaled_gutter = max(1, int(gutter * scale_factor))
 
+            preview_sizes = [img.size for img in preview_images]
             if layout == 'Masonry':
                 total_height, layout_rects = self._calculate_masonry_layout(
-                    preview_images, preview_width, scaled_gutter
+                    preview_sizes, preview_width, scaled_gutter
                 )
             elif layout == 'Linear':
                 total_height, layout_rects = self._calculate_linear_layout(
-                    preview_images, preview_width, scaled_gutter
+                    preview_sizes, preview_width, scaled_gutter
                 )
             else:  # Grid
                 cell_width, total_height, positions = self._calculate_grid_layout(
@@ -3,15 +3,41 @@ Cover Generator Module
 Generates itch.io compliant cover images (630x500, 315:250 aspect ratio)
 """
 
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
 from PIL.ImageDraw import ImageDraw as DrawType
+import numpy as np
 import io
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List, Callable, Iterable, Union
 from datetime import datetime
 
-from .utils import get_asset_path, ensure_aspect_ratio
+from .fonts import fit_font, get_font, get_font_index, text_size
+from .gradients import render_gradient
+from .rendercache import RenderCache
+from .utils import LRUCache, ensure_aspect_ratio, file_signature, get_asset_path
+
+DerivativeSpec = Tuple[int, int, str]
+
+
+def parse_derivative_spec(spec: Union[str, Tuple]) -> DerivativeSpec:
+    """Parse 'WIDTHxHEIGHT[.format]' (or a (width, height[, format]) tuple); format defaults to png"""
+    if isinstance(spec, str):
+        size, _, fmt = spec.strip().lower().partition('.')
+        width, _, height = size.partition('x')
+        spec = (width, height, fmt or 'png')
+    width, height = int(spec[0]), int(spec[1])
+    fmt = (spec[2] if len(spec) > 2 else 'png').lower().lstrip('.')
+    if fmt == 'jpeg':
+        fmt = 'jpg'
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid derivative size: {width}x{height}")
+    if fmt not in CoverGenerator.DERIVATIVE_FORMATS:
+        raise ValueError(f"Unsupported derivative format: {fmt}")
+    return width, height, fmt
+
 
 class CoverGenerator:
     # itch.io cover specifications
@@ -19,44 +45,46 @@ class CoverGenerator:
     COVER_HEIGHT = 500
     ASPECT_RATIO = (315, 250)  # 1.26:1
 
+    # Bump when rendering changes, so cached/journaled outputs are rebuilt
+    ENGINE_VERSION = 2
+
     # Safe zones (margins from edges)
     SAFE_ZONE_MARGIN = 40
     TITLE_AREA_TOP = 60
     TITLE_AREA_HEIGHT = 120
 
-    def __init__(self):
-        self.default_fonts = self._load_default_fonts()
-        self.template_backgrounds = self._load_template_backgrounds()
+    # Gradient defaults
+    DEFAULT_SECONDARY_COLOR = '#34495e'
+    GRADIENT_TYPES = ('Gradient', 'Radial Gradient')
 
-    def _load_default_fonts(self) -> Dict[str, str]:
-        """Load available system and bundled fonts"""
-        fonts = {
-            'Arial': None,
-            'Helvetica': None,
-            'Times New Roman': None,
-            'Impact': None
-        }
+    # Number of distinct background layers kept in memory
+    BACKGROUND_CACHE_SIZE = 32
 
-        # Try to load system fonts first
-        try:
-            fonts['Arial'] = ImageFont.truetype('arial.ttf', 48)
-        except:
-            try:
-                fonts['Arial'] = ImageFont.truetype('/System/Library/Fonts/Arial.ttf', 48)
-            except:
-                pass
-
-        # Load bundled fonts from assets
-        assets_fonts = get_asset_path('fonts')
-        if assets_fonts.exists():
-            for font_file in assets_fonts.glob('*.ttf'):
-                font_name = font_file.stem
-                try:
-                    fonts[font_name] = str(font_file)
-                except Exception:
-                    pass
-
-        return fonts
+    # "Image Blur" background: blurred and darkened by one 5x5 kernel pass at 1/radius
+    # resolution (where the Gaussian's sigma is one pixel), then upsampled
+    BLUR_RADIUS = 8
+    BLUR_BRIGHTNESS = 0.6
+    BLUR_KERNEL_REACH = 2  # kernel half-width in working pixels
+    BLUR_CACHE_SIZE = 16
+
+    # Rasterized text (title/studio/version with effects) kept as RGBA sprites
+    TEXT_SPRITE_CACHE_SIZE = 512
+
+    # Shared layers (backgrounds, text sprites, logos) kept while rendering variants
+    VARIANT_LAYER_CACHE_SIZE = 1024
+
+    # Derivative ladder: retina, standard and thumbnail from a single render
+    DERIVATIVE_FORMATS = ('png', 'jpg', 'webp')
+    DEFAULT_DERIVATIVES = ('1260x1000.png', '630x500.png', '630x500.jpg', '315x250.png')
+
+    def __init__(self, render_cache: Optional[RenderCache] = None):
+        self.render_cache = render_cache or RenderCache(enabled=False)
+        self.font_index = get_font_index()
+        self.template_backgrounds = self._load_template_backgrounds()
+        self._background_cache = LRUCache(self.BACKGROUND_CACHE_SIZE)
+        self._blur_cache = LRUCache(self.BLUR_CACHE_SIZE)
+        self._text_sprite_cache = LRUCache(self.TEXT_SPRITE_CACHE_SIZE)
+        self._preview_layers: Dict[str, Tuple[Tuple, Any]] = {}
 
     def _load_template_backgrounds(self) -> list:
         """Load template background images"""
@@ -68,71 +96,93 @@ class CoverGenerator:
         return backgrounds
 
     def _get_font(self, font_name: str, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
-        """Get font object with fallback to default"""
-        try:
-            if font_name in self.default_fonts and self.default_fonts[font_name]:
-                if isinstance(self.default_fonts[font_name], str):
-                    # Font file path
-                    return ImageFont.truetype(self.default_fonts[font_name], size)
-                else:
-                    # Font object
-                    return self.default_fonts[font_name].font_variant(size=size)
-        except Exception:
-            pass
-
-        # Fallback to default font
-        try:
-            return ImageFont.truetype('arial.ttf', size)
-        except:
-            return ImageFont.load_default()
-
-    def _create_gradient_background(self, color1: str, color2: str) -> Image.Image:
-        """Create gradient background"""
-        img = Image.new('RGB', (self.COVER_WIDTH, self.COVER_HEIGHT))
-        draw = ImageDraw.Draw(img)
-
-        # Convert hex colors to RGB
-        if color1.startswith('#'):
-            color1 = tuple(int(color1[i:i+2], 16) for i in (1, 3, 5))
-        if color2.startswith('#'):
-            color2 = tuple(int(color2[i:i+2], 16) for i in (1, 3, 5))
-
-        # Create vertical gradient
-        for y in range(self.COVER_HEIGHT):
-            ratio = y / self.COVER_HEIGHT
-            r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-            g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-            b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-            draw.line([(0, y), (self.COVER_WIDTH, y)], fill=(r, g, b))
-
-        return img
+        """Get cached font object with fallback to default"""
+        return get_font(self.font_index.resolve(font_name, bold), size)
+
+    def _create_background(self, background_type: str, background_color: str,
+                           secondary_color: str = DEFAULT_SECONDARY_COLOR, gradient_angle: float = 90.0,
+                           gradient_colors: Optional[List[str]] = None, source_path: Optional[str] = None,
+                           size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """Return a private copy of the cached background layer for these render parameters"""
+        size = tuple(size or (self.COVER_WIDTH, self.COVER_HEIGHT))
+
+        if background_type in self.GRADIENT_TYPES:
+            colors = tuple(gradient_colors or (background_color, secondary_color))
+            radial = background_type == 'Radial Gradient'
+            key = (background_type, colors, float(gradient_angle), None, size)
+            factory = lambda: self._create_gradient_background(list(colors), gradient_angle, radial, size)
+        elif background_type == "Image Blur" and source_path:
+            # Path + mtime + size, so edited key art is picked up
+            key = (background_type, (), None, file_signature(source_path), size)
+            factory = lambda: self._create_blurred_background(source_path, size)
+        else:
+            key = ("Solid Color", (background_color,), None, None, size)
+            factory = lambda: self._create_solid_background(background_color, size)
+
+        return self._background_cache.get_or_create(key, factory).copy()
+
+    def _create_gradient_background(self, colors: List[str], angle: float = 90.0,
+                                    radial: bool = False,
+                                    size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """Create multi-stop linear or radial gradient background"""
+        return render_gradient(
+            colors, size or (self.COVER_WIDTH, self.COVER_HEIGHT),
+            angle=angle, kind='radial' if radial else 'linear'
+        )
 
-    def _create_blurred_background(self, image_path: str) -> Image.Image:
-        """Create blurred background from source image"""
+    def _create_blurred_background(self, image_path: str, size: Optional[Tuple[int, int]] = None,
+                                   radius: float = BLUR_RADIUS,
+                                   brightness: float = BLUR_BRIGHTNESS) -> Image.Image:
+        """Create blurred, darkened background from source image"""
+        size = size or (self.COVER_WIDTH, self.COVER_HEIGHT)
         try:
-            source_img = Image.open(image_path)
-
-            # Resize to cover dimensions while maintaining aspect ratio
-            source_img = source_img.resize((self.COVER_WIDTH, self.COVER_HEIGHT), Image.Resampling.LANCZOS)
-
-            # Apply blur
-            blurred = source_img.filter(ImageFilter.GaussianBlur(radius=8))
-
-            # Darken for text readability
-            enhancer = ImageEnhance.Brightness(blurred)
-            blurred = enhancer.enhance(0.6)
-
-            return blurred
+            key = (file_signature(image_path), radius, brightness)
+            small = self._blur_cache.get_or_create(
+                key, lambda: self._blur_source(image_path, radius, brightness)
+            )
+            # The result is blurred anyway, so a cheap upsample is indistinguishable
+            return small.resize(size, Image.Resampling.BICUBIC)
         except Exception:
             # Fallback to solid color
-            return self._create_solid_background('#2c3e50')
-
-    def _create_solid_background(self, color: str) -> Image.Image:
+            return self._create_solid_background('#2c3e50', size)
+
+    def _blur_source(self, image_path: str, radius: float, brightness: float) -> Image.Image:
+        """Decode and shrink the source, then blur and darken it in a single kernel pass"""
+        scale = max(1.0, radius)
+        work_size = (max(1, round(self.COVER_WIDTH / scale)), max(1, round(self.COVER_HEIGHT / scale)))
+
+        with Image.open(image_path) as source_img:
+            # JPEG: let the decoder skip detail we are about to throw away
+            source_img.draft('RGB', work_size)
+            source = source_img if source_img.mode == 'RGB' else source_img.convert('RGB')
+
+            # Integer pre-shrink, then a small resample to the exact working size
+            factor = max(1, min(source.width // work_size[0], source.height // work_size[1]))
+            if factor > 1:
+                source = source.reduce(factor)
+            source = source.resize(work_size, Image.Resampling.BILINEAR)
+
+        # Pillow leaves the kernel's reach unfiltered at the borders, so filter an edge-padded copy
+        reach = self.BLUR_KERNEL_REACH
+        padded = Image.fromarray(np.pad(np.asarray(source), ((reach, reach), (reach, reach), (0, 0)), mode='edge'))
+        blurred = padded.filter(self._blur_kernel(radius / scale, brightness))
+        return blurred.crop((reach, reach, reach + work_size[0], reach + work_size[1]))
+
+    def _blur_kernel(self, sigma: float, brightness: float) -> ImageFilter.Kernel:
+        """Gaussian kernel whose weights sum to brightness: blur and darkening in one pass"""
+        reach = self.BLUR_KERNEL_REACH
+        taps = [math.exp(-(i * i) / (2 * sigma * sigma)) if sigma > 0 else float(i == 0)
+                for i in range(-reach, reach + 1)]
+        weights = [a * b for a in taps for b in taps]
+        return ImageFilter.Kernel((2 * reach + 1,) * 2, weights, scale=sum(weights) / brightness)
+
+    def _create_solid_background(self, color: str,
+                                 size: Optional[Tuple[int, int]] = None) -> Image.Image:
         """Create solid color background"""
         if color.startswith('#'):
             color = tuple(int(color[i:i+2], 16) for i in (1, 3, 5))
 
-        return Image.new('RGB', (self.COVER_WIDTH, self.COVER_HEIGHT), color)
+        return Image.new('RGB', size or (self.COVER_WIDTH, self.COVER_HEIGHT), color)
 
     def _draw_safe_zone_overlay(self, draw: DrawType, show_guides: bool = False):
         """Draw safe zone guides (for preview only)"""
@@ -155,19 +205,12 @@ class CoverGenerator:
 
     def _calculate_text_size(self, text: str, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
         """Calculate text bounding box size"""
-        bbox = font.getbbox(text)
-        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+        return text_size(text, font)
 
     def _fit_text_to_width(self, text: str, font_name: str, max_width: int,
                           max_size: int = 72, min_size: int = 24, bold: bool = False) -> ImageFont.FreeTypeFont:
         """Auto-fit text to specified width"""
-        for size in range(max_size, min_size - 1, -2):
-            font = self._get_font(font_name, size, bold)
-            text_width, _ = self._calculate_text_size(text, font)
-            if text_width <= max_width:
-                return font
-
-        return self._get_font(font_name, min_size, bold)
+        return fit_font(text, self.font_index.resolve(font_name, bold), max_width, max_size, min_size)
 
     def _draw_text_with_effects(self, draw: DrawType, text: str, position: Tuple[int, int],
                                font: ImageFont.FreeTypeFont, fill: str = 'white',
@@ -187,115 +230,243 @@ class CoverGenerator:
         else:
             draw.text((x, y), text, font=font, fill=fill)
 
+    def _render_text_sprite(self, text: str, font: ImageFont.FreeTypeFont, fill: str = 'white',
+                            stroke_width: int = 2, stroke_fill: str = 'black',
+                            shadow: bool = True, shadow_offset: Tuple[int, int] = (3, 3)
+                            ) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """
+        Rasterize text with the same effects as _draw_text_with_effects into an RGBA sprite.
+        Returns (sprite, offset), where offset is the sprite's top-left corner relative to the
+        text origin, or None for empty text.
+
+        Sprites are cached by text, font file, size and effect parameters; they are
+        shared between callers and must not be modified.
+        """
+        key = (text, getattr(font, 'path', None), getattr(font, 'size', None), fill,
+               stroke_width, stroke_fill, shadow, tuple(shadow_offset) if shadow else None)
+        return self._text_sprite_cache.get_or_create(
+            key, lambda: self._rasterize_text(text, font, fill, stroke_width, stroke_fill,
+                                              shadow, shadow_offset)
+        )
+
+    def _rasterize_text(self, text: str, font: ImageFont.FreeTypeFont, fill: str,
+                        stroke_width: int, stroke_fill: str, shadow: bool,
+                        shadow_offset: Tuple[int, int]) -> Optional[Tuple[Image.Image, Tuple[int, int]]]:
+        """Draw text and its effects once onto a tightly cropped transparent sprite"""
+        left, top, right, bottom = font.getbbox(text, stroke_width=stroke_width)
+        if shadow:
+            shadow_x, shadow_y = shadow_offset
+            s_left, s_top, s_right, s_bottom = font.getbbox(text)
+            left, top = min(left, s_left + shadow_x), min(top, s_top + shadow_y)
+            right, bottom = max(right, s_right + shadow_x), max(bottom, s_bottom + shadow_y)
+
+        if right <= left or bottom <= top:
+            return None
+
+        sprite = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        self._draw_text_with_effects(
+            ImageDraw.Draw(sprite), text, (-left, -top), font, fill=fill,
+            stroke_width=stroke_width, stroke_fill=stroke_fill,
+            shadow=shadow, shadow_offset=shadow_offset
+        )
+        return sprite, (left, top)
+
     def generate_cover(self, title: str, studio: str = "", version: str = "",
                       output_dir: str = ".", export_png: bool = True, export_jpg: bool = False,
                       include_metadata: bool = True, background_type: str = "Solid Color",
                       background_color: str = "#2c3e50", font: str = "Arial",
                       bold: bool = True, shadow: bool = True,
-                      logo_path: Optional[str] = None, filename_stem: Optional[str] = None) -> str:
+                      logo_path: Optional[str] = None, filename_stem: Optional[str] = None,
+                      secondary_color: str = DEFAULT_SECONDARY_COLOR, gradient_angle: float = 90.0,
+                      gradient_colors: Optional[List[str]] = None) -> str:
         """Generate complete cover image"""
-
-        # Create background
-        if background_type == "Gradient":
-            img = self._create_gradient_background(background_color, '#34495e')
-        elif background_type == "Image Blur" and logo_path:
-            img = self._create_blurred_background(logo_path)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if filename_stem:
+            base_filename = filename_stem
         else:
-            img = self._create_solid_background(background_color)
+            base_filename = f"cover-630x500_{timestamp}"
 
-        draw = ImageDraw.Draw(img)
+        output_paths = []
+        if export_png:
+            output_paths.append(os.path.join(output_dir, f"{base_filename}.png"))
+        if export_jpg:
+            output_paths.append(os.path.join(output_dir, f"{base_filename}.jpg"))
+
+        render_params = {
+            'title': title, 'studio': studio, 'version': version,
+            'background_type': background_type, 'background_color': background_color,
+            'secondary_color': secondary_color, 'gradient_angle': gradient_angle,
+            'gradient_colors': gradient_colors, 'font': font, 'bold': bold, 'shadow': shadow,
+            'logo_path': logo_path,
+        }
 
-        # Calculate safe text area
-        text_area_width = self.COVER_WIDTH - (2 * self.SAFE_ZONE_MARGIN)
+        # Add metadata if requested
+        metadata = self._cover_metadata(title, studio, version, timestamp) if include_metadata else {}
+
+        def produce():
+            # The same layout path as previews, variants and derivatives
+            img = self._compose_cover(render_params, 1.0)
+            if not ensure_aspect_ratio(img.size, self.ASPECT_RATIO):
+                raise ValueError(f"Generated cover does not meet aspect ratio requirements: {self.ASPECT_RATIO}")
+            self._export_cover(img, output_paths, metadata)
+
+        self.render_cache.run(
+            'cover', self.ENGINE_VERSION, self._cache_inputs(logo_path, font),
+            {**render_params, 'metadata': include_metadata,
+             'formats': [os.path.splitext(p)[1] for p in output_paths]},
+            output_paths, produce
+        )
 
-        # Title text
-        title_font = self._fit_text_to_width(title, font, text_area_width, 72, 32, bold)
-        title_width, title_height = self._calculate_text_size(title, title_font)
-        title_x = (self.COVER_WIDTH - title_width) // 2
-        title_y = self.TITLE_AREA_TOP + (self.TITLE_AREA_HEIGHT - title_height) // 2
+        return output_paths[0] if output_paths else None
 
-        self._draw_text_with_effects(
-            draw, title, (title_x, title_y), title_font,
-            fill='white', shadow=shadow
-        )
+    def _cache_inputs(self, logo_path: Optional[str], font: str) -> List[Optional[str]]:
+        """Files whose contents determine a cover's pixels (render cache inputs)"""
+        font_files = {self.font_index.resolve(font, True), self.font_index.resolve(font, False)}
+        return [logo_path] + sorted(f for f in font_files if f)
 
-        # Studio text
-        if studio:
-            studio_font = self._get_font(font, 28, False)
-            studio_width, studio_height = self._calculate_text_size(studio, studio_font)
-            studio_x = (self.COVER_WIDTH - studio_width) // 2
-            studio_y = title_y + title_height + 20
-
-            self._draw_text_with_effects(
-                draw, studio, (studio_x, studio_y), studio_font,
-                fill='#ecf0f1', shadow=shadow, shadow_offset=(2, 2)
-            )
+    def generate_variants(self, variants: Iterable[Tuple[str, Dict[str, Any]]], output_dir: str = ".",
+                          export_png: bool = True, export_jpg: bool = False,
+                          include_metadata: bool = True,
+                          layer_cache: Optional[LRUCache] = None) -> List[str]:
+        """
+        Render many covers, given as (filename_stem, cover_data) pairs, that share layers.
 
-        # Version text (bottom right)
-        if version:
-            version_font = self._get_font(font, 20, False)
-            version_width, version_height = self._calculate_text_size(f"v{version}", version_font)
-            version_x = self.COVER_WIDTH - version_width - self.SAFE_ZONE_MARGIN
-            version_y = self.COVER_HEIGHT - version_height - self.SAFE_ZONE_MARGIN
-
-            self._draw_text_with_effects(
-                draw, f"v{version}", (version_x, version_y), version_font,
-                fill='#bdc3c7', shadow=False, stroke_width=1
+        Backgrounds, fitted title sizes, text sprites and logos are kept in
+        layer_cache and composited onto each variant, so the work grows with
+        the number of distinct layers rather than with the number of variants.
+        Returns the first output path of each variant.
+        """
+        layers = layer_cache if layer_cache is not None else LRUCache(self.VARIANT_LAYER_CACHE_SIZE)
+
+        def get_layer(name: str, key: Tuple, factory: Callable[[], Any]) -> Any:
+            return layers.get_or_create((name, key), factory)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        results = []
+        for filename_stem, data in variants:
+            output_paths = []
+            if export_png:
+                output_paths.append(os.path.join(output_dir, f"{filename_stem}.png"))
+            if export_jpg:
+                output_paths.append(os.path.join(output_dir, f"{filename_stem}.jpg"))
+            metadata = {}
+            if include_metadata:
+                metadata = self._cover_metadata(data.get('title', ''), data.get('studio', ''),
+                                                data.get('version', ''), timestamp)
+
+            def produce(data=data, output_paths=output_paths, metadata=metadata):
+                self._export_cover(self._compose_cover(data, 1.0, get_layer), output_paths, metadata)
+
+            self.render_cache.run(
+                'cover-variant', self.ENGINE_VERSION,
+                self._cache_inputs(data.get('logo_path'), data.get('font', 'Arial')),
+                {'cover': data, 'metadata': include_metadata,
+                 'formats': [os.path.splitext(p)[1] for p in output_paths]},
+                output_paths, produce
             )
+            results.append(output_paths[0] if output_paths else None)
+        return results
+
+    def _cover_metadata(self, title: str, studio: str, version: str, timestamp: str) -> Dict[str, str]:
+        """
+        Text metadata embedded in exported covers. The timestamp is not part of
+        the render cache key, so a cache hit keeps the Generated time of the
+        render that was first stored.
+        """
+        return {
+            'Title': title,
+            'Studio': studio,
+            'Version': version,
+            'Generated': timestamp,
+            'Tool': 'ItchPage Wizard v1.0.0'
+        }
+
+    def _export_cover(self, img: Image.Image, output_paths: List[str], metadata: Dict[str, str]):
+        """Save the cover to each output path; the format follows the extension"""
+        for path in output_paths:
+            if path.endswith('.png'):
+                img.save(path, 'PNG', pnginfo=self._create_png_metadata(metadata) if metadata else None)
+            elif path.endswith('.webp'):
+                img.save(path, 'WEBP', quality=90)
+            else:
+                # Convert RGBA to RGB for JPG
+                if img.mode == 'RGBA':
+                    jpg_img = Image.new('RGB', img.size, (255, 255, 255))
+                    jpg_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+                    img = jpg_img
+                exif = self._create_jpg_metadata(metadata) if metadata else None
+                img.save(path, 'JPEG', quality=95, **({'exif': exif} if exif else {}))
+
+    def generate_cover_derivatives(self, cover_data: Dict[str, Any],
+                                   sizes: Iterable[Union[str, Tuple]] = DEFAULT_DERIVATIVES,
+                                   output_dir: str = ".", filename_stem: Optional[str] = None,
+                                   include_metadata: bool = True,
+                                   max_workers: Optional[int] = None) -> List[str]:
+        """
+        Render a cover once and export it at several sizes/formats.
+
+        cover_data takes the same keys as generate_preview. The cover is composed
+        once at the largest requested size; each smaller size is resampled from
+        the smallest output already produced that still covers it, and the
+        encoders run concurrently. Sizes with a different aspect ratio are
+        center-cropped. Returns the output paths in the order of sizes.
+        """
+        specs = [parse_derivative_spec(spec) for spec in sizes]
+        if not specs:
+            return []
 
-        # Add logo if provided
-        if logo_path and os.path.exists(logo_path):
-            try:
-                logo = Image.open(logo_path)
-                # Resize logo to fit in corner (max 120x120)
-                logo.thumbnail((120, 120), Image.Resampling.LANCZOS)
-                logo_x = self.SAFE_ZONE_MARGIN
-                logo_y = self.COVER_HEIGHT - logo.height - self.SAFE_ZONE_MARGIN
-                img.paste(logo, (logo_x, logo_y), logo if logo.mode == 'RGBA' else None)
-            except Exception:
-                pass
-
-        # Verify aspect ratio
-        if not ensure_aspect_ratio(img.size, self.ASPECT_RATIO):
-            raise ValueError(f"Generated cover does not meet aspect ratio requirements: {self.ASPECT_RATIO}")
-
-        # Save image(s)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if filename_stem:
-            base_filename = filename_stem
-        else:
-            base_filename = f"cover-630x500_{timestamp}"
-        output_paths = []
+        base_filename = filename_stem or f"cover_{timestamp}"
+        output_paths = [os.path.join(output_dir, f"{base_filename}_{w}x{h}.{fmt}") for w, h, fmt in specs]
 
-        # Add metadata if requested
         metadata = {}
         if include_metadata:
-            metadata = {
-                'Title': title,
-                'Studio': studio,
-                'Version': version,
-                'Generated': timestamp,
-                'Tool': 'ItchPage Wizard v1.0.0'
-            }
-
-        # Export PNG
-        if export_png:
-            png_path = os.path.join(output_dir, f"{base_filename}.png")
-            img.save(png_path, 'PNG', pnginfo=self._create_png_metadata(metadata) if metadata else None)
-            output_paths.append(png_path)
-
-        # Export JPG
-        if export_jpg:
-            jpg_path = os.path.join(output_dir, f"{base_filename}.jpg")
-            # Convert RGBA to RGB for JPG
-            if img.mode == 'RGBA':
-                jpg_img = Image.new('RGB', img.size, (255, 255, 255))
-                jpg_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = jpg_img
-            img.save(jpg_path, 'JPEG', quality=95, exif=self._create_jpg_metadata(metadata) if metadata else None)
-            output_paths.append(jpg_path)
-
-        return output_paths[0] if output_paths else None
+            metadata = self._cover_metadata(cover_data.get('title', ''), cover_data.get('studio', ''),
+                                            cover_data.get('version', ''), timestamp)
+
+        def produce():
+            scale = max(max(w / self.COVER_WIDTH, h / self.COVER_HEIGHT) for w, h, _ in specs)
+            master = self._compose_cover(cover_data, scale)
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                # Encoders release the GIL, so they overlap with the next resample
+                futures = [
+                    pool.submit(self._export_cover, img, [output_paths[i]], metadata)
+                    for i, img in self._derivative_ladder(master, specs)
+                ]
+                for future in futures:
+                    future.result()
+
+        self.render_cache.run(
+            'cover-derivatives', self.ENGINE_VERSION,
+            self._cache_inputs(cover_data.get('logo_path'), cover_data.get('font', 'Arial')),
+            {'cover': cover_data, 'specs': specs, 'metadata': include_metadata},
+            output_paths, produce
+        )
+        return output_paths
+
+    def _derivative_ladder(self, master: Image.Image, specs: List[DerivativeSpec]):
+        """Yield (spec index, image) from largest to smallest, reusing earlier outputs as sources"""
+        def same_aspect(size: Tuple[int, int]) -> bool:
+            return abs(size[0] * master.height - size[1] * master.width) <= max(master.size)
+
+        sources = [master]  # uncropped images, largest first
+        resized: Dict[Tuple[int, int], Image.Image] = {}
+        order = sorted(range(len(specs)), key=lambda i: specs[i][0] * specs[i][1], reverse=True)
+        for i in order:
+            size = specs[i][:2]
+            img = resized.get(size)
+            if img is None:
+                source = min((s for s in sources if s.width >= size[0] and s.height >= size[1]),
+                             key=lambda s: s.width * s.height, default=master)
+                if source.size == size:
+                    img = source
+                elif same_aspect(size):
+                    img = source.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+                    sources.append(img)
+                else:
+                    img = ImageOps.fit(source, size, Image.Resampling.LANCZOS)
+                resized[size] = img
+            yield i, img
 
     def _create_png_metadata(self, metadata: Dict[str, str]):
         """Create PNG metadata"""
@@ -311,70 +482,139 @@ class CoverGenerator:
         return None
 
     def generate_preview(self, cover_data: Dict[str, Any], preview_size: Tuple[int, int]) -> Optional[bytes]:
-        """Generate preview image for GUI"""
+        """
+        Generate preview image for GUI.
+
+        The preview is rendered directly at preview scale from cached layers
+        (background, title, studio, version, logo); only layers whose inputs
+        changed since the last call are rasterized again.
+        """
         try:
-            # Create a smaller version for preview
             preview_width, preview_height = preview_size
             scale_factor = min(preview_width / self.COVER_WIDTH, preview_height / self.COVER_HEIGHT)
 
-            # Generate full cover first
-            temp_cover = self._generate_cover_image(cover_data)
+            preview_img = self._compose_cover(cover_data, scale_factor, self._preview_layer)
 
-            # Scale down for preview
-            preview_img = temp_cover.resize(
-                (int(self.COVER_WIDTH * scale_factor), int(self.COVER_HEIGHT * scale_factor)),
-                Image.Resampling.LANCZOS
-            )
-
-            # Convert to bytes for PySimpleGUI
+            # Convert to bytes for PySimpleGUI (fast zlib level: this runs per keystroke)
             bio = io.BytesIO()
-            preview_img.save(bio, format='PNG')
+            preview_img.save(bio, format='PNG', compress_level=1)
             return bio.getvalue()
 
         except Exception:
             return None
 
+    def _preview_layer(self, name: str, key: Tuple, factory: Callable[[], Any]) -> Any:
+        """Keep the most recent layer per slot; rebuild it only when its key changes"""
+        cached = self._preview_layers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = factory()
+        self._preview_layers[name] = (key, value)
+        return value
+
     def _generate_cover_image(self, data: Dict[str, Any]) -> Image.Image:
         """Generate cover image from data dict (helper for preview)"""
-        # Create background
-        bg_type = data.get('background_type', 'Solid Color')
-        bg_color = data.get('background_color', '#2c3e50')
-
-        if bg_type == "Gradient":
-            img = self._create_gradient_background(bg_color, '#34495e')
-        else:
-            img = self._create_solid_background(bg_color)
-
-        draw = ImageDraw.Draw(img)
-
-        # Add text
+        return self._compose_cover(data)
+
+    def _compose_cover(self, data: Dict[str, Any], scale: float = 1.0,
+                       get_layer: Optional[Callable[[str, Tuple, Callable[[], Any]], Any]] = None
+                       ) -> Image.Image:
+        """
+        Composite a cover from independent layers at the given scale.
+        get_layer(name, key, factory) lets callers cache layers between renders.
+        """
+        if get_layer is None:
+            get_layer = lambda name, key, factory: factory()
+
+        def px(value: float) -> int:
+            return int(round(value * scale))
+
+        width, height = px(self.COVER_WIDTH), px(self.COVER_HEIGHT)
         title = data.get('title', '')
         studio = data.get('studio', '')
+        version = data.get('version', '')
         font_name = data.get('font', 'Arial')
         bold = data.get('bold', True)
         shadow = data.get('shadow', True)
+        logo_path = data.get('logo_path')
+
+        # Background (the background cache already keys on size)
+        img = self._create_background(
+            data.get('background_type', 'Solid Color'),
+            data.get('background_color', '#2c3e50'),
+            data.get('secondary_color', self.DEFAULT_SECONDARY_COLOR),
+            data.get('gradient_angle', 90.0),
+            data.get('gradient_colors'),
+            source_path=logo_path,
+            size=(width, height)
+        )
 
+        def text_layer(text: str, font_file: Optional[str], full_size: int, fill: str,
+                       stroke_width: int, text_shadow: bool, shadow_offset: Tuple[int, int]):
+            font = get_font(font_file, max(1, px(full_size)))
+            stroke = max(1, px(stroke_width)) if stroke_width > 0 else 0
+            offset = (px(shadow_offset[0]), px(shadow_offset[1]))
+            sprite = self._render_text_sprite(text, font, fill=fill, stroke_width=stroke,
+                                              shadow=text_shadow, shadow_offset=offset)
+            return sprite, text_size(text, font)
+
+        def paste(layer, origin: Tuple[int, int]):
+            if layer is not None:
+                sprite, (dx, dy) = layer
+                img.paste(sprite, (origin[0] + dx, origin[1] + dy), sprite)
+
+        # Title: fit at full scale so the preview matches the export, then scale
+        title_width = title_height = 0
         if title:
+            title_file = self.font_index.resolve(font_name, bold)
             text_area_width = self.COVER_WIDTH - (2 * self.SAFE_ZONE_MARGIN)
-            title_font = self._fit_text_to_width(title, font_name, text_area_width, 72, 32, bold)
-            title_width, title_height = self._calculate_text_size(title, title_font)
-            title_x = (self.COVER_WIDTH - title_width) // 2
-            title_y = self.TITLE_AREA_TOP + (self.TITLE_AREA_HEIGHT - title_height) // 2
-
-            self._draw_text_with_effects(
-                draw, title, (title_x, title_y), title_font,
-                fill='white', shadow=shadow
+            title_size = get_layer(
+                'title-fit', (title, title_file),
+                lambda: getattr(fit_font(title, title_file, text_area_width, 72, 32), 'size', 32)
+            )
+            title_sprite, (title_width, title_height) = get_layer(
+                'title', (title, title_file, title_size, shadow, scale),
+                lambda: text_layer(title, title_file, title_size, 'white', 2, shadow, (3, 3))
             )
+        title_x = (width - title_width) // 2
+        title_y = px(self.TITLE_AREA_TOP) + (px(self.TITLE_AREA_HEIGHT) - title_height) // 2
+        if title:
+            paste(title_sprite, (title_x, title_y))
+
+        if studio:
+            studio_file = self.font_index.resolve(font_name, False)
+            studio_sprite, (studio_width, _) = get_layer(
+                'studio', (studio, studio_file, shadow, scale),
+                lambda: text_layer(studio, studio_file, 28, '#ecf0f1', 2, shadow, (2, 2))
+            )
+            paste(studio_sprite, ((width - studio_width) // 2, title_y + title_height + px(20)))
 
-            if studio:
-                studio_font = self._get_font(font_name, 28, False)
-                studio_width, studio_height = self._calculate_text_size(studio, studio_font)
-                studio_x = (self.COVER_WIDTH - studio_width) // 2
-                studio_y = title_y + title_height + 20
+        if version:
+            version_text = f"v{version}"
+            version_file = self.font_index.resolve(font_name, False)
+            version_sprite, (version_width, version_height) = get_layer(
+                'version', (version_text, version_file, scale),
+                lambda: text_layer(version_text, version_file, 20, '#bdc3c7', 1, False, (0, 0))
+            )
+            paste(version_sprite, (width - version_width - px(self.SAFE_ZONE_MARGIN),
+                                   height - version_height - px(self.SAFE_ZONE_MARGIN)))
 
-                self._draw_text_with_effects(
-                    draw, studio, (studio_x, studio_y), studio_font,
-                    fill='#ecf0f1', shadow=shadow, shadow_offset=(2, 2)
-                )
+        if logo_path:
+            logo = get_layer('logo', (file_signature(logo_path), scale),
+                             lambda: self._load_logo(logo_path, px(120)))
+            if logo is not None:
+                img.paste(logo, (px(self.SAFE_ZONE_MARGIN), height - logo.height - px(self.SAFE_ZONE_MARGIN)),
+                          logo if logo.mode == 'RGBA' else None)
 
         return img
+
+    def _load_logo(self, logo_path: str, max_size: int) -> Optional[Image.Image]:
+        """Load a logo thumbnail (max_size square), or None if it can't be read"""
+        if not os.path.exists(logo_path):
+            return None
+        try:
+            with Image.open(logo_path) as logo:
+                logo.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+                return logo.copy()
+        except Exception:
+            return None
@@ -0,0 +1,81 @@
+"""
+Screenshot De-duplication Module
+Perceptual hashing (dHash) to drop near-identical screenshots before layout
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .thumbcache import ThumbnailCache, get_thumbnail_cache
+
+HASH_SIZE = 8             # 8x8 gradient bits -> 64-bit hash
+DEFAULT_THRESHOLD = 6     # max differing bits for two screenshots to count as duplicates
+
+
+@dataclass
+class DedupeReport:
+    kept: List[str] = field(default_factory=list)
+    # (dropped path, path it duplicates, Hamming distance)
+    dropped: List[Tuple[str, str, int]] = field(default_factory=list)
+    unreadable: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return f"Kept {len(self.kept)} images, dropped {len(self.dropped)} near-duplicates"
+
+    def lines(self) -> List[str]:
+        return [f"  dropped {dropped} (~{kept}, distance {distance})"
+                for dropped, kept, distance in self.dropped]
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash: shrink to (hash_size + 1) x hash_size grayscale and record
+    whether each pixel is brighter than its right neighbour.
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distances(value: int, others: np.ndarray) -> np.ndarray:
+    """Bit distance from value to every uint64 hash in others"""
+    diff = np.bitwise_xor(others, np.uint64(value))
+    return np.unpackbits(diff.view(np.uint8)).reshape(len(others), 64).sum(axis=1)
+
+
+def file_dhash(path: str, thumbnails: Optional[ThumbnailCache] = None) -> Optional[int]:
+    """dHash of an image file, computed from its smallest cached thumbnail"""
+    thumbnails = thumbnails or get_thumbnail_cache()
+    thumb = thumbnails.get(path, ThumbnailCache.LEVELS[0])
+    return dhash(thumb) if thumb is not None else None
+
+
+def find_duplicates(paths: Iterable[str], threshold: int = DEFAULT_THRESHOLD,
+                    thumbnails: Optional[ThumbnailCache] = None) -> DedupeReport:
+    """
+    Keep the first of every group of images whose dHashes differ by at most
+    threshold bits; later near-duplicates are reported as dropped.
+    Unreadable files are reported separately and not kept.
+    """
+    report = DedupeReport()
+    kept_hashes = np.empty(0, dtype=np.uint64)
+    for path in paths:
+        value = file_dhash(path, thumbnails)
+        if value is None:
+            report.unreadable.append(path)
+            continue
+        if len(kept_hashes):
+            distances = hamming_distances(value, kept_hashes)
+            nearest = int(distances.argmin())
+            if distances[nearest] <= threshold:
+                report.dropped.append((path, report.kept[nearest], int(distances[nearest])))
+                continue
+        report.kept.append(path)
+        kept_hashes = np.append(kept_hashes, np.uint64(value))
+    return report
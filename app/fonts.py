@@ -0,0 +1,318 @@
+"""
+Font Service Module
+Process-wide cache of FreeType font objects and fast text fitting
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import ImageFont
+
+from .utils import get_asset_path, get_cache_dir
+
+DEFAULT_FONT_FILE = 'arial.ttf'
+FONT_CACHE_SIZE = 256
+
+FONT_EXTS = {'.ttf', '.otf', '.ttc'}
+FALLBACK_FAMILIES = ('Arial', 'Helvetica', 'Liberation Sans', 'DejaVu Sans', 'Noto Sans')
+REGULAR_STYLES = ('regular', 'normal', 'book', 'roman', 'medium')
+BOLD_STYLES = ('bold', 'semibold', 'demibold', 'black', 'heavy', 'extrabold')
+
+
+def load_font_file(font_file: str, size: int, variant: Optional[str] = None) -> ImageFont.FreeTypeFont:
+    """
+    Load a TrueType/OpenType font once per (font file, size, variant).
+    Raises OSError if the file cannot be loaded.
+    """
+    return _load_font_file(font_file, int(size), variant)
+
+
+def get_font(font_file: Optional[str], size: int, variant: Optional[str] = None) -> ImageFont.ImageFont:
+    """Get a cached font object with fallback to the default font"""
+    return _get_font(font_file, int(size), variant)
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _load_font_file(font_file: str, size: int, variant: Optional[str]) -> ImageFont.FreeTypeFont:
+    font = ImageFont.truetype(font_file, size)
+    if variant:
+        try:
+            # Named instance of a variable font, e.g. "Bold"
+            font.set_variation_by_name(variant)
+        except (OSError, ValueError):
+            pass
+    return font
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def _get_font(font_file: Optional[str], size: int, variant: Optional[str]) -> ImageFont.ImageFont:
+    for candidate in (font_file, DEFAULT_FONT_FILE):
+        if not candidate:
+            continue
+        try:
+            return load_font_file(candidate, size, variant)
+        except OSError:
+            continue
+
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1 only ships the bitmap font
+        return ImageFont.load_default()
+
+
+def text_size(text: str, font: ImageFont.ImageFont) -> Tuple[int, int]:
+    """Calculate text bounding box size"""
+    bbox = font.getbbox(text)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def fit_font(text: str, font_file: Optional[str], max_width: int, max_size: int = 72,
+             min_size: int = 24, step: int = 2, variant: Optional[str] = None) -> ImageFont.ImageFont:
+    """
+    Return the largest font in max_size, max_size - step, ... min_size that fits
+    text into max_width (or the min_size font if none does).
+
+    Text width grows roughly linearly with font size, so the first probe is a
+    width-proportional estimate and the remainder is a bisection over sizes.
+    """
+    sizes = list(range(max_size, min_size - 1, -step))
+    if not sizes:
+        return get_font(font_file, min_size, variant)
+
+    widest = get_font(font_file, sizes[0], variant)
+    width, _ = text_size(text, widest)
+    if width <= max_width:
+        return widest
+
+    # sizes[lo] is known to be too wide; the answer lies in (lo, hi]
+    lo, hi = 0, len(sizes)
+    estimate = max_size * max_width / width
+    guess = math.ceil((max_size - estimate) / step)
+    probes = (guess, guess - 1, guess + 1)
+    while hi - lo > 1:
+        mid = next((p for p in probes if lo < p < hi), (lo + hi) // 2)
+        font = get_font(font_file, sizes[mid], variant)
+        if text_size(text, font)[0] <= max_width:
+            hi = mid
+        else:
+            lo = mid
+
+    if hi < len(sizes):
+        return get_font(font_file, sizes[hi], variant)
+    return get_font(font_file, min_size, variant)
+
+
+# ----- Font discovery index --------------------------------------------------
+
+
+def system_font_dirs() -> List[Path]:
+    """Platform font directories, most specific first"""
+    home = Path.home()
+    if sys.platform.startswith('win'):
+        dirs = [Path(os.environ.get('WINDIR', r'C:\Windows')) / 'Fonts']
+        if os.environ.get('LOCALAPPDATA'):
+            dirs.append(Path(os.environ['LOCALAPPDATA']) / 'Microsoft' / 'Windows' / 'Fonts')
+    elif sys.platform == 'darwin':
+        dirs = [home / 'Library' / 'Fonts', Path('/Library/Fonts'), Path('/System/Library/Fonts')]
+    else:
+        dirs = [home / '.local' / 'share' / 'fonts', home / '.fonts',
+                Path('/usr/local/share/fonts'), Path('/usr/share/fonts')]
+    return dirs
+
+
+def _normalize_name(name: str) -> str:
+    return ''.join(c for c in name.lower() if c.isalnum())
+
+
+class FontIndex:
+    """
+    Maps font family/style names to font files.
+
+    The scan result is persisted as JSON together with the mtime of every
+    scanned directory and file; on the next start only directories whose mtime
+    changed are listed again, known files are only stat()ed, and only new or
+    modified files are opened.
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, font_dirs: Optional[Iterable[Path]] = None,
+                 index_path: Optional[Path] = None):
+        if font_dirs is None:
+            font_dirs = [get_asset_path('fonts')] + system_font_dirs()
+        self.font_dirs = [Path(d) for d in font_dirs]
+        self.index_path = Path(index_path) if index_path else get_cache_dir('font_index.json')
+
+        self._dirs: Dict[str, int] = {}
+        self._files: Dict[str, Dict[str, object]] = {}
+        self._families: Dict[str, Dict[str, str]] = {}
+        self._resolved: Dict[Tuple[str, bool], Optional[str]] = {}
+        self._lock = threading.Lock()
+        self.files_opened = 0
+
+    # ---- Public API ---------------------------------------------------------
+
+    def load(self) -> 'FontIndex':
+        """Load the persisted index, rescanning only directories that changed"""
+        with self._lock:
+            stored = self._read_index()
+            stored_dirs = stored.get('dirs', {})
+            stored_files = stored.get('files', {})
+
+            # Group the stored index by parent directory for unchanged-dir reuse
+            children: Dict[str, List[str]] = {}
+            for path in list(stored_dirs) + list(stored_files):
+                children.setdefault(os.path.dirname(path), []).append(path)
+
+            dirs: Dict[str, int] = {}
+            files: Dict[str, Dict[str, object]] = {}
+            for root in self.font_dirs:
+                self._scan_dir(root, stored_dirs, stored_files, children, dirs, files)
+
+            changed = dirs != stored_dirs or files != stored_files
+            self._dirs, self._files = dirs, files
+            self._build_families()
+            if changed:
+                self._write_index()
+        return self
+
+    def resolve(self, name: Optional[str], bold: bool = False) -> Optional[str]:
+        """Return the font file for a family or file name, falling back to a default family"""
+        key = (name or '', bold)
+        if key not in self._resolved:
+            path = self._lookup(name, bold) if name else None
+            if path is None:
+                for family in FALLBACK_FAMILIES:
+                    path = self._lookup(family, bold)
+                    if path:
+                        break
+            self._resolved[key] = path
+        return self._resolved[key]
+
+    def families(self) -> List[str]:
+        """Display names of all indexed families"""
+        names = {str(entry['family']) for entry in self._files.values() if entry.get('family')}
+        return sorted(names)
+
+    # ---- Internals ----------------------------------------------------------
+
+    def _scan_dir(self, directory: Path, stored_dirs: Dict[str, int],
+                  stored_files: Dict[str, Dict[str, object]], children: Dict[str, List[str]],
+                  dirs: Dict[str, int], files: Dict[str, Dict[str, object]]) -> None:
+        key = str(directory)
+        if key in dirs:
+            return
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except OSError:
+            return
+        dirs[key] = mtime
+
+        if stored_dirs.get(key) == mtime:
+            # Listing unchanged: only descend into known subdirs and stat known files,
+            # since a font replaced in place does not change its directory's mtime
+            for path in children.get(key, []):
+                if path in stored_files:
+                    self._index_file(path, stored_files, files)
+                else:
+                    self._scan_dir(Path(path), stored_dirs, stored_files, children, dirs, files)
+            return
+
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self._scan_dir(Path(entry.path), stored_dirs, stored_files, children, dirs, files)
+            elif Path(entry.name).suffix.lower() in FONT_EXTS:
+                self._index_file(entry.path, stored_files, files)
+
+    def _index_file(self, path: str, stored_files: Dict[str, Dict[str, object]],
+                    files: Dict[str, Dict[str, object]]) -> None:
+        """Reuse the stored entry of a font file if its mtime matches, else open it"""
+        try:
+            file_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        cached = stored_files.get(path)
+        if cached and cached.get('mtime') == file_mtime:
+            files[path] = cached
+        else:
+            files[path] = self._read_names(path, file_mtime)
+
+    def _read_names(self, path: str, mtime: int) -> Dict[str, object]:
+        self.files_opened += 1
+        try:
+            family, style = ImageFont.truetype(path, 10).getname()
+        except Exception:
+            family, style = None, None
+        return {'mtime': mtime, 'family': family, 'style': style}
+
+    def _build_families(self) -> None:
+        families: Dict[str, Dict[str, str]] = {}
+        # Directory order gives bundled assets precedence over system fonts
+        for root in self.font_dirs:
+            prefix = str(root) + os.sep
+            for path in sorted(p for p in self._files if p.startswith(prefix)):
+                entry = self._files[path]
+                style = _normalize_name(str(entry.get('style') or 'regular'))
+                names = {_normalize_name(Path(path).stem)}
+                if entry.get('family'):
+                    names.add(_normalize_name(str(entry['family'])))
+                for name in names:
+                    families.setdefault(name, {}).setdefault(style, path)
+        self._families = families
+        self._resolved = {}
+
+    def _lookup(self, name: str, bold: bool) -> Optional[str]:
+        styles = self._families.get(_normalize_name(name))
+        if not styles:
+            return None
+        preferred = BOLD_STYLES + REGULAR_STYLES if bold else REGULAR_STYLES
+        for style in preferred:
+            if style in styles:
+                return styles[style]
+        return styles[sorted(styles)[0]]
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.INDEX_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _write_index(self) -> None:
+        data = {'version': self.INDEX_VERSION, 'dirs': self._dirs, 'files': self._files}
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # Read-only cache location: the index just won't persist
+
+
+_font_index: Optional[FontIndex] = None
+_font_index_lock = threading.Lock()
+
+
+def get_font_index() -> FontIndex:
+    """Process-wide font index, loaded on first use"""
+    global _font_index
+    with _font_index_lock:
+        if _font_index is None:
+            _font_index = FontIndex().load()
+        return _font_index
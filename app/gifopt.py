@@ -6,16 +6,92 @@ Optimizes GIFs and converts MP4s to GIFs with size targets
 from PIL import Image, ImageSequence
 import imageio
 import io
+import math
 import os
+import shutil
 import subprocess
 import tempfile
 import numpy as np
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Callable, Iterable, Iterator
 from datetime import datetime
 
+from .gifpalette import GlobalPalette
+from .gifsize import LADDER, MB, Encoder, Estimator, GIFSettings, SizeReport, fit_size
+from .gifstream import GIFStreamWriter, frame_delta
+from .rendercache import RenderCache
+from .thumbcache import ThumbnailCache, get_thumbnail_cache
 from .utils import validate_image, check_ffmpeg
 
+# Palette size -> palette shared by every frame
+PaletteSource = Callable[[int], GlobalPalette]
+
+
+@dataclass
+class _FramePlan:
+    """
+    What the first pass over a clip's frames found, so later passes only decode:
+    the raw index of every distinct frame and, per frame step, the (raw index,
+    duration) of every frame _coalesce_frames would output.
+    """
+    distinct: List[int] = field(default_factory=list)
+    shown: Dict[int, List[Tuple[int, int]]] = field(default_factory=dict)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.distinct)
+
+
+class _Coalescer:
+    """
+    The merge and decimation of GIFOptimizer._coalesce_frames for one frame
+    step, fed one raw frame at a time. push() and finish() return the
+    (item, duration) pairs that became final; item() is called once per
+    distinct frame, while the raw frame is still valid.
+    """
+
+    def __init__(self, step: int, same_look: Callable[[np.ndarray, np.ndarray], bool]):
+        self.step = step
+        self.same_look = same_look
+        # [item, duration, signature] being shown, and a distinct frame decimation may drop
+        self.kept: Optional[List] = None
+        self.candidate: Optional[List] = None
+        self.since_kept = 0
+
+    def push(self, is_new: bool, signature: np.ndarray, item: Callable[[], Any],
+             duration: int) -> List[Tuple[Any, int]]:
+        if not is_new:
+            (self.candidate or self.kept)[1] += duration
+            return []
+
+        done = []
+        returns = False
+        if self.candidate is not None:
+            if self.same_look(signature, self.kept[2]):
+                done.append((self.kept[0], self.kept[1]))
+                self.kept, returns = self.candidate, True
+            else:
+                self.kept[1] += self.candidate[1]
+            self.candidate = None
+
+        entry = [item(), duration, signature]
+        self.since_kept += 1
+        if self.kept is None or returns or self.since_kept >= self.step:
+            if self.kept is not None:
+                done.append((self.kept[0], self.kept[1]))
+            self.kept, self.since_kept = entry, 0
+        else:
+            self.candidate = entry
+        return done
+
+    def finish(self) -> List[Tuple[Any, int]]:
+        if self.candidate is not None:
+            self.kept[1] += self.candidate[1]
+            self.candidate = None
+        return [(self.kept[0], self.kept[1])] if self.kept is not None else []
+
+
 class GIFOptimizer:
     # Size targets in MB
     SIZE_PRESETS = {
@@ -25,8 +101,44 @@ class GIFOptimizer:
         'X-Large': 10
     }
 
-    def __init__(self):
+    # Frames read from videos by the imageio fallback
+    MAX_FRAMES = 50
+
+    # Output may land this fraction below target_size_mb (never above, if reachable)
+    SIZE_TOLERANCE = 0.1
+    MAX_ENCODE_PASSES = 4
+
+    # Frames decoded to estimate output size and build the palette: a few runs of
+    # consecutive frames, so delta frames can be costed at every frame step the
+    # size search tries
+    SAMPLE_RUNS = 3
+    SAMPLE_RUN_LENGTH = 5
+
+    # Smallest output size the size search may scale down to
+    MIN_WIDTH = 160
+    MIN_HEIGHT = 120
+
+    # Initial size model for ffmpeg output, corrected after the first encode
+    BYTES_PER_PIXEL = 1.5
+
+    # Frames whose 4x-reduced pixels all lie within DUPLICATE_TOLERANCE levels of the
+    # last distinct frame are merged into it (absorbs video noise, not moving sprites)
+    SIGNATURE_REDUCE = 4
+    DUPLICATE_TOLERANCE = 6
+
+    # Frame steps whose output frames the first pass plans (the size search's ladder)
+    PLANNED_STEPS = tuple(sorted({step for _, step in LADDER}))
+
+    # Bump when encoding changes, so cached outputs are rebuilt
+    ENGINE_VERSION = 7
+
+    def __init__(self, render_cache: Optional[RenderCache] = None,
+                 thumbnail_cache: Optional[ThumbnailCache] = None):
         self.ffmpeg_available = check_ffmpeg()
+        self.render_cache = render_cache or RenderCache(enabled=False)
+        self.thumbnails = thumbnail_cache or get_thumbnail_cache()
+        # Size targeting outcome of the last encode (None if it was copied or cached)
+        self.last_report: Optional[SizeReport] = None
 
     def _get_video_info(self, video_path: str) -> Dict[str, Any]:
         """Get video information using ffprobe"""
@@ -94,125 +206,372 @@ class GIFOptimizer:
 
         return frame_paths
 
-    def _extract_frames_imageio(self, video_path: str) -> List[np.ndarray]:
-        """Extract frames using imageio (fallback)"""
-        try:
-            reader = imageio.get_reader(video_path)
-            frames = []
-
-            for i, frame in enumerate(reader):
-                frames.append(frame)
-                if i > 100:  # Limit frames to prevent memory issues
-                    break
-
-            reader.close()
-            return frames
-
-        except Exception:
-            return []
-
-    def _quantize_colors(self, image: Image.Image, max_colors: int = 256) -> Image.Image:
-        """Quantize image colors using median cut"""
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        # Use PIL's built-in quantization
-        quantized = image.quantize(colors=max_colors, method=Image.Quantize.MEDIANCUT)
-        return quantized.convert('RGB')
-
-    def _calculate_target_dimensions(self, width: int, height: int,
-                                   target_file_size: int, frame_count: int) -> Tuple[int, int]:
-        """Calculate target dimensions to meet file size"""
-        # Estimate bytes per pixel (rough approximation)
-        bytes_per_pixel = 1.5  # GIF compression estimate
-        target_pixels_per_frame = (target_file_size * 1024 * 1024) / (frame_count * bytes_per_pixel)
-
-        current_pixels = width * height
-        if current_pixels <= target_pixels_per_frame:
-            return width, height
-
-        # Calculate scale factor
-        scale_factor = (target_pixels_per_frame / current_pixels) ** 0.5
-
-        new_width = max(160, int(width * scale_factor))  # Minimum 160px width
-        new_height = max(120, int(height * scale_factor))  # Minimum 120px height
-
-        return new_width, new_height
-
     def optimize_gif(self, input_path: str, output_path: str,
                     target_size_mb: float = 3.0, quality: int = 80,
-                    max_colors: int = 256, dither: bool = False) -> str:
-        """Optimize existing GIF"""
+                    max_colors: int = 256, dither: bool = False,
+                    global_palette: bool = True) -> str:
+        """
+        Optimize existing GIF. global_palette maps every frame onto one palette
+        built from sampled frames; otherwise each frame gets its own median cut.
+        """
+        params = {'target_size_mb': target_size_mb, 'quality': quality,
+                  'max_colors': max_colors, 'dither': dither, 'global_palette': global_palette}
+        self.last_report = None
+        self.render_cache.run(
+            'gif', self.ENGINE_VERSION, [input_path], params, [output_path],
+            lambda: self._optimize_gif(input_path, output_path, target_size_mb, quality, max_colors, dither,
+                                       global_palette)
+        )
+        return output_path
+
+    def _optimize_gif(self, input_path: str, output_path: str, target_size_mb: float,
+                      quality: int, max_colors: int, dither: bool, global_palette: bool = True) -> str:
+        """
+        Shrink and re-encode an animated GIF as a frame stream:
+        decode -> coalesce repeats / decimate -> resize -> quantize -> encode.
+        Only a frame or two is in memory at any time, whatever the GIF's length.
+        Scale, palette size and frame rate are searched to land just under
+        target_size_mb (see _fit_size).
+        """
         try:
-            # Load GIF
-            gif = Image.open(input_path)
-
-            if not getattr(gif, 'is_animated', False):
-                raise ValueError("Input is not an animated GIF")
-
-            frames = []
-            durations = []
-
-            # Extract frames and timing
-            for frame in ImageSequence.Iterator(gif):
-                frames.append(frame.copy())
-                durations.append(frame.info.get('duration', 100))
-
-            if not frames:
-                raise ValueError("No frames found in GIF")
-
-            # Calculate target dimensions
-            original_size = os.path.getsize(input_path) / (1024 * 1024)  # MB
-            if original_size <= target_size_mb:
-                # Already small enough, just copy
-                import shutil
-                shutil.copy2(input_path, output_path)
-                return output_path
-
-            target_width, target_height = self._calculate_target_dimensions(
-                gif.width, gif.height, int(target_size_mb), len(frames)
-            )
-
-            # Process frames
-            optimized_frames = []
-            for frame in frames:
-                # Resize
-                resized = frame.resize((target_width, target_height), Image.Resampling.LANCZOS)
-
-                # Quantize colors
-                if max_colors < 256:
-                    resized = self._quantize_colors(resized, max_colors)
-
-                optimized_frames.append(resized)
-
-            # Frame decimation if still too large
-            if len(optimized_frames) > 50:  # Reduce frame count
-                step = len(optimized_frames) // 50
-                optimized_frames = optimized_frames[::max(1, step)]
-                durations = durations[::max(1, step)]
-
-            # Save optimized GIF
-            if optimized_frames:
-                optimized_frames[0].save(
-                    output_path,
-                    save_all=True,
-                    append_images=optimized_frames[1:],
-                    duration=durations,
-                    loop=0,
-                    optimize=True,
-                    quality=quality
-                )
-
+            target_bytes = int(target_size_mb * MB)
+            with Image.open(input_path) as gif:
+                if not getattr(gif, 'is_animated', False):
+                    raise ValueError("Input is not an animated GIF")
+
+                if os.path.getsize(input_path) <= target_bytes:
+                    # Already small enough, just copy
+                    shutil.copy2(input_path, output_path)
+                    return output_path
+
+                source_size = gif.size
+                runs, plan = self._sample_frames(lambda: self._gif_frames(gif))
+            palettes = self._global_palettes(runs) if global_palette else None
+
+            def encode(settings: GIFSettings, path: str) -> int:
+                with Image.open(input_path) as gif:
+                    self._encode_frames(path, self._decode_gif_frames(gif, settings.step, plan),
+                                        self._scaled_size(source_size, settings.scale), settings.colors,
+                                        palettes)
+                return os.path.getsize(path)
+
+            self.last_report = self._fit_size(output_path, target_bytes, encode, source_size,
+                                              self._sample_estimator(runs, source_size, plan.frame_count,
+                                                                     palettes),
+                                              max_colors)
             return output_path
 
         except Exception as e:
             raise ValueError(f"GIF optimization failed: {e}")
 
+    # ---- Size targeting -------------------------------------------------------
+
+    def _scaled_size(self, size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+        return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+    def _sample_indices(self, frame_count: int) -> set:
+        """Frame indices of SAMPLE_RUNS evenly spaced runs of consecutive frames"""
+        spacing = max(self.SAMPLE_RUN_LENGTH, frame_count // self.SAMPLE_RUNS)
+        starts = range(0, frame_count, spacing)[:self.SAMPLE_RUNS]
+        return {start + i for start in starts for i in range(self.SAMPLE_RUN_LENGTH)
+                if start + i < frame_count}
+
+    def _sample_runs(self, frames: Iterable[Tuple[int, Image.Image]]) -> List[List[Image.Image]]:
+        """Group (index, frame) samples into runs of consecutive frames"""
+        runs: List[List[Image.Image]] = []
+        previous = None
+        for index, frame in frames:
+            if previous is None or index != previous + 1:
+                runs.append([])
+            runs[-1].append(frame)
+            previous = index
+        return runs
+
+    def _sample_estimator(self, runs: List[List[Image.Image]], source_size: Tuple[int, int],
+                          frame_count: int, palettes: Optional[PaletteSource] = None) -> Estimator:
+        """
+        Predict output bytes by encoding sample runs with the real pipeline: each
+        run's first frame alone, then followed by the frame settings.step later,
+        whose extra bytes are the cost of one (delta) frame at that step.
+        """
+        def encoded_size(frames: List[Image.Image], settings: GIFSettings) -> int:
+            bio = io.BytesIO()
+            self._encode_frames(bio, ((frame, 100) for frame in frames),
+                                self._scaled_size(source_size, settings.scale), settings.colors, palettes)
+            return bio.tell()
+
+        def estimate(settings: GIFSettings) -> float:
+            # Each sample is resized once, not once per encode it takes part in
+            size = self._scaled_size(source_size, settings.scale)
+            scaled = lambda frame: next(self._resize_frames([(frame, 100)], size))[0]
+            firsts, nexts = [], []
+            for run in runs:
+                head = scaled(run[0])
+                firsts.append(encoded_size([head], settings))
+                if len(run) > 1:
+                    following = scaled(run[min(settings.step, len(run) - 1)])
+                    nexts.append(encoded_size([head, following], settings) - firsts[-1])
+            first = sum(firsts) / len(firsts)
+            per_frame = sum(nexts) / len(nexts) if nexts else first
+            return first + (math.ceil(frame_count / settings.step) - 1) * per_frame
+        return estimate
+
+    def _fit_size(self, output_path: str, target_bytes: int, encode: Encoder,
+                  source_size: Tuple[int, int], estimate: Estimator, max_colors: int = 256) -> SizeReport:
+        """Closed-loop search over scale, colors and frame step (app/gifsize.py)"""
+        min_scale = max(self.MIN_WIDTH / source_size[0], self.MIN_HEIGHT / source_size[1])
+        return fit_size(output_path, target_bytes, estimate, encode,
+                        max_colors=min(max_colors, 256), min_scale=min_scale,
+                        tolerance=self.SIZE_TOLERANCE, max_passes=self.MAX_ENCODE_PASSES)
+
+    # ---- Frame pipeline -------------------------------------------------------
+    # Each stage is a generator of (frame, duration ms), so frames flow through
+    # one at a time and are written as soon as they are encoded.
+
+    def _decode_gif_frames(self, gif: Image.Image, step: int = 1,
+                           plan: Optional[_FramePlan] = None) -> Iterator[Tuple[Image.Image, int]]:
+        """Distinct frames of an open GIF, decimated to every step-th (see _coalesce_frames)"""
+        return self._planned_frames(self._gif_frames(gif), step, plan)
+
+    def _decode_video_frames(self, video_path: str, max_frames: int, step: int = 1,
+                             plan: Optional[_FramePlan] = None) -> Iterator[Tuple[Image.Image, int]]:
+        """Distinct frames among the first max_frames of a video, decimated to every step-th"""
+        return self._planned_frames(self._video_frames(video_path, max_frames), step, plan)
+
+    def _planned_frames(self, frames: Iterable[Tuple[Image.Image, int]], step: int,
+                        plan: Optional[_FramePlan] = None) -> Iterator[Tuple[Image.Image, int]]:
+        """
+        _coalesce_frames(frames, step), taken from plan when it covers step:
+        only the frames shown are converted, and no signature is computed
+        """
+        shown = plan.shown.get(step) if plan else None
+        if shown is None:
+            yield from self._coalesce_frames(frames, step)
+            return
+        pending = iter(shown)
+        index, duration = next(pending, (None, 0))
+        for raw_index, (frame, _) in enumerate(frames):
+            if index is None:
+                break
+            if raw_index == index:
+                yield self._to_rgb(frame), duration
+                index, duration = next(pending, (None, 0))
+
+    def _gif_frames(self, gif: Image.Image) -> Iterator[Tuple[Image.Image, int]]:
+        """Raw frames of an open GIF (the GIF itself, seeked), valid until the next one"""
+        for frame in ImageSequence.Iterator(gif):
+            yield frame, frame.info.get('duration', 100)
+
+    def _video_frames(self, video_path: str, max_frames: int) -> Iterator[Tuple[Image.Image, int]]:
+        """The first max_frames frames of a video, read lazily through imageio"""
+        reader = imageio.get_reader(video_path)
+        try:
+            for index, frame in enumerate(reader):
+                if index >= max_frames:
+                    break
+                yield Image.fromarray(frame), 200  # 5fps
+        finally:
+            reader.close()
+
+    def _to_rgb(self, frame: Image.Image) -> Image.Image:
+        """Decoded frame as RGB, or RGBA if it has transparency"""
+        has_alpha = frame.mode in ('RGBA', 'PA') or 'transparency' in frame.info
+        return frame.convert('RGBA' if has_alpha else 'RGB')
+
+    def _frame_signature(self, frame: Image.Image) -> np.ndarray:
+        """Downscaled pixels used to spot repeated frames"""
+        if frame.mode in ('RGB', 'RGBA'):
+            return np.asarray(frame.reduce(self.SIGNATURE_REDUCE), dtype=np.int16)
+        if frame.mode == 'L' and 'transparency' not in frame.info:
+            # Reduce first: gray converts to RGB exactly, at 1/16 of the pixels
+            return np.asarray(frame.reduce(self.SIGNATURE_REDUCE).convert('RGB'), dtype=np.int16)
+        # Palette frames (a GIF's first frame) are averaged in their colors
+        return np.asarray(self._to_rgb(frame).reduce(self.SIGNATURE_REDUCE), dtype=np.int16)
+
+    def _same_look(self, signature: np.ndarray, other: np.ndarray) -> bool:
+        """Whether two frame signatures are within DUPLICATE_TOLERANCE everywhere"""
+        return (signature.shape == other.shape
+                and int(np.abs(signature - other).max()) <= self.DUPLICATE_TOLERANCE)
+
+    def _distinct_frames(self, frames: Iterable[Tuple[Image.Image, int]]
+                         ) -> Iterator[Tuple[bool, np.ndarray, Image.Image, int]]:
+        """
+        (is_new, signature, frame, duration) for raw frames; is_new is False when
+        a frame has the same look as the last distinct frame
+        """
+        last = None
+        for frame, duration in frames:
+            signature = self._frame_signature(frame)
+            duplicate = last is not None and self._same_look(signature, last)
+            if not duplicate:
+                last = signature
+            yield not duplicate, signature, frame, duration
+
+    def _coalesce_frames(self, frames: Iterable[Tuple[Image.Image, int]],
+                         step: int = 1) -> Iterator[Tuple[Image.Image, int]]:
+        """
+        Merge runs of (near-)identical frames into one, then keep every step-th
+        distinct frame. Each kept frame is shown for the summed duration of the
+        frames it stands in for, so playback speed is kept. Only distinct frames
+        are converted, before any resize or quantize work.
+
+        Decimation never drops a transient, a distinct frame after which the
+        animation returns to the last kept look (a flash, a blink, a menu
+        highlight): it is kept along with the frame that returns, and the step
+        count restarts there.
+        """
+        coalescer = _Coalescer(step, self._same_look)
+        for is_new, signature, frame, duration in self._distinct_frames(frames):
+            yield from coalescer.push(is_new, signature, lambda: self._to_rgb(frame), duration)
+        yield from coalescer.finish()
+
+    def _plan_frames(self, frames: Iterable[Tuple[Image.Image, int]],
+                     steps: Iterable[int] = ()) -> _FramePlan:
+        """
+        One pass over the raw frames: which are distinct, and which frames and
+        durations _coalesce_frames outputs at each of steps
+        """
+        plan = _FramePlan()
+        coalescers = {step: _Coalescer(step, self._same_look) for step in steps}
+        for index, (is_new, signature, _, duration) in enumerate(self._distinct_frames(frames)):
+            if is_new:
+                plan.distinct.append(index)
+            for step, coalescer in coalescers.items():
+                plan.shown.setdefault(step, []).extend(
+                    coalescer.push(is_new, signature, lambda: index, duration))
+        for step, coalescer in coalescers.items():
+            plan.shown.setdefault(step, []).extend(coalescer.finish())
+        return plan
+
+    def _sample_frames(self, open_frames: Callable[[], Iterable[Tuple[Image.Image, int]]]
+                       ) -> Tuple[List[List[Image.Image]], _FramePlan]:
+        """
+        (sample runs of consecutive distinct frames, plan of the frames).
+        One pass plans the frames (PLANNED_STEPS), a second converts only the
+        sampled ones and stops after the last of them.
+        """
+        plan = self._plan_frames(open_frames(), self.PLANNED_STEPS)
+        wanted = {plan.distinct[i]: i for i in self._sample_indices(plan.frame_count)}
+        last = max(wanted, default=-1)
+
+        def sampled() -> Iterator[Tuple[int, Image.Image]]:
+            for raw_index, (frame, _) in enumerate(open_frames()):
+                if raw_index > last:
+                    break
+                if raw_index in wanted:
+                    yield wanted[raw_index], self._to_rgb(frame)
+        return self._sample_runs(sampled()), plan
+
+    def _resize_frames(self, frames: Iterable[Tuple[Image.Image, int]],
+                       size: Tuple[int, int]) -> Iterator[Tuple[Image.Image, int]]:
+        for frame, duration in frames:
+            if frame.size != size:
+                frame = frame.resize(size, Image.Resampling.LANCZOS)
+            yield frame, duration
+
+    def _global_palettes(self, runs: List[List[Image.Image]]) -> PaletteSource:
+        """
+        Global palettes built from the sample frames on demand, one per palette
+        size, with a transparent index reserved for delta frames
+        """
+        palettes: Dict[int, GlobalPalette] = {}
+
+        def palette_for(colors: int) -> GlobalPalette:
+            if colors not in palettes:
+                frames = [frame for run in runs for frame in run]
+                palettes[colors] = GlobalPalette.from_frames(frames, colors, reserve_transparent=True)
+            return palettes[colors]
+        return palette_for
+
+    def _palette_frames(self, frames: Iterable[Tuple[Image.Image, int]], max_colors: int = 256,
+                        palettes: Optional[PaletteSource] = None
+                        ) -> Iterator[Tuple[Image.Image, int, Optional[int]]]:
+        """
+        Quantize frames to GIF palette images; yields (frame, duration, transparent index).
+        With palettes, every frame shares palettes(max_colors), so no frame needs a
+        local color table; otherwise each frame gets its own median cut.
+        """
+        palette = palettes(min(max_colors, 256)) if palettes else None
+        for frame, duration in frames:
+            if palette is not None:
+                yield palette.quantize(frame), duration, palette.transparency
+            else:
+                paletted, transparency = self._to_palette(frame, min(max_colors, 256))
+                yield paletted, duration, transparency
+
+    def _to_palette(self, frame: Image.Image, colors: int = 256) -> Tuple[Image.Image, Optional[int]]:
+        """Palette image for GIF encoding, with one entry reserved for transparent pixels if any"""
+        if frame.mode == 'RGBA':
+            mask = frame.getchannel('A').point(lambda a: 255 if a < 128 else 0)
+            if mask.getbbox():
+                paletted = frame.convert('RGB').quantize(colors=colors - 1, method=Image.Quantize.MEDIANCUT)
+                palette = paletted.getpalette('RGB')
+                transparency = len(palette) // 3
+                paletted.putpalette(palette + [0, 0, 0])
+                paletted.paste(transparency, mask=mask)
+                return paletted, transparency
+            frame = frame.convert('RGB')
+        return frame.quantize(colors=colors, method=Image.Quantize.MEDIANCUT), None
+
+    def _encode_frames(self, dest, frames: Iterable[Tuple[Image.Image, int]], size: Tuple[int, int],
+                       colors: int, palettes: Optional[PaletteSource] = None) -> None:
+        """
+        resize -> quantize -> encode. Frames sharing a global palette of opaque
+        frames are written as deltas; others are written whole.
+        """
+        palette = palettes(min(colors, 256)) if palettes else None
+        frames = self._palette_frames(self._resize_frames(frames, size), colors, palettes)
+        self._write_frames(dest, frames, delta=palette is not None and not palette.has_alpha)
+
+    def _write_frames(self, output_path, frames: Iterable[Tuple[Image.Image, int, Optional[int]]],
+                      delta: bool = False) -> None:
+        """
+        Encode frames to output_path (a path or file object) as they arrive.
+
+        With delta, frames must share one palette whose transparent index no
+        pixel uses. Each frame after the first is cut to the bounding box of
+        pixels that differ from the previous frame, with unchanged pixels
+        inside it transparent, and is drawn over the previous frame
+        (disposal 1, do not dispose).
+        """
+        with GIFStreamWriter(output_path) as writer:
+            previous = None
+            for frame, duration, transparency in frames:
+                if not delta or transparency is None:
+                    # Transparent pixels must clear, not show the previous frame through
+                    writer.write(frame, duration, transparency=transparency,
+                                 disposal=2 if transparency is not None else 0)
+                    continue
+
+                indices = np.asarray(frame)
+                if previous is None:
+                    writer.write(frame, duration, transparency=transparency, disposal=1)
+                else:
+                    region, offset = frame_delta(previous, indices, transparency)
+                    patch = Image.fromarray(region, 'P')
+                    patch.putpalette(frame.getpalette())
+                    writer.write(patch, duration, offset=offset, transparency=transparency, disposal=1)
+                previous = indices
+
     def convert_video_to_gif(self, video_path: str, output_path: str,
                            target_size_mb: float = 3.0, quality: int = 80,
                            start_time: float = 0, duration: float = None,
                            fps: float = None) -> str:
         """Convert MP4/video to optimized GIF"""
+        params = {'target_size_mb': target_size_mb, 'quality': quality, 'start_time': start_time,
+                  'duration': duration, 'fps': fps, 'ffmpeg': self.ffmpeg_available}
+        self.last_report = None
+        self.render_cache.run(
+            'video-gif', self.ENGINE_VERSION, [video_path], params, [output_path],
+            lambda: self._convert_video_to_gif(video_path, output_path, target_size_mb, quality,
+                                               start_time, duration, fps)
+        )
+        return output_path
+
+    def _convert_video_to_gif(self, video_path: str, output_path: str, target_size_mb: float,
+                              quality: int, start_time: float, duration: Optional[float],
+                              fps: Optional[float]) -> str:
+        """Convert with ffmpeg when available, imageio otherwise"""
         try:
             # Get video info
             video_info = self._get_video_info(video_path)
@@ -231,34 +590,45 @@ class GIFOptimizer:
                 video_fps = 100 / video_duration  # Limit to 100 frames max
                 frame_count = 100
 
-            # Calculate target dimensions
-            target_width, target_height = self._calculate_target_dimensions(
-                video_info['width'], video_info['height'], int(target_size_mb), frame_count
-            )
-
             # Use ffmpeg if available for better quality
-            if self.ffmpeg_available:
-                return self._convert_video_ffmpeg(
-                    video_path, output_path, target_width, target_height,
-                    video_fps, start_time, video_duration, quality
-                )
-            else:
+            if not self.ffmpeg_available:
                 return self._convert_video_imageio(video_path, output_path, target_size_mb)
 
+            source_size = (video_info['width'], video_info['height'])
+
+            def estimate(settings: GIFSettings) -> float:
+                # LZW codes shrink with the palette's bit depth
+                width, height = self._scaled_size(source_size, settings.scale)
+                depth = math.log2(settings.colors) / 8
+                return self.BYTES_PER_PIXEL * depth * width * height * frame_count / settings.step
+
+            def encode(settings: GIFSettings, path: str) -> int:
+                width, height = self._scaled_size(source_size, settings.scale)
+                self._convert_video_ffmpeg(video_path, path, width, height, video_fps / settings.step,
+                                           start_time, video_duration, quality, settings.colors)
+                return os.path.getsize(path)
+
+            self.last_report = self._fit_size(output_path, int(target_size_mb * MB), encode,
+                                              source_size, estimate)
+            return output_path
+
         except Exception as e:
             raise ValueError(f"Video to GIF conversion failed: {e}")
 
     def _convert_video_ffmpeg(self, video_path: str, output_path: str,
                              width: int, height: int, fps: float,
-                             start_time: float, duration: float, quality: int) -> str:
-        """Convert video using ffmpeg"""
+                             start_time: float, duration: float, quality: int,
+                             colors: int = 256) -> str:
+        """Convert video using ffmpeg, with a palette of at most colors entries"""
         try:
             cmd = [
                 'ffmpeg', '-i', video_path, '-y',
                 '-ss', str(start_time),
                 '-t', str(duration),
-                '-vf', f'fps={fps},scale={width}:{height}:flags=lanczos',
+                '-vf', (f'fps={fps},scale={width}:{height}:flags=lanczos,split[a][b];'
+                        f'[a]palettegen=max_colors={colors}[p];[b][p]paletteuse'),
                 '-q:v', str(100 - quality),  # Convert quality to ffmpeg scale
+                '-f', 'gif',
                 output_path
             ]
 
@@ -274,74 +644,55 @@ class GIFOptimizer:
 
     def _convert_video_imageio(self, video_path: str, output_path: str,
                               target_size_mb: float) -> str:
-        """Convert video using imageio (fallback)"""
+        """Convert video using imageio (fallback), streaming frames into the GIF"""
         try:
-            # Extract frames
-            frames = self._extract_frames_imageio(video_path)
-
-            if not frames:
-                raise ValueError("Could not extract frames from video")
-
             # Limit frame count for size
-            max_frames = min(len(frames), 50)
-            frames = frames[:max_frames]
-
-            # Convert to PIL Images and resize
-            pil_frames = []
-            first_frame = Image.fromarray(frames[0])
-
-            # Calculate target size
-            target_width, target_height = self._calculate_target_dimensions(
-                first_frame.width, first_frame.height, int(target_size_mb), len(frames)
-            )
-
-            for frame_array in frames:
-                pil_frame = Image.fromarray(frame_array)
-                resized = pil_frame.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                pil_frames.append(resized)
-
-            # Save as GIF
-            if pil_frames:
-                pil_frames[0].save(
-                    output_path,
-                    save_all=True,
-                    append_images=pil_frames[1:],
-                    duration=200,  # 5fps
-                    loop=0,
-                    optimize=True
-                )
-
+            runs, plan = self._sample_frames(lambda: self._video_frames(video_path, self.MAX_FRAMES))
+            if not runs:
+                raise ValueError("Could not extract frames from video")
+            source_size = runs[0][0].size
+            palettes = self._global_palettes(runs)
+
+            def encode(settings: GIFSettings, path: str) -> int:
+                self._encode_frames(path, self._decode_video_frames(video_path, self.MAX_FRAMES,
+                                                                    settings.step, plan),
+                                    self._scaled_size(source_size, settings.scale), settings.colors, palettes)
+                return os.path.getsize(path)
+
+            self.last_report = self._fit_size(output_path, int(target_size_mb * MB), encode, source_size,
+                                              self._sample_estimator(runs, source_size, plan.frame_count,
+                                                                     palettes))
             return output_path
 
         except Exception as e:
             raise ValueError(f"ImageIO conversion failed: {e}")
 
+    def _load_first_frame(self, media_path: str, max_edge: int) -> Image.Image:
+        """Decode the first frame of a GIF or video"""
+        if media_path.lower().endswith('.gif'):
+            # Get first frame of GIF
+            with Image.open(media_path) as gif:
+                return gif.convert('RGBA')
+
+        # Try to extract first frame of video
+        if self.ffmpeg_available:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                frames = self._extract_frames_ffmpeg(media_path, temp_dir, max_frames=1)
+                if frames:
+                    with Image.open(frames[0]) as frame:
+                        return frame.copy()
+        else:
+            # Use imageio, reading only the first frame
+            for frame, _ in self._decode_video_frames(media_path, 1):
+                return frame
+        raise ValueError(f"No frames found in {media_path}")
+
     def get_preview_frame(self, media_path: str, preview_size: Tuple[int, int]) -> Optional[bytes]:
-        """Get preview frame from GIF or video"""
+        """Get preview frame from GIF or video (cached as a thumbnail per file)"""
         try:
-            if media_path.lower().endswith('.gif'):
-                # Get first frame of GIF
-                gif = Image.open(media_path)
-                first_frame = gif.copy()
-            else:
-                # Try to extract first frame of video
-                if self.ffmpeg_available:
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        frames = self._extract_frames_ffmpeg(media_path, temp_dir, max_frames=1)
-                        if frames:
-                            first_frame = Image.open(frames[0])
-                        else:
-                            return None
-                else:
-                    # Use imageio
-                    frames = self._extract_frames_imageio(media_path)
-                    if frames:
-                        first_frame = Image.fromarray(frames[0])
-                    else:
-                        return None
-
-            # Scale for preview
-            first_frame.thumbnail(preview_size, Image.Resampling.LANCZOS)
+            first_frame = self.thumbnails.thumbnail(media_path, preview_size, self._load_first_frame)
+            if first_frame is None:
+                return None
 
             # Convert to bytes
             bio = io.BytesIO()
@@ -0,0 +1,147 @@
+"""
+GIF Palette Module
+One palette for a whole animation, built with NumPy from sampled frames and applied through a 5-bit RGB lookup table
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+BITS = 5                    # per channel in the histogram and the lookup table
+LEVELS = 1 << BITS
+SHIFT = 8 - BITS
+KMEANS_ITERATIONS = 8
+LUT_CHUNK = 4096            # lookup table cells per distance block
+
+# Alpha below this is treated as fully transparent
+ALPHA_THRESHOLD = 128
+
+
+def _cell_index(rgb: np.ndarray) -> np.ndarray:
+    """5-bit RGB cell of every pixel in an (..., 3) uint8 array"""
+    cells = rgb >> SHIFT
+    return ((cells[..., 0].astype(np.int32) << (2 * BITS))
+            | (cells[..., 1].astype(np.int32) << BITS)
+            | cells[..., 2].astype(np.int32))
+
+
+def _cell_centers() -> np.ndarray:
+    """RGB center of each of the LEVELS**3 cells, as float32 (cells, 3)"""
+    grid = (np.arange(LEVELS, dtype=np.float32) * (1 << SHIFT)) + (1 << SHIFT) / 2
+    r, g, b = np.meshgrid(grid, grid, grid, indexing='ij')
+    return np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+
+def color_histogram(frames: Iterable[Image.Image]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pixel count and mean RGB of every 5-bit cell over frames (opaque pixels only).
+    Means keep exact colors exact, where cell centres would shift them.
+    """
+    counts = np.zeros(LEVELS ** 3, dtype=np.int64)
+    sums = np.zeros((LEVELS ** 3, 3), dtype=np.float64)
+    for frame in frames:
+        pixels = np.asarray(frame.convert('RGBA') if frame.mode not in ('RGB', 'RGBA') else frame)
+        rgb = pixels[..., :3]
+        if pixels.shape[-1] == 4:
+            rgb = rgb[pixels[..., 3] >= ALPHA_THRESHOLD]
+        rgb = rgb.reshape(-1, 3)
+        cells = _cell_index(rgb)
+        counts += np.bincount(cells, minlength=LEVELS ** 3)
+        for channel in range(3):
+            sums[:, channel] += np.bincount(cells, weights=rgb[:, channel], minlength=LEVELS ** 3)
+    means = sums / np.maximum(counts, 1)[:, None]
+    return counts, means
+
+
+def kmeans_palette(counts: np.ndarray, means: np.ndarray, colors: int,
+                   iterations: int = KMEANS_ITERATIONS) -> np.ndarray:
+    """
+    Weighted k-means over the occupied histogram cells. Seeds are picked
+    greedily (the cell with the largest count * squared distance to the
+    nearest seed), which is deterministic and spreads seeds over rare but
+    distinct colors like UI accents. Returns a (n <= colors, 3) uint8 palette.
+    """
+    occupied = np.flatnonzero(counts)
+    if len(occupied) == 0:
+        return np.zeros((1, 3), dtype=np.uint8)
+    points = means[occupied].astype(np.float32)
+    weights = counts[occupied].astype(np.float64)
+    if len(occupied) <= colors:
+        return np.clip(np.rint(points), 0, 255).astype(np.uint8)
+
+    seeds = [int(weights.argmax())]
+    nearest = ((points - points[seeds[0]]) ** 2).sum(axis=1)
+    for _ in range(colors - 1):
+        seed = int((weights * nearest).argmax())
+        seeds.append(seed)
+        nearest = np.minimum(nearest, ((points - points[seed]) ** 2).sum(axis=1))
+    centers = points[seeds].copy()
+
+    for _ in range(iterations):
+        labels = _nearest(points, centers)
+        sums = np.zeros_like(centers, dtype=np.float64)
+        np.add.at(sums, labels, points * weights[:, None])
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        used = totals > 0
+        centers[used] = (sums[used] / totals[used, None]).astype(np.float32)
+
+    return np.clip(np.rint(centers), 0, 255).astype(np.uint8)
+
+
+def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Index of the nearest center for every point, in blocks to bound memory"""
+    centers = centers.astype(np.float32)
+    center_norms = (centers ** 2).sum(axis=1)
+    labels = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), LUT_CHUNK):
+        block = points[start:start + LUT_CHUNK].astype(np.float32)
+        # |p - c|^2 = |p|^2 - 2 p.c + |c|^2; |p|^2 does not change the argmin
+        distances = center_norms[None, :] - 2.0 * block @ centers.T
+        labels[start:start + LUT_CHUNK] = distances.argmin(axis=1)
+    return labels
+
+
+class GlobalPalette:
+    """
+    A palette shared by every frame of an animation.
+
+    Frames are mapped through a lookup table from each 5-bit RGB cell to its
+    nearest palette entry, so quantizing a frame is one gather. When
+    transparent is set, the last index is reserved for transparent pixels
+    (of RGBA frames, or of delta frames; has_alpha tells which).
+    """
+
+    def __init__(self, colors: np.ndarray, transparent: bool = False, has_alpha: bool = False):
+        self.colors = colors
+        self.has_alpha = has_alpha
+        self.transparency: Optional[int] = len(colors) if transparent or has_alpha else None
+        self.lut = _nearest(_cell_centers(), colors).astype(np.uint8)
+        entries = np.vstack([colors, np.zeros((1, 3), dtype=np.uint8)]) if self.transparency is not None else colors
+        self.palette = entries.astype(np.uint8).ravel().tolist()
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[Image.Image], colors: int = 256,
+                    reserve_transparent: bool = False) -> 'GlobalPalette':
+        """
+        Palette of at most colors entries, one of them transparent if any frame
+        has alpha or reserve_transparent is set
+        """
+        frames = list(frames)
+        has_alpha = any(frame.mode == 'RGBA' for frame in frames)
+        transparent = has_alpha or reserve_transparent
+        counts, means = color_histogram(frames)
+        return cls(kmeans_palette(counts, means, colors - 1 if transparent else colors),
+                   transparent, has_alpha)
+
+    def quantize(self, frame: Image.Image) -> Image.Image:
+        """Map an RGB or RGBA frame onto the palette"""
+        pixels = np.asarray(frame if frame.mode in ('RGB', 'RGBA') else frame.convert('RGB'))
+        indices = self.lut[_cell_index(pixels[..., :3])]
+        if self.transparency is not None and pixels.shape[-1] == 4:
+            indices[pixels[..., 3] < ALPHA_THRESHOLD] = self.transparency
+        paletted = Image.fromarray(indices, 'P')
+        paletted.putpalette(self.palette)
+        return paletted
@@ -0,0 +1,184 @@
+"""
+GIF Size Targeting Module
+Closed-loop search for GIF encode settings that land within a tolerance of a byte target
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+MB = 1024 * 1024
+
+# Quality rungs tried in order, (palette colors, frame step multiplier):
+# scale is searched within each rung, colors and fps only drop when scale alone gets too small
+LADDER: Tuple[Tuple[int, int], ...] = ((256, 1), (128, 1), (128, 2), (64, 2), (64, 3), (32, 4))
+
+# A rung is accepted once the scale it needs is at least this
+PREFERRED_MIN_SCALE = 0.5
+
+BISECT_STEPS = 7
+
+# Full-encode bisection stops once the scale bracket is this narrow
+MIN_SCALE_STEP = 0.02
+
+
+@dataclass(frozen=True)
+class GIFSettings:
+    scale: float
+    colors: int
+    step: int
+
+    def describe(self) -> str:
+        return f"scale {self.scale:.2f}, {self.colors} colors, every {self.step} frame(s)"
+
+
+@dataclass
+class SizeReport:
+    target_bytes: int
+    size: int
+    passes: int
+    settings: GIFSettings
+    tolerance: float
+
+    @property
+    def ratio(self) -> float:
+        return self.size / self.target_bytes if self.target_bytes else math.inf
+
+    @property
+    def within_tolerance(self) -> bool:
+        return 1.0 - self.tolerance <= self.ratio <= 1.0
+
+    def summary(self) -> str:
+        return (f"{self.size / MB:.2f} MB, {self.ratio:.2f}x target after "
+                f"{self.passes} encode pass{'es' if self.passes != 1 else ''} ({self.settings.describe()})")
+
+
+# settings -> predicted bytes
+Estimator = Callable[[GIFSettings], float]
+# (settings, path) -> bytes written
+Encoder = Callable[[GIFSettings, str], int]
+
+
+def _best_scale(estimate: Estimator, goal: float, colors: int, step: int, min_scale: float) -> float:
+    """Largest scale in [min_scale, 1] whose estimate is at most goal, by bisection"""
+    if estimate(GIFSettings(1.0, colors, step)) <= goal:
+        return 1.0
+    lo, hi = min_scale, 1.0
+    if estimate(GIFSettings(lo, colors, step)) > goal:
+        return lo
+    for _ in range(BISECT_STEPS):
+        mid = (lo + hi) / 2
+        if estimate(GIFSettings(mid, colors, step)) <= goal:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def plan_settings(estimate: Estimator, goal: float, max_colors: int = 256, base_step: int = 1,
+                  min_scale: float = 0.1) -> GIFSettings:
+    """Highest-quality settings whose estimated size is at most goal"""
+    min_scale = min(1.0, min_scale)
+    rungs: List[Tuple[int, int]] = []
+    for colors, step in LADDER:
+        rung = (min(colors, max_colors), step * base_step)
+        if rung not in rungs:
+            rungs.append(rung)
+
+    best: Optional[GIFSettings] = None
+    for colors, step in rungs:
+        scale = _best_scale(estimate, goal, colors, step, min_scale)
+        settings = GIFSettings(scale, colors, step)
+        if estimate(settings) > goal:
+            continue
+        if scale >= PREFERRED_MIN_SCALE:
+            return settings
+        if best is None or scale > best.scale:
+            best = settings
+    # Nothing is predicted to fit: fall back to the smallest settings
+    return best or GIFSettings(min_scale, *rungs[-1])
+
+
+def _refine(settings: GIFSettings, sizes: Dict[GIFSettings, int], target_bytes: int,
+            min_scale: float) -> Optional[GIFSettings]:
+    """
+    Next scale to try by bisecting real encode sizes of settings' rung, for when
+    the estimator cannot tell nearby scales apart. None once the bracket is closed.
+    """
+    rung = [(s.scale, size) for s, size in sizes.items()
+            if (s.colors, s.step) == (settings.colors, settings.step)]
+    lo = max((scale for scale, size in rung if size <= target_bytes), default=min_scale)
+    hi = min((scale for scale, size in rung if size > target_bytes and scale > lo), default=1.0)
+    if hi - lo < MIN_SCALE_STEP:
+        return None
+    candidate = GIFSettings((lo + hi) / 2, settings.colors, settings.step)
+    return None if candidate in sizes else candidate
+
+
+def fit_size(output_path: str, target_bytes: int, estimate: Estimator, encode: Encoder,
+             max_colors: int = 256, base_step: int = 1, min_scale: float = 0.1,
+             tolerance: float = 0.1, max_passes: int = 4) -> SizeReport:
+    """
+    Encode to output_path as close under target_bytes as possible.
+
+    Settings are planned on the cheap estimator, then verified with a full
+    encode. Each full encode corrects the estimator by the observed
+    actual/estimated ratio and the plan is repeated, until the output is
+    within tolerance below the target, cannot get any closer, or max_passes
+    full encodes have run. The best encode is kept: the largest under the
+    target, or else the smallest.
+    """
+    correction = 1.0
+    estimates: Dict[GIFSettings, float] = {}
+
+    def corrected(settings: GIFSettings) -> float:
+        if settings not in estimates:
+            estimates[settings] = estimate(settings)
+        return estimates[settings] * correction
+
+    top = GIFSettings(1.0, max_colors, base_step)
+    goal = target_bytes * (1.0 - tolerance / 2)  # aim at the middle of the tolerance band
+    best: Optional[Tuple[int, GIFSettings, str]] = None
+    sizes: Dict[GIFSettings, int] = {}
+    passes = 0
+
+    try:
+        while passes < max_passes:
+            settings = plan_settings(corrected, goal, max_colors, base_step, min_scale)
+            if settings in sizes:
+                # The corrected plan no longer moves: bisect on real encodes instead
+                settings = _refine(settings, sizes, target_bytes, min(1.0, min_scale))
+                if settings is None:
+                    break
+            passes += 1
+            path = f"{output_path}.pass{passes}.tmp"
+            size = encode(settings, path)
+            sizes[settings] = size
+
+            better = (best is None
+                      or (size <= target_bytes and (best[0] > target_bytes or size > best[0]))
+                      or (size > target_bytes and best[0] > target_bytes and size < best[0]))
+            if better:
+                if best is not None:
+                    os.remove(best[2])
+                best = (size, settings, path)
+            else:
+                os.remove(path)
+
+            ratio = size / target_bytes if target_bytes else math.inf
+            if 1.0 - tolerance <= ratio <= 1.0 or (ratio <= 1.0 and settings == top):
+                break
+            correction = size / max(corrected(settings) / correction, 1.0)
+    except BaseException:
+        if best is not None and os.path.exists(best[2]):
+            os.remove(best[2])
+        raise
+
+    if best is None:
+        raise ValueError("No GIF encode produced")
+    size, settings, path = best
+    os.replace(path, output_path)
+    return SizeReport(target_bytes, size, passes, settings, tolerance)
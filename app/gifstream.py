@@ -0,0 +1,148 @@
+"""
+GIF Stream Module
+Writes animated GIFs frame by frame, so long animations never exist in memory as a whole
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from typing import BinaryIO, Optional, Tuple
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+GIF_TRAILER = b';'
+
+
+def _color_table(palette: bytes) -> Tuple[int, bytes]:
+    """(size field, table padded to a power of two entries) for an RGB palette"""
+    entries = max(2, len(palette) // 3)
+    bits = max(1, (entries - 1).bit_length())
+    return bits - 1, palette + b'\0' * (3 * (1 << bits) - len(palette))
+
+
+def _rgb_palette(frame: Image.Image) -> bytes:
+    return bytes(frame.getpalette('RGB') or b'')
+
+
+def frame_delta(previous: np.ndarray, current: np.ndarray,
+                transparency: int) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Palette indices to draw over previous to get current: the bounding box of
+    changed pixels, with unchanged pixels inside it set to transparency, and
+    its (x, y) offset. Identical frames give a single transparent pixel.
+    """
+    changed = previous != current
+    rows = np.flatnonzero(changed.any(axis=1))
+    if len(rows) == 0:
+        return np.full((1, 1), transparency, dtype=np.uint8), (0, 0)
+    cols = np.flatnonzero(changed.any(axis=0))
+    top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+    region = current[top:bottom, left:right].copy()
+    region[~changed[top:bottom, left:right]] = transparency
+    return region, (int(left), int(top))
+
+
+class GIFStreamWriter:
+    """
+    Streams palette ('P') frames to an animated GIF as they are produced.
+    Memory use is one frame, not the whole animation.
+
+    The first frame sets the canvas size and the global color table; later
+    frames whose palette differs carry their own local color table.
+
+    Usage:
+        with GIFStreamWriter(path) as writer:
+            for frame, duration in frames:
+                writer.write(frame, duration)
+    """
+
+    def __init__(self, path: str | os.PathLike | BinaryIO, loop: int = 0):
+        self.loop = loop
+        self.size: Optional[Tuple[int, int]] = None
+        self.frames_written = 0
+        self._global_palette: Optional[bytes] = None
+        # File objects (e.g. BytesIO for size estimates) are written to but left open
+        self._owns_fp = not hasattr(path, 'write')
+        self._fp: Optional[BinaryIO] = open(path, 'wb') if self._owns_fp else path
+
+    def write(self, frame: Image.Image, duration: int, offset: Tuple[int, int] = (0, 0),
+              transparency: Optional[int] = None, disposal: int = 0) -> None:
+        """
+        Append a frame shown for duration ms, drawn at offset on the canvas.
+        transparency is the palette index left see-through; disposal is the
+        GIF disposal method applied before the next frame.
+        """
+        if self._fp is None:
+            raise ValueError("GIF stream is closed")
+        if frame.mode != 'P':
+            raise ValueError(f"GIF frames must be palette images, not {frame.mode}")
+
+        palette = _rgb_palette(frame)
+        if self.size is None:
+            if offset != (0, 0):
+                raise ValueError("The first GIF frame must cover the canvas")
+            self.size = frame.size
+            self._global_palette = palette
+            self._write_header(palette)
+        elif offset[0] + frame.width > self.size[0] or offset[1] + frame.height > self.size[1]:
+            raise ValueError(f"Frame at {offset} of size {frame.size} exceeds canvas {self.size}")
+
+        if frame.palette.mode != 'RGB':
+            frame = frame.copy()
+            frame.putpalette(palette, 'RGB')
+
+        params = {'duration': duration, 'disposal': disposal,
+                  'include_color_table': palette != self._global_palette}
+        if transparency is not None:
+            params['transparency'] = transparency
+        for data in GifImagePlugin.getdata(frame, offset, **params):
+            self._fp.write(data)
+        self.frames_written += 1
+
+    def close(self) -> None:
+        """Write the trailer"""
+        if self._fp is None:
+            return
+        if not self.frames_written:
+            self.discard()
+            raise ValueError("No frames written to GIF")
+        try:
+            self._fp.write(GIF_TRAILER)
+        finally:
+            if self._owns_fp:
+                self._fp.close()
+            self._fp = None
+
+    def discard(self) -> None:
+        """Abandon the animation and remove the partial file"""
+        if self._fp is None:
+            return
+        fp, self._fp = self._fp, None
+        if not self._owns_fp:
+            return
+        path = fp.name
+        fp.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _write_header(self, palette: bytes) -> None:
+        size_field, table = _color_table(palette)
+        self._fp.write(b'GIF89a' + struct.pack('<HHBBB', self.size[0], self.size[1],
+                                               0x80 | size_field, 0, 0))
+        self._fp.write(table)
+        if self.loop is not None:
+            self._fp.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', self.loop) + b'\0')
+
+    def __enter__(self) -> 'GIFStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
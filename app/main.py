@@ -9,6 +9,7 @@ import threading
 import argparse
 import inspect
 import csv
+import multiprocessing
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
@@ -18,12 +19,17 @@ try:
 except Exception:
     sg = None
 
+from .batch import CompletionJournal, cover_params_from_row, render_cover_tasks, resolve_jobs
 from .covers import CoverGenerator
-from .collage import ScreenshotCollage
+from .dedupe import DEFAULT_THRESHOLD, find_duplicates
+from .collage import CollageSpec, ScreenshotCollage
 from .gifopt import GIFOptimizer
+from .matrix import plan_matrix, render_matrix
 from .packager import ZipPackager
 from .presets import PresetManager
-from .utils import validate_image, get_asset_path, show_error
+from .rendercache import RenderCache
+from .thumbcache import get_thumbnail_cache
+from .utils import probe_media, get_asset_path, show_error
 
 # Application constants
 APP_VERSION = "1.0.0"
@@ -32,17 +38,19 @@ CONFIG_FILE = "config.json"
 PREVIEW_SIZE = (400, 320)
 
 class ItchPageWizard:
-    def __init__(self, gui_mode: bool = True):
+    def __init__(self, gui_mode: bool = True, use_cache: bool = True):
         self.config = self.load_config()
-        self.cover_gen = CoverGenerator()
-        self.collage_gen = ScreenshotCollage()
-        self.gif_opt = GIFOptimizer()
+        self.render_cache = RenderCache(enabled=use_cache)
+        self.cover_gen = CoverGenerator(render_cache=self.render_cache)
+        self.collage_gen = ScreenshotCollage(render_cache=self.render_cache)
+        self.gif_opt = GIFOptimizer(render_cache=self.render_cache)
         self.packager = ZipPackager()
         self.preset_manager = PresetManager()
 
         # GUI state
         self.current_preview = None
         self.selected_images = []
+        self.selected_media = {}  # path -> MediaInfo probed when the image was added
         self.window = None
 
         if gui_mode and sg:
@@ -94,7 +102,7 @@ class ItchPageWizard:
 
             [sg.HSeparator()],
             [sg.Text("COVER OPTIONS", font=('Arial', 10, 'bold'), key='-COVER_LABEL-')],
-            [sg.Text("Background:"), sg.Combo(['Solid Color', 'Gradient', 'Image Blur'],
+            [sg.Text("Background:"), sg.Combo(['Solid Color', 'Gradient', 'Radial Gradient', 'Image Blur'],
                                               default_value='Solid Color', key='-BG_TYPE-', enable_events=True)],
             [sg.Text("Color:"), sg.ColorChooserButton("Choose", key='-BG_COLOR-', button_color=('#FFFFFF', '#000000'))],
             [sg.Text("Font:"), sg.Combo(['Arial', 'Helvetica', 'Times New Roman', 'Impact'],
@@ -262,8 +270,10 @@ class ItchPageWizard:
         """Handle dropped files"""
         valid_images = []
         for file_path in files:
-            if validate_image(file_path):
+            info = probe_media(file_path)
+            if info is not None:
                 valid_images.append(file_path)
+                self.selected_media[file_path] = info
             else:
                 self.log(f"Invalid image: {file_path}")
 
@@ -326,7 +336,8 @@ class ItchPageWizard:
                     image_paths=self.selected_images,
                     output_path=output_path,
                     layout=values['-LAYOUT-'],
-                    gutter=int(values['-GUTTER-'])
+                    gutter=int(values['-GUTTER-']),
+                    infos=[self.selected_media.get(path) for path in self.selected_images]
                 )
 
                 self.window['-PROGRESS-'].update(100)
@@ -370,6 +381,8 @@ class ItchPageWizard:
                 self.window['-PROGRESS-'].update(100)
                 self.window['-STATUS-'].update("GIF optimized!", text_color='green')
                 self.log(f"GIF saved: {output_path}")
+                if self.gif_opt.last_report is not None:
+                    self.log(f"GIF size: {self.gif_opt.last_report.summary()}")
 
             except Exception as e:
                 self.window['-STATUS-'].update("Export failed", text_color='red')
@@ -420,6 +433,22 @@ class ItchPageWizard:
                     **filtered_config
                 )
                 print(f"Cover generated: {output_path}")
+
+                if cover_config.get('derivatives'):
+                    cover_data = {
+                        'title': project_info.get('title', 'Untitled'),
+                        'studio': project_info.get('studio', ''),
+                        'version': project_info.get('version', ''),
+                        **filtered_config
+                    }
+                    derivative_paths = self.cover_gen.generate_cover_derivatives(
+                        cover_data,
+                        sizes=cover_config['derivatives'],
+                        output_dir=output_dir,
+                        filename_stem=cover_config.get('filename_stem', 'cover'),
+                        include_metadata=cover_config.get('include_metadata', True)
+                    )
+                    print(f"Cover derivatives generated: {', '.join(derivative_paths)}")
             except Exception as e:
                 print(f"Failed to generate cover: {e}")
 
@@ -469,13 +498,21 @@ class ItchPageWizard:
                         duration=gif_config.get('duration')
                     )
                 print(f"GIF optimized: {output_path}")
+                if self.gif_opt.last_report is not None:
+                    print(f"  Size: {self.gif_opt.last_report.summary()}")
             except Exception as e:
                 print(f"Failed to optimize GIF: {e}")
 
+        if self.render_cache.enabled:
+            print(f"Render cache: {self.render_cache.hits} hits, {self.render_cache.misses} misses")
         print("Batch processing finished.")
 
-    def run_batch_covers(self, csv_path: str):
-        """Run batch cover generation from a CSV file."""
+    def run_batch_covers(self, csv_path: str, jobs: int = 1, incremental: bool = False):
+        """
+        Run batch cover generation from a CSV file.
+        jobs > 1 renders rows on a process pool; incremental skips rows whose
+        journaled outputs are still up to date.
+        """
         print(f"Starting batch cover generation from: {csv_path}")
 
         if not os.path.exists(csv_path):
@@ -486,6 +523,18 @@ class ItchPageWizard:
         os.makedirs(output_dir, exist_ok=True)
         print(f"Output directory: {output_dir}")
 
+        jobs = resolve_jobs(jobs)
+        if jobs > 1:
+            print(f"Rendering with {jobs} worker processes")
+
+        def report(result):
+            if result.skipped:
+                print(f"Skipping row {result.index + 1}: {result.title} (up to date)")
+                return
+            print(f"Processing row {result.index + 1}: {result.title}")
+            if result.error:
+                print(f"  -> Failed to generate cover for row {result.index + 1}: {result.error}")
+
         try:
             with open(csv_path, 'r', newline='', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
@@ -494,48 +543,90 @@ class ItchPageWizard:
                     print(f"Error: CSV must contain the following headers: {required_headers}")
                     return
 
-                sig = inspect.signature(self.cover_gen.generate_cover)
-                allowed_keys = {p.name for p in sig.parameters.values()}
-
-                for i, row in enumerate(reader):
-                    print(f"Processing row {i+1}: {row.get('title')}")
-                    try:
-                        cover_params = {k: v for k, v in row.items() if k in allowed_keys and v}
-
-                        if 'bold' in cover_params:
-                            cover_params['bold'] = cover_params['bold'].upper() == 'TRUE'
-                        if 'shadow' in cover_params:
-                            cover_params['shadow'] = cover_params['shadow'].upper() == 'TRUE'
-
-                        title = row.get('title', f'cover_{i+1}')
-                        sanitized_title = "".join(c for c in title if c.isalnum() or c in (' ', '_')).rstrip()
-                        sanitized_title = sanitized_title.replace(' ', '_')
-                        filename_stem = f"{sanitized_title}_630x500"
-                        cover_params['filename_stem'] = filename_stem
-
-                        self.cover_gen.generate_cover(
-                            output_dir=output_dir,
-                            **cover_params
-                        )
-                    except Exception as e:
-                        print(f"  -> Failed to generate cover for row {i+1}: {e}")
+                tasks = (
+                    (i, row.get('title'), cover_params_from_row(row, i), output_dir)
+                    for i, row in enumerate(reader)
+                )
+                journal = CompletionJournal(output_dir) if incremental else None
+                try:
+                    stats = render_cover_tasks(tasks, jobs=jobs, generator=self.cover_gen,
+                                               on_result=report, journal=journal)
+                finally:
+                    if journal is not None:
+                        journal.close()
             print("Batch cover generation finished.")
+            print(f"Throughput: {stats.summary()}")
         except Exception as e:
             print(f"An error occurred while processing the CSV file: {e}")
 
-    def run_batch_collage(self, folder_path: str, layout: str, gutter: int):
-        """Run batch collage generation from a folder of images."""
+    def run_batch_matrix(self, csv_path: str, preset_names: Optional[list] = None,
+                         presets_file: Optional[str] = None):
+        """Render every preset against every CSV row (title, studio, version, logo_path)."""
+        print(f"Starting variant matrix from: {csv_path}")
+
+        if not os.path.exists(csv_path):
+            print(f"Error: CSV file not found at {csv_path}")
+            return
+
+        try:
+            if presets_file:
+                self.preset_manager.load_presets(presets_file)
+            names = preset_names or list(self.preset_manager.list_presets())
+            presets = {name: self.preset_manager.cover_options(name) for name in names}
+        except KeyError as e:
+            print(f"Error: Unknown preset {e}")
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not load presets: {e}")
+            return
+
+        output_dir = os.path.join(os.path.dirname(csv_path), 'matrix_output')
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Output directory: {output_dir}")
+
+        try:
+            with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                if 'title' not in (reader.fieldnames or []):
+                    print("Error: CSV must contain the following headers: ['title']")
+                    return
+                plan = plan_matrix(presets, reader, self.cover_gen.font_index)
+
+            print(f"Plan: {plan.summary()}")
+            result = render_matrix(self.cover_gen, plan, output_dir)
+            print("Variant matrix finished.")
+            print(f"Throughput: {result.summary()}")
+        except Exception as e:
+            print(f"An error occurred while rendering the variant matrix: {e}")
+
+    def run_batch_collage(self, folder_path: str, layout: str, gutter, workers: Optional[int] = None,
+                          max_width=ScreenshotCollage.MAX_WIDTH, dedupe_threshold: Optional[int] = None,
+                          max_kb: Optional[int] = None):
+        """
+        Run batch collage generation from a folder of images.
+        layout, gutter and max_width accept comma-separated lists; every
+        combination is rendered from a single decode of each image.
+        With dedupe_threshold, near-identical screenshots (dHash distance at
+        most that many bits) are dropped before layout.
+        With max_kb, each collage is encoded in the best format and quality
+        that fits that many kilobytes.
+        """
+        layouts = [l.strip() for l in str(layout).split(',') if l.strip()]
+        gutters = [int(g) for g in str(gutter).split(',') if g.strip()]
+        widths = [int(w) for w in str(max_width).split(',') if w.strip()]
+
         print(f"Starting batch collage generation for folder: {folder_path}")
-        print(f"Layout: {layout}, Gutter: {gutter}px")
+        print(f"Layout: {', '.join(layouts)}, Gutter: {', '.join(map(str, gutters))}px")
 
         if not os.path.isdir(folder_path):
             print(f"Error: Folder not found at {folder_path}")
             return
 
-        image_paths = sorted([
-            os.path.join(folder_path, f) for f in os.listdir(folder_path)
-            if validate_image(os.path.join(folder_path, f))
-        ])
+        # One header probe per file: the collages reuse these instead of probing again
+        infos = [info for info in (probe_media(os.path.join(folder_path, f))
+                                   for f in sorted(os.listdir(folder_path)))
+                 if info is not None]
+        image_paths = [info.path for info in infos]
 
         if not image_paths:
             print("No valid images found in the specified folder.")
@@ -543,20 +634,38 @@ class ItchPageWizard:
 
         print(f"Found {len(image_paths)} valid images.")
 
+        if dedupe_threshold is not None:
+            report = find_duplicates(image_paths, dedupe_threshold)
+            print(report.summary())
+            for line in report.lines():
+                print(line)
+            image_paths = report.kept
+            by_path = {info.path: info for info in infos}
+            infos = [by_path[path] for path in image_paths]
+
         output_dir = os.path.join(folder_path, 'collage_output')
         os.makedirs(output_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"collage_{layout}_{timestamp}.png"
-        output_path = os.path.join(output_dir, output_filename)
+
+        specs = []
+        for layout_name in layouts:
+            for gutter_px in gutters:
+                for width in widths:
+                    if len(layouts) * len(gutters) * len(widths) == 1:
+                        output_filename = f"collage_{layout_name}_{timestamp}.png"
+                    else:
+                        output_filename = f"collage_{layout_name}_g{gutter_px}_w{width}_{timestamp}.png"
+                    specs.append(CollageSpec(os.path.join(output_dir, output_filename),
+                                             layout_name, gutter_px, width,
+                                             max_kb * 1024 if max_kb else None))
 
         try:
-            self.collage_gen.create_collage(
-                image_paths=image_paths,
-                output_path=output_path,
-                layout=layout,
-                gutter=gutter
-            )
-            print(f"Collage created successfully: {output_path}")
+            output_paths = self.collage_gen.create_collages(image_paths, specs, workers=workers, infos=infos)
+            for output_path in output_paths:
+                print(f"Collage created successfully: {output_path}")
+                choice = self.collage_gen.encodings.get(output_path)
+                if choice is not None:
+                    print(f"  Encoding: {choice.describe()}")
         except Exception as e:
             print(f"Failed to create collage: {e}")
 
@@ -641,30 +750,59 @@ class ItchPageWizard:
 
 def main():
     """Application entry point"""
+    multiprocessing.freeze_support()  # PyInstaller builds spawn pool workers from the executable
     parser = argparse.ArgumentParser(description="ItchPage Wizard - itch.io asset generator.")
     parser.add_argument('--project', type=str, help='Path to project.json file for batch processing.')
     parser.add_argument('--batch', action='store_true', help='Run in project batch mode (requires --project).')
     parser.add_argument('--csv-covers', type=str, help='Path to a CSV file for batch cover generation.')
     parser.add_argument('--collage-folder', type=str, help='Path to a folder of images for batch collage generation.')
-    parser.add_argument('--collage-layout', type=str, default='Grid', help='Layout for batch collage (Grid, Masonry, Linear).')
-    parser.add_argument('--collage-gutter', type=int, default=12, help='Gutter size for batch collage.')
+    parser.add_argument('--collage-layout', type=str, default='Grid', help='Layout for batch collage (Grid, Masonry, Linear); comma-separate several to render each.')
+    parser.add_argument('--collage-gutter', type=str, default='12', help='Gutter size for batch collage; comma-separate several to render each.')
+    parser.add_argument('--collage-width', type=str, default=str(ScreenshotCollage.MAX_WIDTH), help='Collage width in pixels; comma-separate several to render each.')
+    parser.add_argument('--dedupe', type=int, nargs='?', const=DEFAULT_THRESHOLD, metavar='BITS',
+                        help=f'Drop near-duplicate screenshots from batch collages (dHash distance <= BITS, default {DEFAULT_THRESHOLD}).')
+    parser.add_argument('--collage-max-kb', type=int, help='Byte budget per collage in KB; picks the best format and quality (PNG, palette PNG, WebP, JPEG) that fits.')
+    parser.add_argument('--collage-workers', type=int, help='Threads decoding and resizing collage tiles (0 = one per CPU core; default: up to 8).')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker processes for CSV cover rendering (0 = one per CPU core).')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the render cache: always re-render and do not store outputs.')
+    parser.add_argument('--prune-cache', type=float, metavar='MB', help='Shrink the render cache and the thumbnail cache to at most MB megabytes each (0 clears them).')
+    parser.add_argument('--incremental', action='store_true', help='Skip CSV rows whose journaled outputs are up to date; only render new or changed rows.')
+    parser.add_argument('--matrix', type=str, metavar='CSV', help='Render every preset against every row of a CSV (title, studio, version, logo_path).')
+    parser.add_argument('--matrix-presets', type=str, help='Comma-separated preset names for --matrix (default: all presets).')
+    parser.add_argument('--presets-file', type=str, help='JSON file of additional presets ({"name": {"bg_color": ...}}).')
     args = parser.parse_args()
 
     is_batch_project_mode = args.batch and args.project
     is_batch_csv_mode = args.csv_covers is not None
     is_batch_collage_mode = args.collage_folder is not None
-    is_gui_mode = not (is_batch_project_mode or is_batch_csv_mode or is_batch_collage_mode)
+    is_batch_matrix_mode = args.matrix is not None
+    is_prune_mode = args.prune_cache is not None
+    is_gui_mode = not (is_batch_project_mode or is_batch_csv_mode or is_batch_collage_mode
+                       or is_batch_matrix_mode or is_prune_mode)
 
     try:
-        app = ItchPageWizard(gui_mode=is_gui_mode)
+        app = ItchPageWizard(gui_mode=is_gui_mode, use_cache=not args.no_cache)
+
+        if is_prune_mode:
+            max_bytes = int(args.prune_cache * 1024 * 1024)
+            removed, freed = app.render_cache.prune(max_bytes)
+            print(f"Render cache: removed {removed} files ({freed / (1024 * 1024):.1f} MB) from {app.render_cache.root}")
+            thumbnails = get_thumbnail_cache()
+            removed, freed = thumbnails.prune(max_bytes)
+            print(f"Thumbnail cache: removed {removed} files ({freed / (1024 * 1024):.1f} MB) from {thumbnails.root}")
 
         if is_batch_project_mode:
             app.run_batch(args.project)
         elif is_batch_csv_mode:
-            app.run_batch_covers(args.csv_covers)
+            app.run_batch_covers(args.csv_covers, jobs=args.jobs, incremental=args.incremental)
         elif is_batch_collage_mode:
-            app.run_batch_collage(args.collage_folder, args.collage_layout, args.collage_gutter)
-        else:
+            app.run_batch_collage(args.collage_folder, args.collage_layout, args.collage_gutter,
+                                  resolve_jobs(args.collage_workers) if args.collage_workers is not None else None,
+                                  args.collage_width, args.dedupe, args.collage_max_kb)
+        elif is_batch_matrix_mode:
+            preset_names = [n.strip() for n in args.matrix_presets.split(',') if n.strip()] if args.matrix_presets else None
+            app.run_batch_matrix(args.matrix, preset_names, args.presets_file)
+        elif is_gui_mode:
             if sg is None:
                 raise RuntimeError("Cannot run in GUI mode: PySimpleGUI failed to import, likely due to a missing display.")
             app.run()
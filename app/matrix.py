@@ -0,0 +1,128 @@
+"""
+Variant Matrix Module
+Plans and renders every preset against every title row, sharing layers between variants
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .batch import safe_stem
+from .covers import CoverGenerator
+from .fonts import FontIndex
+from .utils import LRUCache
+
+# Columns taken from each row; everything else comes from the preset
+ROW_FIELDS = ('title', 'studio', 'version', 'logo_path')
+
+
+@dataclass
+class Variant:
+    preset: str
+    row: int
+    cover_data: Dict[str, Any]
+    filename_stem: str
+    layers: Dict[str, Tuple] = field(default_factory=dict)
+
+
+@dataclass
+class MatrixPlan:
+    variants: List[Variant] = field(default_factory=list)
+
+    def distinct_layers(self) -> Dict[str, int]:
+        """Number of distinct layers of each kind the plan needs"""
+        kinds: Dict[str, set] = {}
+        for variant in self.variants:
+            for kind, key in variant.layers.items():
+                kinds.setdefault(kind, set()).add(key)
+        return {kind: len(keys) for kind, keys in sorted(kinds.items())}
+
+    def summary(self) -> str:
+        layers = self.distinct_layers()
+        detail = ", ".join(f"{count} {kind}" for kind, count in layers.items())
+        return f"{len(self.variants)} variants from {sum(layers.values())} distinct layers ({detail})"
+
+
+@dataclass
+class MatrixResult:
+    paths: List[str]
+    layers_built: int
+    layers_reused: int
+    elapsed: float
+
+    def summary(self) -> str:
+        rate = len(self.paths) / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"{len(self.paths)} variants in {self.elapsed:.2f}s ({rate:.1f} variants/s); "
+            f"{self.layers_built} layers built, {self.layers_reused} reused"
+        )
+
+
+def _layer_keys(data: Dict[str, Any], font_index: FontIndex) -> Dict[str, Tuple]:
+    """Identity of each layer a cover is composited from (mirrors CoverGenerator._compose_cover)"""
+    font = data.get('font', 'Arial')
+    shadow = data.get('shadow', True)
+    background_type = data.get('background_type', 'Solid Color')
+    keys: Dict[str, Tuple] = {
+        'backgrounds': (
+            background_type, data.get('background_color', '#2c3e50'),
+            data.get('secondary_color', CoverGenerator.DEFAULT_SECONDARY_COLOR),
+            float(data.get('gradient_angle', 90.0)), tuple(data.get('gradient_colors') or ()),
+            data.get('logo_path') if background_type == 'Image Blur' else None,
+        ),
+    }
+    if data.get('title'):
+        keys['titles'] = (data['title'], font_index.resolve(font, data.get('bold', True)), shadow)
+    if data.get('studio'):
+        keys['studios'] = (data['studio'], font_index.resolve(font, False), shadow)
+    if data.get('version'):
+        keys['versions'] = (data['version'], font_index.resolve(font, False))
+    if data.get('logo_path'):
+        keys['logos'] = (data['logo_path'],)
+    return keys
+
+
+def plan_matrix(presets: Dict[str, Dict[str, Any]], rows: Iterable[Dict[str, str]],
+                font_index: FontIndex) -> MatrixPlan:
+    """
+    Cross every preset (generate_cover options) with every row (title, studio,
+    version, logo_path). Variants are ordered so those sharing a background,
+    and then a title raster, are rendered back to back.
+    """
+    rows = list(rows)
+    plan = MatrixPlan()
+    for name, options in presets.items():
+        for index, row in enumerate(rows):
+            data = {**options, **{k: row[k] for k in ROW_FIELDS if row.get(k)}}
+            title = data.get('title') or f'cover_{index + 1}'
+            plan.variants.append(Variant(
+                preset=name, row=index, cover_data=data,
+                filename_stem=f"{safe_stem(name)}_{safe_stem(title)}_630x500",
+                layers=_layer_keys(data, font_index),
+            ))
+
+    plan.variants.sort(key=lambda v: (repr(v.layers['backgrounds']), repr(v.layers.get('titles'))))
+    return plan
+
+
+def render_matrix(generator: CoverGenerator, plan: MatrixPlan, output_dir: str,
+                  export_png: bool = True, export_jpg: bool = False,
+                  include_metadata: bool = True,
+                  layer_cache: Optional[LRUCache] = None) -> MatrixResult:
+    """Render a planned matrix, compositing shared layers onto each variant"""
+    layers = layer_cache if layer_cache is not None else LRUCache(generator.VARIANT_LAYER_CACHE_SIZE)
+    hits, misses = layers.hits, layers.misses
+    start = time.perf_counter()
+    paths = generator.generate_variants(
+        ((v.filename_stem, v.cover_data) for v in plan.variants),
+        output_dir=output_dir, export_png=export_png, export_jpg=export_jpg,
+        include_metadata=include_metadata, layer_cache=layers,
+    )
+    return MatrixResult(
+        paths=paths,
+        layers_built=layers.misses - misses,
+        layers_reused=layers.hits - hits,
+        elapsed=time.perf_counter() - start,
+    )
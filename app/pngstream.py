@@ -0,0 +1,206 @@
+"""
+PNG Stream Module
+Writes PNG files band by band, so tall images never exist in memory as a whole
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+from PIL import Image
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PIL mode -> (PNG color type, bytes per pixel)
+COLOR_TYPES = {'RGB': (2, 3), 'RGBA': (6, 4)}
+
+
+def _chunk(fp: BinaryIO, tag: bytes, data: bytes) -> None:
+    fp.write(struct.pack('>I', len(data)))
+    fp.write(tag)
+    fp.write(data)
+    fp.write(struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+
+# Rows filtered at once; scratch memory is a few arrays of this many rows
+FILTER_CHUNK = 32
+
+
+class _RowFilter:
+    """
+    Per-row adaptive PNG filtering (None, Sub, Up, Average, Paeth) over fixed
+    chunks of FILTER_CHUNK rows, in scratch buffers allocated once per image.
+    Each row gets the filter with the smallest sum of absolute signed bytes,
+    the heuristic libpng uses. Candidates are scored one at a time, so memory
+    stays at a few chunks however tall the band.
+    """
+
+    def __init__(self, row_bytes: int, bpp: int, chunk: int = FILTER_CHUNK):
+        self.bpp, self.chunk = bpp, chunk
+        shape = (chunk, row_bytes)
+        # x: raw bytes, a: left, b: above, c: above-left, t/u/v: temporaries
+        self._x, self._a, self._b, self._c, self._t, self._u, self._v = (
+            np.zeros(shape, np.int16) for _ in range(7))
+        self._candidate = np.empty(shape, np.uint8)
+        self._out = np.empty((chunk, row_bytes + 1), np.uint8)
+        self._best = np.empty(chunk, np.int64)
+
+    def filter(self, rows: np.ndarray, prev: np.ndarray) -> Iterator[bytes]:
+        """
+        Filtered bytes of a (rows, row_bytes) uint8 array, chunk by chunk, each
+        row prefixed with its filter byte. prev is the row above the first one.
+        """
+        for start in range(0, len(rows), self.chunk):
+            stop = min(len(rows), start + self.chunk)
+            above = prev if start == 0 else rows[start - 1]
+            yield self._filter_chunk(rows[start:stop], above)
+
+    def _filter_chunk(self, rows: np.ndarray, above: np.ndarray) -> bytes:
+        n, bpp = len(rows), self.bpp
+        x, a, b, c, t, u, v = (buf[:n] for buf in
+                               (self._x, self._a, self._b, self._c, self._t, self._u, self._v))
+        out, best = self._out[:n], self._best[:n]
+
+        x[:] = rows
+        b[0] = above
+        b[1:] = x[:-1]
+        a[:, :bpp] = 0
+        a[:, bpp:] = x[:, :-bpp]
+        c[:, :bpp] = 0
+        c[:, bpp:] = b[:, :-bpp]
+
+        best[:] = np.iinfo(np.int64).max
+        # None, Sub, Up, Average
+        self._try(0, x, None, out, best)
+        self._try(1, x, a, out, best)
+        self._try(2, x, b, out, best)
+        np.add(a, b, out=t)
+        t >>= 1
+        self._try(3, x, t, out, best)
+
+        # Paeth: the neighbour nearest a + b - c; pa = |b - c|, pb = |a - c|, pc = |a + b - 2c|
+        np.subtract(b, c, out=t)
+        np.abs(t, out=t)
+        np.subtract(a, c, out=u)
+        np.abs(u, out=u)
+        np.add(a, b, out=v)
+        v -= c
+        v -= c
+        np.abs(v, out=v)
+        use_a = (t <= u) & (t <= v)
+        use_b = ~use_a & (u <= v)
+        np.copyto(c, b, where=use_b)           # c becomes the Paeth predictor
+        np.copyto(c, a, where=use_a)
+        self._try(4, x, c, out, best)
+        return out.tobytes()
+
+    def _try(self, filter_type: int, x: np.ndarray, predictor: Optional[np.ndarray],
+             out: np.ndarray, best: np.ndarray) -> None:
+        """Score x - predictor and keep it for rows where it beats the best so far"""
+        n = len(x)
+        candidate = self._candidate[:n]
+        if predictor is None:
+            np.copyto(candidate, x, casting='unsafe')
+        else:
+            np.subtract(x, predictor, out=candidate, casting='unsafe')
+        scores = np.abs(candidate.view(np.int8), dtype=np.int16).sum(axis=1)
+        better = scores < best
+        if better.any():
+            best[better] = scores[better]
+            out[better, 0] = filter_type
+            out[better, 1:] = candidate[better]
+
+
+class PNGStreamWriter:
+    """
+    Streams an RGB or RGBA image of known size to a PNG file one band of rows
+    at a time. Memory use is bounded by the band height, not the image height,
+    and filtering adds only a few FILTER_CHUNK-row scratch buffers.
+
+    Usage:
+        with PNGStreamWriter(path, width, height) as writer:
+            for band in bands:
+                writer.write(band)
+    """
+
+    IDAT_SIZE = 1 << 20
+
+    def __init__(self, path: str | os.PathLike, width: int, height: int, mode: str = 'RGBA',
+                 compress_level: int = 6):
+        if mode not in COLOR_TYPES:
+            raise ValueError(f"Unsupported PNG stream mode: {mode}")
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid PNG size: {width}x{height}")
+
+        self.width, self.height, self.mode = width, height, mode
+        self.rows_written = 0
+        color_type, self._bpp = COLOR_TYPES[mode]
+        self._prev = np.zeros(width * self._bpp, dtype=np.uint8)
+        self._filter = _RowFilter(width * self._bpp, self._bpp)
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+
+        self._fp: Optional[BinaryIO] = open(path, 'wb')
+        self._fp.write(PNG_SIGNATURE)
+        _chunk(self._fp, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+
+    def write(self, band: Image.Image) -> None:
+        """Append the rows of band (full image width) below the rows written so far"""
+        if band.width != self.width:
+            raise ValueError(f"Band width {band.width} does not match image width {self.width}")
+        if self.rows_written + band.height > self.height:
+            raise ValueError("More rows written than the declared image height")
+        if band.mode != self.mode:
+            band = band.convert(self.mode)
+
+        rows = np.asarray(band, dtype=np.uint8).reshape(band.height, -1)
+        for filtered in self._filter.filter(rows, self._prev):
+            self._pending += self._compressor.compress(filtered)
+        self._prev = rows[-1].copy()
+        self.rows_written += band.height
+        self._flush_idat(self.IDAT_SIZE)
+
+    def close(self) -> None:
+        """Finish the zlib stream and write the trailer"""
+        if self._fp is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Wrote {self.rows_written} of {self.height} rows")
+            self._pending += self._compressor.flush()
+            self._flush_idat(1)
+            _chunk(self._fp, b'IEND', b'')
+        finally:
+            self._fp.close()
+            self._fp = None
+
+    def discard(self) -> None:
+        """Abandon the image and remove the partial file"""
+        if self._fp is None:
+            return
+        path = self._fp.name
+        self._fp.close()
+        self._fp = None
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _flush_idat(self, threshold: int) -> None:
+        while len(self._pending) >= threshold:
+            data = bytes(self._pending[:self.IDAT_SIZE])
+            del self._pending[:self.IDAT_SIZE]
+            _chunk(self._fp, b'IDAT', data)
+
+    def __enter__(self) -> 'PNGStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
@@ -5,10 +5,23 @@ The manager operates on the running PySimpleGUI window by updating element value
 
 from __future__ import annotations
 
+import json
 from typing import Dict, Any
 
 
 class PresetManager:
+    # Preset keys -> CoverGenerator.generate_cover keyword arguments
+    COVER_KEYS = {
+        "bg_type": "background_type",
+        "bg_color": "background_color",
+        "secondary_color": "secondary_color",
+        "gradient_angle": "gradient_angle",
+        "gradient_colors": "gradient_colors",
+        "font": "font",
+        "bold": "bold",
+        "shadow": "shadow",
+    }
+
     def __init__(self) -> None:
         # Preset definitions; extend as needed
         self._presets: Dict[str, Dict[str, Any]] = {
@@ -48,3 +61,17 @@ class PresetManager:
 
     def list_presets(self) -> Dict[str, Dict[str, Any]]:
         return dict(self._presets)
+
+    def load_presets(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """Add presets from a JSON file of {name: {key: value}}; returns the loaded presets"""
+        with open(path, "r", encoding="utf-8") as f:
+            presets = json.load(f)
+        if not isinstance(presets, dict) or not all(isinstance(p, dict) for p in presets.values()):
+            raise ValueError(f"Preset file must map preset names to objects: {path}")
+        self._presets.update(presets)
+        return presets
+
+    def cover_options(self, name: str) -> Dict[str, Any]:
+        """generate_cover keyword arguments for a preset (raises KeyError for unknown presets)"""
+        preset = self._presets[name]
+        return {self.COVER_KEYS[k]: v for k, v in preset.items() if k in self.COVER_KEYS}
@@ -0,0 +1,223 @@
+"""
+Render Cache Module
+Content-addressed store of exported artifacts (covers, collages, GIFs)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .utils import file_signature, get_cache_dir
+
+# Default store size; store() prunes least recently used artifacts past it
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Zero-byte marker next to an artifact's blobs whose mtime is its last-used time.
+# Blobs are hardlinked to user outputs, so their own mtime must never change.
+USED_SUFFIX = '.used'
+
+
+class RenderCache:
+    """
+    Keys every artifact by a hash of its input file contents, its normalized
+    parameters and the engine version that produced it.
+
+    Cache hits are materialized at the requested output path by hardlink
+    (falling back to a copy), so unchanged inputs cost a file link instead of
+    a render. With enabled=False nothing is read from or written to the store.
+    The store is kept under max_bytes (None: unbounded) by evicting least
+    recently used artifacts whenever a store pushes it past the cap.
+    """
+
+    def __init__(self, root: Optional[str | os.PathLike] = None, enabled: bool = True,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root) if root else get_cache_dir('renders')
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        # Store size as of the last scan plus what this process stored since
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    # ---- Keys ---------------------------------------------------------------
+
+    def file_digest(self, path: str) -> str:
+        """SHA-256 of a file's contents, memoized per (path, mtime, size)"""
+        signature = file_signature(path)
+        if signature is None:
+            return 'missing'
+        with self._lock:
+            cached = self._digests.get(signature)
+        if cached:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._digests[signature] = value
+        return value
+
+    def key(self, kind: str, engine_version: Any, inputs: Iterable[Optional[str]],
+            params: Dict[str, Any]) -> str:
+        """Cache key for one artifact; input order matters, parameter order does not"""
+        payload = {
+            'kind': kind,
+            'engine': engine_version,
+            'inputs': [self.file_digest(p) if p else None for p in inputs],
+            'params': params,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    # ---- Store --------------------------------------------------------------
+
+    def _blob_path(self, key: str, index: int, output_path: str) -> Path:
+        suffix = Path(output_path).suffix.lower()
+        return self.root / key[:2] / f"{key}-{index}{suffix}"
+
+    def _touch(self, key: str) -> None:
+        """Record that key's artifact was just used"""
+        marker = self.root / key[:2] / f"{key}{USED_SUFFIX}"
+        marker.touch()
+
+    def fetch(self, key: str, output_paths: List[str]) -> bool:
+        """Materialize every output of a cached artifact; False if any is missing"""
+        blobs = [self._blob_path(key, i, p) for i, p in enumerate(output_paths)]
+        if not all(blob.exists() for blob in blobs):
+            return False
+        for blob, output_path in zip(blobs, output_paths):
+            _materialize(blob, output_path)
+        self._touch(key)
+        return True
+
+    def store(self, key: str, output_paths: List[str]) -> None:
+        """Copy freshly rendered outputs into the store, then enforce max_bytes"""
+        added = 0
+        for i, output_path in enumerate(output_paths):
+            if not os.path.exists(output_path):
+                continue
+            blob = self._blob_path(key, i, output_path)
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_name(f"{blob.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(output_path, tmp)
+            os.replace(tmp, blob)
+            added += os.path.getsize(blob)
+        self._touch(key)
+
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._artifacts().values())
+            else:
+                self._size += added
+            over = self._size > self.max_bytes
+        if over:
+            self.prune(self.max_bytes)
+
+    def run(self, kind: str, engine_version: Any, inputs: Iterable[Optional[str]],
+            params: Dict[str, Any], output_paths: List[str], produce: Callable[[], Any]) -> bool:
+        """
+        Materialize output_paths from the cache, or call produce() to write them
+        and store the result. Returns True on a cache hit.
+        """
+        for output_path in output_paths:
+            _detach(output_path)
+
+        if not self.enabled or not output_paths:
+            produce()
+            return False
+
+        key = self.key(kind, engine_version, inputs, params)
+        try:
+            if self.fetch(key, output_paths):
+                self.hits += 1
+                return True
+        except OSError:
+            pass
+
+        self.misses += 1
+        produce()
+        try:
+            self.store(key, output_paths)
+        except OSError:
+            pass  # A read-only or full cache never fails the export itself
+        return False
+
+    def _artifacts(self) -> Dict[str, Tuple[float, int, List[Path]]]:
+        """key -> (last-used time, bytes, files) of every artifact in the store"""
+        artifacts: Dict[str, Tuple[float, int, List[Path]]] = {}
+        if not self.root.exists():
+            return artifacts
+        for path in self.root.rglob('*'):
+            if path.suffix == '.tmp' or not path.is_file():
+                continue  # in-flight writes belong to a live store()
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if path.name.endswith(USED_SUFFIX):
+                key, used, size = path.name[:-len(USED_SUFFIX)], st.st_mtime, 0
+            else:
+                key, used, size = path.name.split('-', 1)[0], st.st_mtime, st.st_size
+            last_used, total, files = artifacts.get(key, (0.0, 0, []))
+            artifacts[key] = (max(last_used, used), total + size, files + [path])
+        return artifacts
+
+    def prune(self, max_bytes: int = 0) -> Tuple[int, int]:
+        """
+        Delete least recently used artifacts (all their blobs at once) until the
+        store is at most max_bytes. Returns (blobs removed, bytes freed).
+        """
+        artifacts = self._artifacts()
+        total = sum(size for _, size, _ in artifacts.values())
+        removed = freed = 0
+        for _, size, files in sorted(artifacts.values(), key=lambda a: a[0]):
+            if total <= max_bytes:
+                break
+            for path in files:
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                if not path.name.endswith(USED_SUFFIX):
+                    removed += 1
+            total -= size
+            freed += size
+        with self._lock:
+            self._size = total
+        return removed, freed
+
+
+def _materialize(blob: Path, output_path: str) -> None:
+    """Hardlink blob to output_path, copying across filesystems"""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(blob, tmp)
+    except OSError:
+        shutil.copyfile(blob, tmp)
+    os.replace(tmp, output_path)
+
+
+def _detach(output_path: str) -> None:
+    """
+    Unlink an output that shares its inode with a cache blob before it is
+    rewritten; encoders truncate files in place and would corrupt the blob.
+    """
+    try:
+        if os.stat(output_path).st_nlink > 1:
+            os.unlink(output_path)
+    except OSError:
+        pass
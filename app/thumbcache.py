@@ -0,0 +1,212 @@
+"""
+Thumbnail Cache Module
+Two-level cache of downscaled images: in-memory LRU over an on-disk mipmap store
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from PIL import Image
+
+from .utils import LRUCache, file_signature, get_cache_dir
+
+# Opens the source image at (at least) the requested size; the default handles still images
+Loader = Callable[[str, int], Image.Image]
+
+
+def load_still(path: str, max_edge: int) -> Image.Image:
+    """Decode an image file, letting JPEG skip detail beyond max_edge"""
+    with Image.open(path) as img:
+        img.draft(img.mode, (max_edge, max_edge))
+        img.load()
+        return img.copy()
+
+
+class ThumbnailCache:
+    """
+    Mipmapped thumbnails keyed by source path, mtime and size.
+
+    Each source is stored at power-of-two longest-edge levels. A request is
+    served from the smallest level that is at least as large, first from
+    memory, then from disk, and only decodes the source when neither has it.
+    Returned images are shared: callers must copy before modifying them.
+    The disk store is kept under disk_max_bytes (None: unbounded) by deleting
+    least recently used files; disk hits refresh a file's mtime.
+    """
+
+    LEVELS = (64, 128, 256, 512, 1024)
+    MEMORY_SIZE = 128
+    DISK_VERSION = 1
+    DISK_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, root: Optional[str | os.PathLike] = None, memory_size: int = MEMORY_SIZE,
+                 disk_max_bytes: Optional[int] = DISK_MAX_BYTES):
+        self.root = Path(root) if root else get_cache_dir('thumbnails')
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = LRUCache(memory_size)
+        self._lock = threading.Lock()
+        # Disk store size as of the last scan plus what this process wrote since
+        self._disk_size: Optional[int] = None
+        self.decodes = 0
+
+    def get(self, path: str, max_edge: int, loader: Loader = load_still) -> Optional[Image.Image]:
+        """
+        Return a cached image of path whose longest edge is the smallest mip
+        level >= max_edge (or the source size if that is smaller), or None if
+        the source cannot be read.
+        """
+        signature = file_signature(path)
+        if signature is None:
+            return None
+        level = self._level_for(max_edge)
+        key = (signature, level)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached
+
+        img = self._read_disk(signature, level)
+        if img is None:
+            try:
+                levels = self._build_levels(path, level, loader)
+            except Exception:
+                return None
+            for lvl, mip in levels:
+                self._write_disk(signature, lvl, mip)
+                self._memory.put((signature, lvl), mip)
+            self._enforce_disk_limit()
+            img = levels[0][1]
+        else:
+            self._memory.put(key, img)
+        return img
+
+    def thumbnail(self, path: str, size: Tuple[int, int], loader: Loader = load_still) -> Optional[Image.Image]:
+        """Private copy of path fitted into size, like Image.thumbnail()"""
+        img = self.get(path, max(size), loader)
+        if img is None:
+            return None
+        img = img.copy()
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        return img
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def prune(self, max_bytes: int = 0) -> Tuple[int, int]:
+        """
+        Delete least recently used thumbnails until the disk store is at most
+        max_bytes. Returns (files removed, bytes freed).
+        """
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+        removed = freed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+        with self._lock:
+            self._disk_size = total
+        return removed, freed
+
+    # ---- Internals ----------------------------------------------------------
+
+    def _level_for(self, max_edge: int) -> int:
+        for level in self.LEVELS:
+            if level >= max_edge:
+                return level
+        return self.LEVELS[-1]
+
+    def _build_levels(self, path: str, level: int, loader: Loader) -> List[Tuple[int, Image.Image]]:
+        """Decode once and derive the requested level plus every smaller one from it"""
+        with self._lock:
+            self.decodes += 1
+        source = loader(path, level)
+        if source.mode not in ('RGB', 'RGBA'):
+            has_alpha = source.mode in ('LA', 'PA') or 'transparency' in source.info
+            source = source.convert('RGBA' if has_alpha else 'RGB')
+
+        levels = []
+        current = source
+        for lvl in sorted((l for l in self.LEVELS if l <= level), reverse=True):
+            current = current.copy()
+            current.thumbnail((lvl, lvl), Image.Resampling.LANCZOS)
+            levels.append((lvl, current))
+        return levels
+
+    def _disk_path(self, signature: Tuple[str, int, int], level: int) -> Path:
+        digest = hashlib.sha1(repr((self.DISK_VERSION,) + signature).encode('utf-8')).hexdigest()
+        return self.root / digest[:2] / f"{digest}-{level}.png"
+
+    def _read_disk(self, signature: Tuple[str, int, int], level: int) -> Optional[Image.Image]:
+        path = self._disk_path(signature, level)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                img = img.copy()
+        except Exception:
+            return None
+        try:
+            os.utime(path)  # mtime is the last-used time for pruning
+        except OSError:
+            pass
+        return img
+
+    def _write_disk(self, signature: Tuple[str, int, int], level: int, img: Image.Image) -> None:
+        path = self._disk_path(signature, level)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            img.save(tmp, 'PNG', compress_level=1)
+            size = tmp.stat().st_size
+            os.replace(tmp, path)
+        except OSError:
+            return  # Read-only cache location: thumbnails just won't persist
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += size
+
+    def _disk_files(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, bytes, path) of every stored thumbnail"""
+        files = []
+        if self.root.exists():
+            for path in self.root.rglob('*.png'):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _enforce_disk_limit(self) -> None:
+        if self.disk_max_bytes is None:
+            return
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, size, _ in self._disk_files())
+            over = self._disk_size > self.disk_max_bytes
+        if over:
+            self.prune(self.disk_max_bytes)
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide thumbnail cache"""
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
@@ -7,8 +7,14 @@ from __future__ import annotations
 import io
 import os
 import subprocess
+import sys
+import threading
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
 
 try:
     import PySimpleGUI as sg  # type: ignore
@@ -38,27 +44,84 @@ def ensure_dir(p: Path) -> Path:
     return p
 
 
+def get_cache_dir(*parts: str) -> Path:
+    """
+    Returns a path inside the per-user cache directory.
+    Override the location with the ITCHPAGE_CACHE_DIR environment variable.
+    """
+    override = os.environ.get("ITCHPAGE_CACHE_DIR")
+    if override:
+        root = Path(override)
+    elif sys.platform.startswith("win"):
+        root = Path(os.environ.get("LOCALAPPDATA", Path.home())) / "ItchPageWizard" / "cache"
+    elif sys.platform == "darwin":
+        root = Path.home() / "Library" / "Caches" / "ItchPageWizard"
+    else:
+        root = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "itchpage-wizard"
+    return root.joinpath(*parts)
+
+
 # ----- Validation & image helpers -------------------------------------------
 
 
 IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"}
 
 
-def validate_image(path: str | os.PathLike) -> bool:
+@dataclass(frozen=True)
+class MediaInfo:
+    """Header-level facts about an image file; no pixels are decoded to get them."""
+
+    path: str
+    format: str
+    width: int
+    height: int
+    mode: str
+    is_animated: bool = False
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @cached_property
+    def n_frames(self) -> int:
+        """Frame count, counted on first use: Pillow seeks through every frame to get it"""
+        if not self.is_animated:
+            return 1
+        with Image.open(self.path) as im:
+            return getattr(im, "n_frames", 1)
+
+
+def probe_media(path: str | os.PathLike, max_pixels: Optional[int] = None) -> Optional[MediaInfo]:
     """
-    Quick validation that a file exists and Pillow can open it.
+    Read an image header once and return its MediaInfo, or None if the file is
+    missing, not a supported image, empty, or larger than max_pixels (default:
+    Pillow's Image.MAX_IMAGE_PIXELS at call time; None there disables the limit).
     """
     try:
         path = str(path)
-        if not os.path.exists(path):
-            return False
         if Path(path).suffix.lower() not in IMAGE_EXTS:
-            return False
-        with Image.open(path) as im:
-            im.verify()  # type: ignore
-        return True
+            return None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(path) as im:
+                width, height = im.size
+                limit = Image.MAX_IMAGE_PIXELS if max_pixels is None else max_pixels
+                if width <= 0 or height <= 0 or (limit is not None and width * height > limit):
+                    return None
+                # is_animated stops after the second frame, where n_frames reads them all
+                return MediaInfo(
+                    path=path, format=im.format or "", width=width, height=height,
+                    mode=im.mode, is_animated=bool(getattr(im, "is_animated", False)),
+                )
     except Exception:
-        return False
+        return None
+
+
+def validate_image(path: str | os.PathLike) -> bool:
+    """
+    Quick validation that a file exists and Pillow can read its header.
+    """
+    return probe_media(path) is not None
 
 
 def ensure_aspect_ratio(
@@ -82,6 +145,71 @@ def image_to_bytes(img: Image.Image, fmt: str = "PNG") -> bytes:
     return bio.getvalue()
 
 
+def file_signature(path: str | os.PathLike | None) -> Optional[Tuple[str, int, int]]:
+    """
+    (absolute path, mtime_ns, size) for cache keys; None if the file is missing.
+    """
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+# ----- Caching ---------------------------------------------------------------
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU mapping with a bounded number of entries.
+    Cached values are shared; callers must treat them as immutable.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, building it with factory() on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
 # ----- System checks & UX helpers -------------------------------------------
 
 
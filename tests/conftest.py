@@ -0,0 +1,10 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_cache_dir(tmp_path_factory):
+    # Keep the font index and render cache out of the developer's home directory
+    os.environ["ITCHPAGE_CACHE_DIR"] = str(tmp_path_factory.mktemp("itchpage-cache"))
+    yield
@@ -0,0 +1,73 @@
+import io
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.budget import EXIF_DESCRIPTION, choose_encoding, encode_to_budget
+from app.collage import CollageSpec, ScreenshotCollage
+
+
+def _photo(width: int = 640, height: int = 400, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) % 256], axis=2)
+    noise = rng.integers(-20, 21, base.shape)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), "RGB")
+
+
+def test_choice_fits_budget_and_is_recorded(tmp_path: Path):
+    source = tmp_path / "collage.png"
+    _photo().save(source)
+    budget = 60_000
+
+    output, choice = encode_to_budget(str(source), budget)
+    assert choice.fits and Path(output).stat().st_size <= budget
+    assert choice.format in ("webp", "jpeg")
+    assert not source.exists()  # replaced by the lossy file
+
+    with Image.open(output) as img:
+        assert f"format={choice.format}" in img.getexif()[EXIF_DESCRIPTION]
+
+    # A generous budget keeps lossless PNG, with the choice in a text chunk
+    _photo().save(source)
+    output, choice = encode_to_budget(str(source), 10_000_000)
+    assert output == str(source) and choice.format == "png"
+    with Image.open(output) as img:
+        assert "format=png" in img.text["Encoding"]
+
+
+def test_transparent_images_skip_jpeg():
+    img = _photo().convert("RGBA")
+    img.putpixel((0, 0), (0, 0, 0, 0))
+    choice, _ = choose_encoding(img, 20_000)
+    assert choice.format != "jpeg"
+
+
+def test_images_over_webp_limit_skip_webp():
+    img = _photo(200, 17_000).convert("RGBA")
+    img.paste((0, 0, 0, 0), (0, 0, 16, 16))
+    choice, data = choose_encoding(img, 50_000)
+    assert choice.format in ("png", "png8") and len(data) == choice.size
+
+    # Flattened onto a background, JPEG competes and transparent pixels take its color
+    choice, data = choose_encoding(img, 400_000, background=(255, 255, 255))
+    assert choice.format == "jpeg" and choice.fits
+    with Image.open(io.BytesIO(data)) as jpeg:
+        assert min(jpeg.getpixel((8, 8))) > 200
+
+
+def test_collage_specs_honour_max_bytes(tmp_path: Path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"shot{i}.png"
+        _photo(seed=i).save(path)
+        paths.append(str(path))
+
+    collage = ScreenshotCollage()
+    specs = [CollageSpec(str(tmp_path / "full.png")),
+             CollageSpec(str(tmp_path / "small.png"), max_bytes=80_000)]
+    full, small = collage.create_collages(paths, specs)
+    assert full == specs[0].output_path and full not in collage.encodings
+    assert collage.encodings[small].fits
+    assert Path(small).stat().st_size <= 80_000
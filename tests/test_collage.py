@@ -58,3 +58,150 @@ def test_create_collage_from_folder(tmp_path: Path):
 
     with Image.open(output_collage) as im:
         assert im.width == 920
+
+
+def test_batch_collage_probes_each_file_once(tmp_path: Path, monkeypatch):
+    import app.collage
+    import app.main
+    from app.utils import probe_media
+
+    input_dir = tmp_path / "collage_input"
+    input_dir.mkdir()
+    for i in range(3):
+        _mk_img(input_dir / f"s{i}.png", size=(800, 600), color=(40 * i, 90, 160))
+    (input_dir / "notes.txt").write_text("not an image")
+
+    probed = []
+    def counting_probe(path, *args, **kwargs):
+        probed.append(Path(path).name)
+        return probe_media(path, *args, **kwargs)
+    monkeypatch.setattr(app.main, "probe_media", counting_probe)
+    monkeypatch.setattr(app.collage, "probe_media", counting_probe)
+
+    wizard = ItchPageWizard(gui_mode=False, use_cache=False)
+    wizard.run_batch_collage(str(input_dir), "Grid,Linear", "8,16")
+
+    assert len(list((input_dir / "collage_output").glob("*.png"))) == 4
+    assert sorted(probed) == ["notes.txt", "s0.png", "s1.png", "s2.png"]
+
+
+def test_collage_tiles_decode_reduced_and_keep_alpha(tmp_path: Path):
+    big = tmp_path / "big.jpg"
+    Image.new("RGB", (3840, 2160), (200, 40, 40)).save(big, "JPEG", quality=95)
+    clear = tmp_path / "clear.png"
+    Image.new("RGBA", (800, 450), (0, 0, 255, 0)).save(clear, "PNG")
+
+    collager = ScreenshotCollage()
+    tile = collager._load_tile(str(big), (300, 169))
+    assert tile.mode == "RGB" and tile.size == (300, 169)
+    assert all(abs(a - b) <= 3 for a, b in zip(tile.getpixel((150, 80)), (200, 40, 40)))
+    assert collager._load_tile(str(clear), (300, 169)).mode == "RGBA"
+
+    out = tmp_path / "collage.png"
+    collager.create_collage([str(big), str(clear)], str(out), layout="Linear", gutter=12)
+    with Image.open(out) as im:
+        assert im.getpixel((10, 10))[3] == 255
+        assert im.getpixel((10, im.height - 10))[3] == 0
+
+
+def test_threaded_tiles_match_sequential(tmp_path: Path):
+    imgs = []
+    for i in range(7):
+        f = tmp_path / f"s{i}.png"
+        _mk_img(f, size=(640 + 40 * i, 360 + 30 * i), color=(30 * i, 100, 255 - 30 * i))
+        imgs.append(str(f))
+
+    collager = ScreenshotCollage()
+    outputs = []
+    for workers in (1, 4):
+        out = tmp_path / f"collage_{workers}.png"
+        collager.create_collage(imgs, str(out), layout="Masonry", workers=workers)
+        outputs.append(out.read_bytes())
+    assert outputs[0] == outputs[1]
+
+
+def test_tall_collage_streams_bands_with_identical_pixels(tmp_path: Path):
+    imgs = []
+    for i in range(9):
+        f = tmp_path / f"s{i}.png"
+        _mk_img(f, size=(400, 300 + 90 * i), color=(20 * i, 200 - 20 * i, 90))
+        imgs.append(str(f))
+
+    whole = tmp_path / "whole.png"
+    ScreenshotCollage().create_collage(imgs, str(whole), layout="Masonry", add_captions=True)
+
+    banded = ScreenshotCollage()
+    banded.BAND_HEIGHT = 97  # many bands, tiles and captions straddling band edges
+    streamed = tmp_path / "streamed.png"
+    banded.create_collage(imgs, str(streamed), layout="Masonry", add_captions=True)
+
+    with Image.open(whole) as a, Image.open(streamed) as b:
+        assert a.size == b.size and a.height > 97 * 5
+        assert a.tobytes() == b.convert(a.mode).tobytes()
+
+
+def test_streamed_collage_memory_stays_near_one_band(tmp_path: Path):
+    import tracemalloc
+
+    imgs = []
+    for i in range(6):
+        f = tmp_path / f"s{i}.png"
+        _mk_img(f, size=(800, 600), color=(30 * i, 100, 200 - 30 * i))
+        imgs.append(str(f))
+
+    collager = ScreenshotCollage()
+    collager.BAND_HEIGHT = 512
+    band_bytes = 920 * collager.BAND_HEIGHT * 4
+    out = tmp_path / "tall.png"
+    tracemalloc.start()
+    try:
+        collager.create_collage(imgs, str(out), layout="Linear", workers=1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    with Image.open(out) as im:
+        assert im.height > 5 * collager.BAND_HEIGHT
+    # The band's bytes and NumPy rows plus fixed-size filter scratch, not copies of whole bands
+    assert peak < 4 * band_bytes, peak
+
+
+def test_multi_layout_export_decodes_each_image_once(tmp_path: Path, monkeypatch):
+    from app.collage import CollageSpec
+
+    imgs = []
+    for i in range(5):
+        f = tmp_path / f"s{i}.png"
+        _mk_img(f, size=(1280, 720 + 60 * i), color=(50 * i, 90, 200))
+        imgs.append(str(f))
+
+    collager = ScreenshotCollage()
+    opened = []
+    original = collager._load_tiles
+    monkeypatch.setattr(collager, "_load_tiles", lambda path, sizes: opened.append(path) or original(path, sizes))
+
+    specs = [CollageSpec(str(tmp_path / f"{layout}_{width}.png"), layout, 12, width)
+             for layout in ("Grid", "Masonry", "Linear") for width in (920, 600)]
+    outputs = collager.create_collages(imgs, specs)
+
+    assert sorted(opened) == sorted(imgs)
+    for spec, output in zip(specs, outputs):
+        with Image.open(output) as im:
+            assert im.width == spec.max_width
+
+    for spec in specs:
+        single = tmp_path / "single.png"
+        ScreenshotCollage().create_collage(imgs, str(single), layout=spec.layout, max_width=spec.max_width)
+        with Image.open(single) as a, Image.open(spec.output_path) as b:
+            assert a.size == b.size and a.tobytes() == b.tobytes()
+
+    # Past the sharing bound each collage decodes its own tiles, with the same pixels
+    opened.clear()
+    collager.SHARED_TILE_PIXELS = 0
+    streamed = [CollageSpec(str(tmp_path / f"streamed_{i}.png"), s.layout, 12, s.max_width)
+                for i, s in enumerate(specs)]
+    collager.create_collages(imgs, streamed)
+    assert len(opened) == len(imgs) * len(specs)
+    for spec, other in zip(specs, streamed):
+        with Image.open(spec.output_path) as a, Image.open(other.output_path) as b:
+            assert a.tobytes() == b.tobytes()
@@ -31,6 +31,76 @@ def test_generate_covers_from_csv(tmp_path: Path):
     output_files = list(output_dir.glob("*.png"))
     assert len(output_files) == 2
 
+def test_generate_covers_from_csv_parallel(tmp_path: Path, capsys):
+    csv_path = tmp_path / "covers.csv"
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'studio', 'background_color'])
+        for i in range(6):
+            writer.writerow([f'Parallel {i}', 'Studio', '#123456'])
+        writer.writerow(['Broken', 'Studio', 'not-a-color'])
+
+    wizard = ItchPageWizard(gui_mode=False)
+    wizard.run_batch_covers(str(csv_path), jobs=2)
+
+    output_files = sorted(p.name for p in (tmp_path / "covers_output").glob("*.png"))
+    assert output_files == [f"Parallel_{i}_630x500.png" for i in range(6)]
+
+    out = capsys.readouterr().out
+    processed = [line for line in out.splitlines() if line.startswith("Processing row")]
+    assert [line.split(":")[0] for line in processed] == [f"Processing row {i}" for i in range(1, 8)]
+    assert "Failed to generate cover for row 7" in out
+    assert "rows/s" in out and "p95" in out
+
+def test_incremental_csv_rerun_only_renders_changed_rows(tmp_path: Path, capsys):
+    def write_csv(rows):
+        with open(tmp_path / "covers.csv", 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['title', 'background_color'])
+            writer.writerows(rows)
+
+    wizard = ItchPageWizard(gui_mode=False)
+    write_csv([['Alpha', '#111111'], ['Beta', '#222222'], ['Gamma', '#333333']])
+    wizard.run_batch_covers(str(tmp_path / "covers.csv"), incremental=True)
+    assert capsys.readouterr().out.count("Processing row") == 3
+
+    # Beta changed, Gamma's output was deleted, Delta is new
+    write_csv([['Alpha', '#111111'], ['Beta', '#abcdef'], ['Gamma', '#333333'], ['Delta', '#444444']])
+    (tmp_path / "covers_output" / "Gamma_630x500.png").unlink()
+    wizard.run_batch_covers(str(tmp_path / "covers.csv"), incremental=True)
+    out = capsys.readouterr().out
+    assert "Skipping row 1: Alpha (up to date)" in out
+    rendered = [line.split(": ")[1] for line in out.splitlines() if line.startswith("Processing row")]
+    assert rendered == ["Beta", "Gamma", "Delta"]
+
+def test_row_key_tracks_resolved_font_files(tmp_path: Path, monkeypatch):
+    import app.batch
+    from app.batch import row_key
+
+    regular, bold = tmp_path / "Regular.ttf", tmp_path / "Bold.ttf"
+    regular.write_bytes(b"regular")
+    bold.write_bytes(b"bold")
+
+    class Fonts:
+        def resolve(self, name, bold_face=False):
+            return str(bold if bold_face else regular)
+    monkeypatch.setattr(app.batch, "get_font_index", Fonts)
+
+    bold_row = {'title': 'Alpha', 'font': 'MyFont', 'filename_stem': 'Alpha_630x500'}
+    regular_row = {**bold_row, 'bold': False}
+    keys = row_key(bold_row), row_key(regular_row)
+
+    # Replacing the bold face invalidates only rows whose title uses it
+    bold.write_bytes(b"bold, hinted")
+    assert row_key(bold_row) != keys[0]
+    assert row_key(regular_row) == keys[1]
+
+    # Studio and version are always set in the regular face
+    bold_key = row_key(bold_row)
+    regular.write_bytes(b"regular, hinted")
+    assert row_key(bold_row) != bold_key
+    assert row_key(regular_row) != keys[1]
+
 def test_generate_cover(tmp_path: Path):
     gen = CoverGenerator()
     out = gen.generate_cover(
@@ -53,3 +123,125 @@ def test_generate_cover(tmp_path: Path):
     with Image.open(out) as im:
         assert im.size == (630, 500)
         assert ensure_aspect_ratio(im.size, (315, 250))
+
+
+def test_gradient_uses_secondary_color(tmp_path: Path):
+    from PIL import Image
+
+    gen = CoverGenerator()
+    out = gen.generate_cover(
+        title="Gradient",
+        output_dir=str(tmp_path),
+        include_metadata=False,
+        background_type="Gradient",
+        background_color="#2980b9",
+        secondary_color="#8e44ad",
+        filename_stem="gradient",
+    )
+    with Image.open(out) as im:
+        top = im.getpixel((5, 0))
+        bottom = im.getpixel((5, 499))
+    assert all(abs(a - b) <= 2 for a, b in zip(top, (0x29, 0x80, 0xB9)))
+    assert all(abs(a - b) <= 2 for a, b in zip(bottom, (0x8E, 0x44, 0xAD)))
+
+
+def test_background_layer_is_cached_and_not_mutated(tmp_path: Path):
+    from PIL import Image
+
+    gen = CoverGenerator()
+    for i, title in enumerate(["First", "Second"]):
+        gen.generate_cover(
+            title=title,
+            output_dir=str(tmp_path),
+            include_metadata=False,
+            background_type="Gradient",
+            background_color="#111111",
+            filename_stem=f"cover_{i}",
+        )
+    assert gen._background_cache.misses == 1
+    assert gen._background_cache.hits == 1
+
+    clean = gen._create_background("Gradient", "#111111")
+    with Image.open(tmp_path / "cover_0.png") as first, Image.open(tmp_path / "cover_1.png") as second:
+        # Titles differ, so the cached layer must not carry text from the first render
+        assert first.tobytes() != second.tobytes()
+    assert clean.getpixel((315, 120)) == clean.getpixel((5, 120))
+
+
+def test_preview_only_rebuilds_changed_layers():
+    gen = CoverGenerator()
+    data = {"title": "Robot City", "studio": "Future-Proof", "version": "2.1",
+            "background_type": "Solid Color", "background_color": "#0000ff"}
+    assert gen.generate_preview(data, (400, 320)) is not None
+    studio_layer = gen._preview_layers["studio"]
+    title_layer = gen._preview_layers["title"]
+
+    assert gen.generate_preview({**data, "title": "Robot City 2"}, (400, 320)) is not None
+    assert gen._preview_layers["studio"] is studio_layer
+    assert gen._preview_layers["title"] is not title_layer
+
+
+def test_blurred_background_is_cached_per_source(tmp_path: Path):
+    from PIL import Image
+
+    key_art = tmp_path / "key_art.png"
+    Image.new("RGB", (1920, 1080), (200, 100, 50)).save(key_art)
+
+    gen = CoverGenerator()
+    full = gen._create_blurred_background(str(key_art))
+    small = gen._create_blurred_background(str(key_art), size=(315, 250))
+    assert full.size == (630, 500) and small.size == (315, 250)
+    assert gen._blur_cache.misses == 1 and gen._blur_cache.hits == 1
+
+    # Darkened to 60% for text readability, by the same kernel pass as the blur, up to the borders
+    for xy in [(315, 250), (0, 0), (629, 499)]:
+        r, g, b = full.getpixel(xy)
+        assert abs(r - 120) <= 2 and abs(g - 60) <= 2 and abs(b - 30) <= 2
+
+def test_cover_derivatives_render_once(tmp_path: Path, monkeypatch):
+    from PIL import Image
+    gen = CoverGenerator()
+    composed = []
+    original = gen._compose_cover
+    monkeypatch.setattr(gen, "_compose_cover",
+                        lambda data, scale=1.0, get_layer=None: composed.append(scale) or original(data, scale))
+
+    paths = gen.generate_cover_derivatives(
+        {"title": "Ladder", "studio": "Studio", "background_color": "#224466"},
+        sizes=["315x250.png", "1260x1000.png", "630x500.jpg", "1200x630.webp"],
+        output_dir=str(tmp_path), filename_stem="ladder",
+    )
+
+    assert composed == [1260 / 630]
+    assert [os.path.basename(p) for p in paths] == [
+        "ladder_315x250.png", "ladder_1260x1000.png", "ladder_630x500.jpg", "ladder_1200x630.webp"
+    ]
+    for path, size in zip(paths, [(315, 250), (1260, 1000), (630, 500), (1200, 630)]):
+        with Image.open(path) as img:
+            assert img.size == size
+
+
+def test_text_sprites_are_cached_across_covers(tmp_path: Path):
+    gen = CoverGenerator()
+    for i in range(3):
+        gen.generate_cover(title=f"Game {i}", studio="Shared Studio", version="1.0",
+                           output_dir=str(tmp_path), filename_stem=f"c{i}", include_metadata=False)
+
+    # Three distinct titles; studio and version rasterized once and reused twice each
+    assert gen._text_sprite_cache.misses == 3 + 2
+    assert gen._text_sprite_cache.hits == 4
+
+
+def test_single_export_matches_variant_render(tmp_path: Path):
+    from PIL import Image
+
+    params = dict(title="Same Pixels", studio="Studio", version="2.1", background_type="Gradient",
+                  background_color="#123456", secondary_color="#abcdef", gradient_angle=30.0,
+                  font="Arial", bold=True, shadow=True)
+    gen = CoverGenerator()
+    single = gen.generate_cover(output_dir=str(tmp_path), filename_stem="single",
+                                include_metadata=False, **params)
+    variant, = gen.generate_variants([("variant", params)], output_dir=str(tmp_path),
+                                     include_metadata=False)
+    with Image.open(single) as a, Image.open(variant) as b:
+        assert a.size == b.size and a.tobytes() == b.tobytes()
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from app.dedupe import dhash, find_duplicates
+from app.thumbcache import ThumbnailCache
+
+
+def _scene(seed: int, noise: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    base = np.kron(rng.integers(0, 256, (9, 16, 3)), np.ones((80, 80, 1))).astype(np.int16)
+    if noise:
+        base += np.random.default_rng(seed + 100).integers(-noise, noise + 1, base.shape)
+    return Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), "RGB")
+
+
+def test_near_duplicates_are_dropped_and_reported(tmp_path: Path):
+    paths = []
+    for name, img in [("a", _scene(1)), ("a_burst", _scene(1, noise=6)), ("b", _scene(2)),
+                      ("a_again", _scene(1, noise=3)), ("c", _scene(3))]:
+        path = tmp_path / f"{name}.png"
+        img.save(path)
+        paths.append(str(path))
+    (tmp_path / "broken.png").write_bytes(b"nope")
+    paths.append(str(tmp_path / "broken.png"))
+
+    report = find_duplicates(paths, threshold=6, thumbnails=ThumbnailCache(tmp_path / "thumbs"))
+    assert [Path(p).stem for p in report.kept] == ["a", "b", "c"]
+    assert [(Path(d).stem, Path(k).stem) for d, k, _ in report.dropped] == [("a_burst", "a"), ("a_again", "a")]
+    assert report.unreadable == [str(tmp_path / "broken.png")]
+    assert "dropped 2" in report.summary()
+
+
+def test_dhash_separates_distinct_scenes():
+    assert dhash(_scene(1)) == dhash(_scene(1).resize((320, 180)))
+    assert bin(dhash(_scene(1)) ^ dhash(_scene(2))).count("1") > 10
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+import pytest
+
+from app.fonts import FALLBACK_FAMILIES, FontIndex, fit_font, get_font, system_font_dirs, text_size
+
+
+def _linear_fit(text, max_width, max_size=72, min_size=32):
+    for size in range(max_size, min_size - 1, -2):
+        font = get_font(None, size)
+        if text_size(text, font)[0] <= max_width:
+            return font
+    return get_font(None, min_size)
+
+
+def test_get_font_is_cached():
+    assert get_font(None, 30) is get_font(None, 30)
+    assert get_font(None, 30) is not get_font(None, 32)
+
+
+def test_fit_font_matches_linear_scan():
+    for text in ["Hi", "Space Blaster", "An Extraordinarily Long Game Title Indeed", "W" * 60]:
+        for max_width in (120, 550, 2000):
+            expected = _linear_fit(text, max_width)
+            fitted = fit_font(text, None, max_width, 72, 32)
+            assert fitted is expected, (text, max_width)
+
+
+def test_font_index_persists_and_invalidates(tmp_path):
+    system = FontIndex(font_dirs=system_font_dirs(), index_path=tmp_path / "system.json").load()
+    # A regular and a bold face of one fallback family, so fallback resolution is predictable
+    faces = {}
+    for path, entry in system._files.items():
+        if entry["family"] in FALLBACK_FAMILIES and entry["style"] in ("Regular", "Book", "Bold"):
+            faces.setdefault(entry["family"], {})[entry["style"] == "Bold"] = path
+    pair = next((f for f in faces.values() if len(f) == 2), None)
+    if pair is None:
+        pytest.skip("no regular/bold fallback font pair installed")
+    source, bold_source = pair[False], pair[True]
+
+    fonts_dir = tmp_path / "fonts"
+    fonts_dir.mkdir()
+    shutil.copy(source, fonts_dir / "MyFont.ttf")
+    index_path = tmp_path / "index.json"
+
+    first = FontIndex(font_dirs=[fonts_dir], index_path=index_path).load()
+    assert first.files_opened == 1
+    assert first.resolve("MyFont") == str(fonts_dir / "MyFont.ttf")
+    # Unknown families fall back to an indexed fallback family instead of failing per call
+    fallback = first.resolve("Orbitron")
+    assert fallback is not None and fallback == str(fonts_dir / "MyFont.ttf")
+
+    second = FontIndex(font_dirs=[fonts_dir], index_path=index_path).load()
+    assert second.files_opened == 0
+    assert second.resolve("MyFont") == str(fonts_dir / "MyFont.ttf")
+
+    shutil.copy(source, fonts_dir / "Other.ttf")
+    third = FontIndex(font_dirs=[fonts_dir], index_path=index_path).load()
+    assert third.files_opened == 1
+    assert third.resolve("Other") == str(fonts_dir / "Other.ttf")
+
+    # Replacing a font in place leaves the directory mtime alone but is still picked up
+    dir_times = os.stat(fonts_dir).st_atime_ns, os.stat(fonts_dir).st_mtime_ns
+    file_mtime = os.stat(fonts_dir / "Other.ttf").st_mtime_ns
+    shutil.copyfile(bold_source, fonts_dir / "Other.ttf")
+    os.utime(fonts_dir / "Other.ttf", ns=(file_mtime + 1_000_000, file_mtime + 1_000_000))
+    os.utime(fonts_dir, ns=dir_times)
+    fourth = FontIndex(font_dirs=[fonts_dir], index_path=index_path).load()
+    assert fourth.files_opened == 1
+    assert fourth._files[str(fonts_dir / "Other.ttf")]["style"] == "Bold"
@@ -26,3 +26,176 @@ def test_optimize_gif(tmp_path: Path):
     out = opt.optimize_gif(str(src), str(dst), target_size_mb=1.0, quality=80, max_colors=128)
     assert Path(out).exists()
     assert dst.stat().st_size <= src.stat().st_size
+
+
+def _mk_blocky_gif(path: Path, frames: int):
+    import numpy as np
+    rng = np.random.default_rng(0)
+    imgs = [Image.fromarray(np.kron(rng.integers(0, 256, (12, 16, 3)), np.ones((20, 20, 1))).astype(np.uint8))
+            for _ in range(frames)]
+    imgs[0].save(path, save_all=True, append_images=imgs[1:], duration=40, loop=0)
+
+
+def test_optimize_gif_streams_decimated_frames(tmp_path: Path):
+    src = tmp_path / "long.gif"
+    dst = tmp_path / "long_opt.gif"
+    _mk_blocky_gif(src, 120)
+
+    opt = GIFOptimizer()
+    opt.optimize_gif(str(src), str(dst), target_size_mb=0.0)
+    step = opt.last_report.settings.step  # unreachable target: smallest settings
+    with Image.open(dst) as gif:
+        assert gif.n_frames == 120 // step
+        assert gif.info.get("loop") == 0
+        frames = [f.copy() for f in ImageSequence.Iterator(gif)]
+        durations = []
+        for frame in ImageSequence.Iterator(gif):
+            durations.append(frame.info["duration"])
+    assert len({f.size for f in frames}) == 1
+    assert sum(durations) == 120 * 40  # dropped frames' time goes to the kept ones
+
+
+def test_optimize_gif_keeps_transparency(tmp_path: Path):
+    src = tmp_path / "alpha.gif"
+    dst = tmp_path / "alpha_opt.gif"
+    imgs = []
+    for i in range(60):
+        img = Image.new("RGBA", (200, 150), (0, 0, 0, 0))
+        img.paste((255, 40 + i * 3, 0, 255), (i * 2, 40, i * 2 + 50, 90))
+        imgs.append(img)
+    imgs[0].save(src, save_all=True, append_images=imgs[1:], duration=50, loop=0, disposal=2)
+
+    GIFOptimizer().optimize_gif(str(src), str(dst), target_size_mb=0.0)
+    with Image.open(dst) as gif:
+        gif.seek(5)
+        frame = gif.convert("RGBA")
+    assert frame.getpixel((0, 0))[3] == 0
+    assert frame.getchannel("A").getextrema() == (0, 255)
+
+
+def _mk_scene_gif(path: Path, frames: int = 30, size=(320, 180)):
+    import numpy as np
+    from PIL import ImageDraw, ImageFilter
+    rng = np.random.default_rng(2)
+    y, x = np.mgrid[0:size[1], 0:size[0]]
+    imgs = []
+    for i in range(frames):
+        base = np.stack([(x + i * 3) % 256, (y * 2) % 256, ((x + y) // 3 + i) % 256], 2)
+        base = base + rng.integers(-8, 9, base.shape)
+        img = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8)).filter(ImageFilter.GaussianBlur(1))
+        ImageDraw.Draw(img).ellipse((i * 8, 50, i * 8 + 45, 95), fill=(240, 30, 30))
+        imgs.append(img)
+    imgs[0].save(path, save_all=True, append_images=imgs[1:], duration=50, loop=0)
+
+
+def test_optimize_gif_lands_under_fractional_target(tmp_path: Path):
+    src = tmp_path / "scene.gif"
+    dst = tmp_path / "scene_opt.gif"
+    _mk_scene_gif(src)
+    target_mb = src.stat().st_size * 0.4 / (1024 * 1024)  # fractional MB: must not be truncated
+
+    opt = GIFOptimizer()
+    opt.optimize_gif(str(src), str(dst), target_size_mb=target_mb)
+    report = opt.last_report
+    assert dst.stat().st_size == report.size <= report.target_bytes
+    assert report.ratio >= 0.7
+    assert 1 <= report.passes <= GIFOptimizer.MAX_ENCODE_PASSES
+
+
+def test_delta_frames_are_lossless_subrectangles(tmp_path: Path):
+    import numpy as np
+    from PIL import ImageDraw
+    from app.gifpalette import GlobalPalette
+
+    rng = np.random.default_rng(5)
+    background = Image.fromarray(np.kron(rng.integers(0, 256, (18, 32, 3)), np.ones((10, 10, 1))).astype(np.uint8))
+    frames = []
+    for i in range(20):
+        img = background.copy()
+        ImageDraw.Draw(img).rectangle((50 + i * 4, 100, 70 + i * 4, 120), fill=(255, 255, 0))
+        frames.append(img)
+    palette = GlobalPalette.from_frames(frames[::5], reserve_transparent=True)
+
+    opt = GIFOptimizer()
+    paths = {}
+    for delta in (True, False):
+        paths[delta] = tmp_path / f"delta_{delta}.gif"
+        paletted = ((palette.quantize(f), 40, palette.transparency) for f in frames)
+        opt._write_frames(str(paths[delta]), paletted, delta=delta)
+
+    assert paths[True].stat().st_size * 3 < paths[False].stat().st_size
+    with Image.open(paths[True]) as small, Image.open(paths[False]) as full:
+        for i in range(len(frames)):
+            small.seek(i)
+            full.seek(i)
+            if i:
+                x0, y0, x1, y1 = small.tile[0][1]
+                assert (x1 - x0) * (y1 - y0) < 40 * 30  # just the moved sprite
+            assert np.array_equal(np.asarray(small.convert("RGB")), np.asarray(full.convert("RGB")))
+
+
+def test_repeated_frames_are_coalesced_with_summed_durations(tmp_path: Path):
+    import numpy as np
+    rng = np.random.default_rng(7)
+    menu = np.kron(rng.integers(0, 256, (12, 16, 3)), np.ones((20, 20, 1))).astype(np.int16)
+    frames = []
+    for i in range(30):
+        pixels = menu.copy()
+        if i == 17:
+            pixels[100:140, 100:140] = (255, 0, 0)  # the one frame that differs
+        pixels += rng.integers(-2, 3, pixels.shape)  # capture noise
+        frames.append(Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)))
+
+    opt = GIFOptimizer()
+    coalesced = list(opt._coalesce_frames((f, 40) for f in frames))
+    assert [d for _, d in coalesced] == [17 * 40, 40, 12 * 40]
+    r, g, b = np.asarray(coalesced[1][0])[120, 120].tolist()
+    assert r > 250 and g < 5 and b < 5
+
+    # Decimation keeps the lone red frame and the return to the menu, at every step
+    for step in (2, 3):
+        decimated = list(opt._coalesce_frames(((f, 40) for f in frames), step=step))
+        assert [d for _, d in decimated] == [17 * 40, 40, 12 * 40]
+        r, g, b = np.asarray(decimated[1][0])[120, 120].tolist()
+        assert r > 250 and g < 5 and b < 5
+
+    # ...while moving content is still decimated, keeping the total duration
+    moving = []
+    for i in range(12):
+        pixels = menu.copy()
+        pixels[100:140, i * 20:i * 20 + 40] = (255, 0, 0)
+        moving.append((Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)), 40))
+    decimated = list(opt._coalesce_frames(moving, step=3))
+    assert len(decimated) == 4 and sum(d for _, d in decimated) == 12 * 40
+
+
+def test_frame_plan_matches_coalescing_and_signs_each_frame_once(tmp_path: Path):
+    import numpy as np
+    rng = np.random.default_rng(7)
+    menu = np.kron(rng.integers(0, 256, (12, 16, 3)), np.ones((20, 20, 1))).astype(np.int16)
+    frames = []
+    for i in range(40):
+        pixels = menu.copy()
+        if i in (9, 17, 18, 30):
+            pixels[100:140, i * 5:i * 5 + 40] = (255, 0, 0)  # flashes, one lasting two frames
+        if i >= 25:
+            pixels[:40, :40] = (0, 255, 0)
+        pixels += rng.integers(-2, 3, pixels.shape)
+        frames.append((Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)), 30 + i))
+
+    opt = GIFOptimizer()
+    plan = opt._plan_frames(frames, GIFOptimizer.PLANNED_STEPS)
+    for step in GIFOptimizer.PLANNED_STEPS:
+        planned = list(opt._planned_frames(frames, step, plan))
+        coalesced = list(opt._coalesce_frames(frames, step))
+        assert [d for _, d in planned] == [d for _, d in coalesced]
+        assert all(a.tobytes() == b.tobytes() for (a, _), (b, _) in zip(planned, coalesced))
+
+    # Only the first pass over a GIF computes frame signatures
+    src = tmp_path / "scene.gif"
+    _mk_scene_gif(src)
+    signed = []
+    signature = opt._frame_signature
+    opt._frame_signature = lambda frame: signed.append(1) or signature(frame)
+    opt.optimize_gif(str(src), str(tmp_path / "out.gif"), target_size_mb=src.stat().st_size * 0.4 / 2 ** 20)
+    assert len(signed) == 30
@@ -0,0 +1,40 @@
+import numpy as np
+from PIL import Image
+
+from app.gifpalette import GlobalPalette
+
+
+def test_few_color_frames_map_exactly_with_transparency():
+    colors = [(0, 0, 0, 255), (248, 32, 32, 255), (32, 248, 32, 255), (200, 200, 200, 0)]
+    frames = []
+    for shift in range(3):
+        img = Image.new("RGBA", (40, 30), colors[0])
+        img.paste(colors[1], (shift * 5, 0, shift * 5 + 10, 10))
+        img.paste(colors[2], (0, 15, 20, 25))
+        img.paste(colors[3], (30, 0, 40, 30))
+        frames.append(img)
+
+    palette = GlobalPalette.from_frames(frames, colors=16)
+    assert palette.transparency == len(palette.palette) // 3 - 1
+
+    for frame in frames:
+        paletted = palette.quantize(frame)
+        assert paletted.getpalette() == palette.palette  # one shared palette
+        rgba = np.asarray(paletted.convert("RGB"))
+        src = np.asarray(frame)
+        opaque = src[..., 3] == 255
+        assert np.array_equal(rgba[opaque], src[opaque][:, :3])
+        assert (np.asarray(paletted)[~opaque] == palette.transparency).all()
+
+
+def test_lookup_matches_brute_force_nearest_color():
+    rng = np.random.default_rng(3)
+    frame = Image.fromarray(rng.integers(0, 256, (64, 64, 3), dtype=np.uint8))
+    palette = GlobalPalette.from_frames([frame], colors=32)
+    assert len(palette.colors) == 32
+
+    # Pixels at 5-bit cell centres must map to their true nearest palette entry
+    centres = (rng.integers(0, 32, (500, 3)) * 8 + 4).astype(np.uint8)
+    mapped = np.asarray(palette.quantize(Image.fromarray(centres[None, :, :])))[0]
+    dist = ((centres[:, None, :].astype(int) - palette.colors[None, :, :].astype(int)) ** 2).sum(axis=2)
+    assert np.array_equal(dist[np.arange(500), mapped], dist.min(axis=1))
@@ -0,0 +1,29 @@
+from app.gradients import render_gradient
+
+
+def test_vertical_gradient_endpoints():
+    img = render_gradient(["#000000", "#ffffff"], (630, 500))
+    assert img.size == (630, 500)
+    top = img.getpixel((10, 0))
+    bottom = img.getpixel((10, 499))
+    assert top == (0, 0, 0)
+    assert bottom[0] > 250
+    # Rows are uniform for a vertical gradient
+    assert img.getpixel((0, 250)) == img.getpixel((629, 250))
+
+
+def test_multi_stop_and_radial():
+    img = render_gradient(["#ff0000", "#00ff00", "#0000ff"], (101, 50), angle=0)
+    assert img.getpixel((0, 10))[0] > 240
+    assert img.getpixel((50, 10))[1] > 240
+    assert img.getpixel((100, 10))[2] > 240
+
+    radial = render_gradient(["#ffffff", "#000000"], (100, 100), kind="radial")
+    assert radial.getpixel((50, 50))[0] > radial.getpixel((0, 0))[0]
+
+
+def test_gradient_is_memoized_but_returns_copies():
+    a = render_gradient(["#2980b9", "#8e44ad"], (64, 64))
+    a.putpixel((0, 0), (1, 2, 3))
+    b = render_gradient(["#2980b9", "#8e44ad"], (64, 64))
+    assert b.getpixel((0, 0)) != (1, 2, 3)
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+from app.covers import CoverGenerator
+from app.matrix import plan_matrix, render_matrix
+from app.presets import PresetManager
+
+
+def test_preset_cover_options_and_loading(tmp_path: Path):
+    presets_file = tmp_path / "presets.json"
+    presets_file.write_text(json.dumps({"neon": {"bg_type": "Gradient", "bg_color": "#ff00ff", "gutter": 4}}))
+
+    manager = PresetManager()
+    manager.load_presets(str(presets_file))
+    assert manager.cover_options("jam")["background_type"] == "Solid Color"
+    assert manager.cover_options("neon") == {"background_type": "Gradient", "background_color": "#ff00ff"}
+
+
+def test_matrix_shares_layers_between_variants(tmp_path: Path):
+    presets = {
+        "dark": {"background_color": "#111111", "font": "Arial"},
+        "blue": {"background_color": "#224488", "font": "Arial"},
+        "grad": {"background_type": "Gradient", "background_color": "#224488", "font": "Arial"},
+    }
+    rows = [{"title": f"Game {i}", "studio": "Same Studio", "version": "1.0"} for i in range(4)]
+
+    gen = CoverGenerator()
+    plan = plan_matrix(presets, rows, gen.font_index)
+    assert len(plan.variants) == 12
+    assert plan.distinct_layers() == {"backgrounds": 3, "studios": 1, "titles": 4, "versions": 1}
+
+    result = render_matrix(gen, plan, str(tmp_path), include_metadata=False)
+    assert len(result.paths) == 12 and all(Path(p).exists() for p in result.paths)
+    # title-fit + title sprite per title, one studio and one version sprite
+    assert result.layers_built == 4 * 2 + 2
+    assert result.layers_reused == 12 * 4 - result.layers_built
+
+    variant = plan.variants[-1]
+    expected = CoverGenerator()._compose_cover(variant.cover_data)
+    with Image.open(tmp_path / f"{variant.filename_stem}.png") as rendered:
+        assert ImageChops.difference(rendered.convert("RGB"), expected).getbbox() is None
@@ -0,0 +1,81 @@
+import os
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from app.covers import CoverGenerator
+from app.rendercache import RenderCache
+
+
+def test_cover_cache_hit_materializes_identical_file(tmp_path: Path):
+    cache = RenderCache(tmp_path / "cache")
+    gen = CoverGenerator(render_cache=cache)
+
+    first = gen.generate_cover(title="Cached", output_dir=str(tmp_path), filename_stem="a",
+                               include_metadata=False)
+    second = gen.generate_cover(title="Cached", output_dir=str(tmp_path), filename_stem="b",
+                                include_metadata=False)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert Path(first).read_bytes() == Path(second).read_bytes()
+
+    gen.generate_cover(title="Changed", output_dir=str(tmp_path), filename_stem="c",
+                       include_metadata=False)
+    assert cache.misses == 2
+
+
+def test_rerender_does_not_corrupt_hardlinked_blob(tmp_path: Path):
+    cache = RenderCache(tmp_path / "cache")
+    out = tmp_path / "out.png"
+
+    def produce(color):
+        return lambda: Image.new("RGB", (8, 8), color).save(out)
+
+    cache.run("test", 1, [], {"v": 1}, [str(out)], produce("red"))
+    cache.run("test", 1, [], {"v": 1}, [str(out)], produce("red"))  # hit, hardlinked
+    red = out.read_bytes()
+
+    # Same output path, different params: must not write through the shared inode
+    cache.run("test", 1, [], {"v": 2}, [str(out)], produce("blue"))
+    target = tmp_path / "again.png"
+    assert cache.run("test", 1, [], {"v": 1}, [str(target)], produce("green"))
+    assert target.read_bytes() == red
+
+
+def test_disabled_cache_and_prune(tmp_path: Path):
+    out = tmp_path / "out.png"
+    calls = []
+
+    bypass = RenderCache(tmp_path / "cache", enabled=False)
+    for _ in range(2):
+        bypass.run("test", 1, [], {}, [str(out)], lambda: calls.append(Image.new("RGB", (4, 4)).save(out)))
+    assert len(calls) == 2
+    assert not (tmp_path / "cache").exists()
+
+    cache = RenderCache(tmp_path / "cache")
+    for i in range(3):
+        cache.run("test", 1, [], {"i": i}, [str(out)], lambda: Image.new("RGB", (4, 4)).save(out))
+    removed, freed = cache.prune(0)
+    assert removed == 3 and freed > 0
+    assert not any(p.is_file() for p in (tmp_path / "cache").rglob("*"))
+    assert os.path.exists(out)
+
+
+def test_hits_keep_output_mtime_and_store_enforces_cap(tmp_path: Path):
+    cache = RenderCache(tmp_path / "cache")
+    out = tmp_path / "out.png"
+    cache.run("test", 1, [], {}, [str(out)], lambda: Image.new("RGB", (4, 4)).save(out))
+    linked = tmp_path / "linked.png"
+    assert cache.run("test", 1, [], {}, [str(linked)], lambda: None)
+    os.utime(linked, (1_000_000, 1_000_000))  # shares its inode with the blob
+    assert cache.run("test", 1, [], {}, [str(tmp_path / "again.png")], lambda: None)
+    assert os.stat(linked).st_mtime == 1_000_000  # last use is tracked beside the blob
+
+    # Past max_bytes, store() evicts the least recently used artifacts
+    capped = RenderCache(tmp_path / "capped", max_bytes=2 * out.stat().st_size)
+    for i in range(4):
+        path = tmp_path / f"c{i}.png"
+        capped.run("test", 1, [], {"i": i}, [str(path)], lambda: Image.new("RGB", (4, 4)).save(path))
+        time.sleep(0.01)
+    assert len(list((tmp_path / "capped").rglob("*.png"))) == 2
+    assert capped.run("test", 1, [], {"i": 3}, [str(tmp_path / "newest.png")], lambda: None)
@@ -11,3 +11,30 @@ def test_aspect_ratio_tolerance():
     assert ensure_aspect_ratio((630, 501), (315, 250), tolerance=0.02) is True
     # Large deviation rejected
     assert ensure_aspect_ratio((700, 500), (315, 250), tolerance=0.01) is False
+
+
+def test_probe_media_reads_header_only(tmp_path):
+    from PIL import Image
+
+    from app.utils import probe_media, validate_image
+
+    still = tmp_path / "still.png"
+    Image.new("RGB", (64, 32)).save(still)
+    info = probe_media(still)
+    assert (info.format, info.size, info.mode, info.n_frames, info.is_animated) == ("PNG", (64, 32), "RGB", 1, False)
+
+    anim = tmp_path / "anim.gif"
+    frames = [Image.new("RGB", (8, 8), (i * 100, 0, 0)) for i in range(3)]
+    frames[0].save(anim, save_all=True, append_images=frames[1:])
+    assert probe_media(anim).n_frames == 3 and probe_media(anim).is_animated
+
+    assert probe_media(still, max_pixels=64 * 32 - 1) is None
+    limit = Image.MAX_IMAGE_PIXELS
+    try:
+        Image.MAX_IMAGE_PIXELS = 64 * 32 - 1  # user overrides of Pillow's limit apply
+        assert probe_media(still) is None
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    assert not validate_image(tmp_path / "broken.png")
+    assert not validate_image(tmp_path / "missing.png")
@@ -0,0 +1,72 @@
+import os
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from app.collage import ScreenshotCollage
+from app.thumbcache import ThumbnailCache
+
+
+def test_thumbnails_hit_memory_then_disk_and_track_mtime(tmp_path: Path):
+    src = tmp_path / "shot.png"
+    Image.new("RGB", (1920, 1080), (10, 120, 200)).save(src)
+
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    thumb = cache.get(str(src), 200)
+    assert max(thumb.size) == 256 and cache.decodes == 1
+    assert cache.get(str(src), 100).size == (128, 72)  # smaller mip built in the same pass
+    assert cache.get(str(src), 200) is thumb and cache.decodes == 1
+
+    reopened = ThumbnailCache(tmp_path / "thumbs")
+    assert reopened.get(str(src), 200).size == thumb.size
+    assert reopened.decodes == 0
+
+    Image.new("RGB", (1000, 1000), (200, 0, 0)).save(src)
+    os.utime(src, ns=(0, os.stat(src).st_mtime_ns + 1_000_000))
+    assert reopened.get(str(src), 200).size == (256, 256)
+    assert reopened.decodes == 1
+
+
+def test_collage_preview_layout_changes_reuse_thumbnails(tmp_path: Path):
+    paths = []
+    for i in range(4):
+        p = tmp_path / f"s{i}.png"
+        Image.new("RGB", (1280, 720), (40 * i, 80, 160)).save(p)
+        paths.append(str(p))
+
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    collager = ScreenshotCollage(thumbnail_cache=cache)
+    for layout, gutter in [("Grid", 12), ("Masonry", 12), ("Linear", 20), ("Grid", 4)]:
+        assert collager.generate_preview({"images": paths, "layout": layout, "gutter": gutter}, (400, 320))
+    assert cache.decodes == 4
+
+
+def test_disk_store_prunes_least_recently_used(tmp_path: Path):
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"s{i}.png"
+        Image.new("RGB", (640, 360), (60, 90, 30)).save(p)  # same thumbnail size for each
+        paths.append(str(p))
+    thumbs = tmp_path / "thumbs"
+
+    ThumbnailCache(thumbs, disk_max_bytes=None).get(paths[0], 64)
+    one_source = sum(f.stat().st_size for f in thumbs.rglob("*.png"))
+
+    capped = ThumbnailCache(thumbs, disk_max_bytes=2 * one_source)
+    capped.get(paths[1], 64)
+    time.sleep(0.02)
+    ThumbnailCache(thumbs).get(paths[0], 64)  # disk hit: now more recent than paths[1]
+    time.sleep(0.02)
+    capped.get(paths[2], 64)
+
+    reopened = ThumbnailCache(thumbs)
+    reopened.get(paths[0], 64)
+    reopened.get(paths[2], 64)
+    assert reopened.decodes == 0
+    reopened.get(paths[1], 64)
+    assert reopened.decodes == 1  # the least recently used source was evicted
+
+    removed, freed = capped.prune(0)
+    assert removed > 0 and freed > 0
+    assert not list(thumbs.rglob("*.png"))